@@ -0,0 +1,550 @@
+"""
+Single-pass traversal of timeline payloads (UserTweets, UserTweetsAndReplies, UserTweetsReplies).
+
+The original helpers (tweet text extraction, bottom / next cursor, tweet ids, tweet objects and
+conversation ids) each walked the whole payload. Here one walk drives a set of visitors that collect
+the same results side by side.
+A visitor can drop out of a subtree (SKIP) and the walk does not descend where no visitor is
+interested, nor into tweet / user fields that never hold timeline data (entities, views, ...);
+it stops as soon as every visitor is done (e.g. tweet target reached, cursor found).
+By default scan_timeline() does not even walk the whole payload: TimelineDecoder follows the known
+GraphQL timeline paths and uses the generic walk only for shapes it does not recognise.
+
+scripts/bench_timeline_parsing.py keeps the original helpers as reference implementations, checks the
+results against them and times both.
+"""
+import hashlib
+import json
+
+from api.twitter_parser import tweet_author_id
+
+# Returned by TimelineVisitor.enter(): this visitor ignores the node's subtree
+SKIP = object()
+
+_CONTAINERS = (dict, list)
+
+# Tweet / user fields that never hold tweets, cursors or conversation metadata: not descended into
+_OPAQUE_KEYS = frozenset((
+    'entities', 'extended_entities', 'edit_control', 'views', 'unmention_data', 'card',
+    'affiliates_highlighted_label', 'professional', 'relationship_counts', 'verification',
+    'verification_info', 'tipjar_settings', 'legacy_extended_profile', 'avatar', 'location',
+    'privacy', 'dm_permissions', 'media_permissions', 'profile_image_shape',
+))
+
+
+def find_id(payload):
+    """First rest_id / id_str / id in a payload (depth-first), as a string"""
+    if isinstance(payload, dict):
+        for key in ('rest_id', 'id_str', 'id'):
+            if key in payload and isinstance(payload[key], (str, int)):
+                return str(payload[key])
+        for value in payload.values():
+            found = find_id(value)
+            if found:
+                return found
+    elif isinstance(payload, list):
+        for item in payload:
+            found = find_id(item)
+            if found:
+                return found
+    return None
+
+
+def tweet_result_id(tweet_results):
+    """
+    Same id as find_id(tweet_results), but read directly from result.rest_id (or result.tweet.rest_id
+    for visibility-wrapped tweets) instead of searching; other shapes fall back to find_id.
+    """
+    for key in ('rest_id', 'id_str', 'id'):
+        if isinstance(tweet_results.get(key), (str, int)):
+            return str(tweet_results[key])
+    result = tweet_results.get('result')
+    if isinstance(result, dict) and next(iter(tweet_results)) == 'result':
+        rest_id = result.get('rest_id')
+        if isinstance(rest_id, (str, int)) and rest_id != '':
+            return str(rest_id)
+        tweet = result.get('tweet')
+        if isinstance(tweet, dict) and 'rest_id' not in result and 'id_str' not in result and 'id' not in result:
+            rest_id = tweet.get('rest_id')
+            if isinstance(rest_id, (str, int)) and rest_id != '' and _only_scalars_before(result, 'tweet'):
+                return str(rest_id)
+    return find_id(tweet_results)
+
+
+def _only_scalars_before(node, key):
+    for other, value in node.items():
+        if other == key:
+            return True
+        if isinstance(value, _CONTAINERS):
+            return False
+    return False
+
+
+class TimelineVisitor:
+    """
+    enter(node, state) is called for every dict, in document (pre-)order. It returns None to keep
+    the current state for the children, a new state object, or SKIP to leave the subtree out.
+    Visitors with wants_scalars also get scalar(key, value) for every non-container dict value, in
+    item order (interleaved with the container children, as a recursive walk would see them).
+    Setting done stops the visitor; stop_walk ends the whole traversal.
+    """
+    wants_scalars = False
+
+    def __init__(self):
+        self.done = False
+        self.stop_walk = False
+
+    def enter(self, node, state):
+        return None
+
+    def scalar(self, key, value):
+        pass
+
+
+class TweetTextVisitor(TimelineVisitor):
+    """
+    Tweet texts in document order (note tweet text preferred over full_text; a dict that yielded
+    a text is not searched further), each keyed by the enclosing tweet's id / created_at / author id.
+    max_tweets ends the walk once that many texts were found.
+    """
+
+    def __init__(self, max_tweets=None):
+        super().__init__()
+        self.records = []
+        self.max_tweets = max_tweets
+
+    def _add(self, text, tweet_id, created_at, author_id):
+        self.records.append({"tweet_id": tweet_id, "text": text, "created_at": created_at, "author_id": author_id})
+        if self.max_tweets and len(self.records) >= self.max_tweets:
+            self.done = True
+            self.stop_walk = True
+
+    def enter(self, node, state):
+        new_state = None
+        legacy = node.get('legacy')
+        if node.get('rest_id') and isinstance(legacy, dict):
+            new_state = (str(node['rest_id']), legacy.get('created_at'), tweet_author_id(node, legacy))
+        tweet_id, created_at, author_id = new_state or state or (None, None, None)
+
+        note_tweet = node.get('note_tweet')
+        if isinstance(note_tweet, dict):
+            note_results = note_tweet.get('note_tweet_results')
+            if isinstance(note_results, dict):
+                note_result = note_results.get('result')
+                if note_result and isinstance(note_result, dict) and note_result.get('text'):
+                    self._add(note_result['text'], tweet_id, created_at, author_id)
+                    return SKIP
+
+        full_text = node.get('full_text')
+        if isinstance(full_text, str) and full_text.strip() != '':
+            self._add(
+                full_text, tweet_id or node.get('id_str'), created_at or node.get('created_at'),
+                author_id or (str(node['user_id_str']) if node.get('user_id_str') else None),
+            )
+            return SKIP
+        return new_state
+
+
+class _TweetBoundary(TimelineVisitor):
+    """Cursor visitors: timeline cursors never live inside tweet or user results, so skip those"""
+
+    def enter(self, node, state):
+        if node.get('__typename') in ('Tweet', 'User', 'TweetWithVisibilityResults'):
+            return SKIP
+        return self.visit(node)
+
+    def visit(self, node):
+        return None
+
+
+class BottomCursorVisitor(_TweetBoundary):
+    """First TimelineTimelineCursor with cursor_type Bottom"""
+
+    def __init__(self):
+        super().__init__()
+        self.cursor = None
+
+    def visit(self, node):
+        if node.get('__typename') == 'TimelineTimelineCursor' and node.get('cursor_type') == 'Bottom':
+            value = node.get('value')
+            if value:
+                self.cursor = value
+                self.done = True
+            return SKIP
+        return None
+
+
+class NextCursorVisitor(_TweetBoundary):
+    """
+    Next-page cursor of twitter_posts pagination: the first cursor typed Bottom
+    (cursorType / cursor_type), otherwise the first typed or *cursor*-named value.
+    """
+    wants_scalars = True
+
+    def __init__(self):
+        super().__init__()
+        self.bottom = None
+        self.first_any = None
+
+    @property
+    def cursor(self):
+        return self.bottom if self.bottom is not None else self.first_any
+
+    def visit(self, node):
+        cursor_type = node.get('cursorType', node.get('cursor_type'))
+        value = node.get('value')
+        if cursor_type is not None and isinstance(value, (str, int)):
+            cursor_type = str(cursor_type).lower()
+            if cursor_type == 'bottom':
+                self.bottom = str(value)
+                self.done = True
+                return SKIP
+            if cursor_type and self.first_any is None:
+                self.first_any = str(value)
+        return None
+
+    def scalar(self, key, value):
+        if self.first_any is None and isinstance(value, (str, int)):
+            key_lower = key.lower()
+            if 'cursor' in key_lower and key_lower not in ('cursortype', 'cursor_type'):
+                self.first_any = str(value)
+
+
+class TweetIdVisitor(TimelineVisitor):
+    """Tweet ids of tweet_results and __typename Tweet nodes, in document order with repeats (page signature)"""
+
+    def __init__(self):
+        super().__init__()
+        self.ids = []
+
+    def enter(self, node, state):
+        tweet_results = node.get('tweet_results')
+        if isinstance(tweet_results, dict):
+            tweet_id = tweet_result_id(tweet_results)
+            if tweet_id:
+                self.ids.append(tweet_id)
+        if node.get('__typename') == 'Tweet':
+            tweet_id = find_id(node)
+            if tweet_id:
+                self.ids.append(tweet_id)
+        return None
+
+
+class TweetObjectVisitor(TimelineVisitor):
+    """Tweet result objects (__typename Tweet with legacy)"""
+
+    def __init__(self):
+        super().__init__()
+        self.tweets = []
+
+    def enter(self, node, state):
+        if node.get('__typename') == 'Tweet' and 'legacy' in node:
+            self.tweets.append(node)
+        return None
+
+
+class ConversationIdVisitor(TimelineVisitor):
+    """conversation_metadata.all_tweet_ids"""
+
+    def __init__(self):
+        super().__init__()
+        self.ids = set()
+
+    def enter(self, node, state):
+        convo_meta = node.get('conversation_metadata')
+        if isinstance(convo_meta, dict):
+            self.ids.update(str(tid) for tid in convo_meta.get('all_tweet_ids', []) if tid)
+        return None
+
+
+class _Walk:
+    def __init__(self, visitors):
+        self.visitors = visitors
+        self.remaining = len(visitors)
+        self.stopped = False
+        # When set, dicts are only descended through these keys (direct-path decoding)
+        self.only_keys = None
+
+    def run(self, payload):
+        if self.visitors:
+            self._node(payload, self.visitors, [None] * len(self.visitors))
+
+    def _node(self, node, visitors, states):
+        if isinstance(node, dict):
+            child_visitors = []
+            child_states = []
+            scalar_visitors = None
+            for visitor, state in zip(visitors, states):
+                if visitor.done:
+                    continue
+                result = visitor.enter(node, state)
+                if visitor.stop_walk:
+                    self.stopped = True
+                    return
+                if visitor.done:
+                    self.remaining -= 1
+                    if not self.remaining:
+                        self.stopped = True
+                        return
+                    continue
+                if result is SKIP:
+                    continue
+                child_visitors.append(visitor)
+                child_states.append(state if result is None else result)
+                if visitor.wants_scalars:
+                    if scalar_visitors is None:
+                        scalar_visitors = []
+                    scalar_visitors.append(visitor)
+            if not child_visitors:
+                return
+            only_keys = self.only_keys
+            for key, value in node.items():
+                if isinstance(value, _CONTAINERS):
+                    if not value or key in _OPAQUE_KEYS or (only_keys is not None and key not in only_keys):
+                        continue
+                    self._node(value, child_visitors, child_states)
+                    if self.stopped:
+                        return
+                elif scalar_visitors:
+                    for visitor in scalar_visitors:
+                        visitor.scalar(key, value)
+        elif isinstance(node, list):
+            for item in node:
+                if item and isinstance(item, _CONTAINERS):
+                    self._node(item, visitors, states)
+                    if self.stopped:
+                        return
+
+
+def walk_timeline(payload, visitors):
+    """Runs the visitors over payload in one traversal and returns them"""
+    _Walk(list(visitors)).run(payload)
+    return visitors
+
+
+# Wrapper keys leading from the response root to timeline.instructions
+_WRAPPER_KEYS = ('data', 'user', 'user_result', 'result', 'timeline_response', 'timeline', 'timeline_v2')
+
+# Keys on the path instruction entry -> content -> itemContent / items -> tweet_results -> tweet
+# (incl. quoted / retweeted tweets and visibility wrappers); everything else in an entry is not read
+_ENTRY_PATH_KEYS = frozenset((
+    'content', 'itemContent', 'items', 'item', 'metadata', 'tweet_results', 'result', 'tweet',
+    'legacy', 'quoted_status_result', 'retweeted_status_result',
+))
+
+# Instructions that carry no entries
+_NO_ENTRY_INSTRUCTIONS = frozenset((
+    'TimelineClearCache', 'TimelineTerminateTimeline', 'TimelineShowAlert', 'TimelineShowCover',
+    'TimelineClearEntriesUnreadState', 'TimelineMarkEntriesUnreadGreaterThanSortIndex',
+))
+
+
+def _find_instructions(node, path, depth=0):
+    """timeline.instructions under the wrapper keys; path gets the dicts leading there, innermost first"""
+    if not isinstance(node, dict) or depth > len(_WRAPPER_KEYS):
+        return None
+    instructions = node.get('instructions')
+    if isinstance(instructions, list):
+        path.append(node)
+        return instructions
+    for key in _WRAPPER_KEYS:
+        value = node.get(key)
+        if value:
+            found = _find_instructions(value, path, depth + 1)
+            if found is not None:
+                path.append(node)
+                return found
+    return None
+
+
+def _is_cursor(content):
+    return ('cursorType' in content or 'cursor_type' in content) and 'value' in content
+
+
+def _known_item(item_content):
+    return isinstance(item_content, dict) and ('tweet_results' in item_content or _is_cursor(item_content))
+
+
+def _item_content(item):
+    # itemContent in the camelCase APIs, content in twitter283's snake_case timelines
+    return item.get('itemContent', item.get('content'))
+
+
+def _known_entry(entry):
+    """Tweet item, conversation module of tweet items, or cursor: the shapes the direct path reads"""
+    content = entry.get('content') if isinstance(entry, dict) else None
+    if not isinstance(content, dict):
+        return False
+    if 'itemContent' in content or 'content' in content:
+        return _known_item(_item_content(content))
+    if 'items' in content:
+        items = content['items']
+        return isinstance(items, list) and all(
+            isinstance(item, dict) and isinstance(item.get('item'), dict) and _known_item(_item_content(item['item']))
+            for item in items
+        )
+    return _is_cursor(content)
+
+
+class TimelineDecoder:
+    """
+    Direct-path decoding of GraphQL timeline pages: instructions -> entries -> content ->
+    itemContent -> tweet_results, reading only the keys on that path (_ENTRY_PATH_KEYS), so the cost
+    follows the number of tweets rather than the size of the user / entity objects around them.
+    An instruction or entry of unknown shape is handed to the generic walker instead, and so is the
+    whole page when no instructions are found; each fallback is counted by reason (stats()).
+    When the entries hold no cursor, the scalar fields of the dicts on the path to the instructions
+    are read too (a response-level next_cursor); with none there either it is a normal last page.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.fallback_pages = 0
+        self.fallbacks = {}
+
+    def _fallback(self, reason, walk, node, counted):
+        self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+        if not counted:
+            self.fallback_pages += 1
+        only_keys, walk.only_keys = walk.only_keys, None
+        walk._node(node, walk.visitors, [None] * len(walk.visitors))
+        walk.only_keys = only_keys
+        return True
+
+    def decode(self, payload, visitors):
+        """Runs the visitors over payload; returns them"""
+        visitors = list(visitors)
+        self.pages += 1
+        walk = _Walk(visitors)
+        if not visitors:
+            return visitors
+
+        fell_back = False
+        path = []
+        instructions = _find_instructions(payload, path)
+        if instructions is None:
+            self._fallback('no_instructions', walk, payload, fell_back)
+            return visitors
+
+        states = [None] * len(visitors)
+        for instruction in instructions:
+            if not isinstance(instruction, dict):
+                continue
+            if 'entries' in instruction:
+                entries = instruction['entries']
+            elif 'entry' in instruction:
+                entries = [instruction['entry']]
+            elif 'moduleItems' in instruction:
+                entries = instruction['moduleItems']
+            elif instruction.get('type', instruction.get('__typename')) in _NO_ENTRY_INSTRUCTIONS:
+                continue
+            else:
+                fell_back = self._fallback('instruction', walk, instruction, fell_back)
+                if walk.stopped:
+                    return visitors
+                continue
+
+            for entry in entries if isinstance(entries, list) else ():
+                if _known_entry(entry):
+                    walk.only_keys = _ENTRY_PATH_KEYS
+                    walk._node(entry, visitors, states)
+                    walk.only_keys = None
+                else:
+                    fell_back = self._fallback('entry', walk, entry, fell_back)
+                if walk.stopped:
+                    return visitors
+
+        # Cursor-named fields beside the instructions, e.g. a response-level next_cursor
+        scalar_visitors = [visitor for visitor in visitors if visitor.wants_scalars and not visitor.done]
+        for node in reversed(path) if scalar_visitors else ():
+            for key, value in node.items():
+                if not isinstance(value, _CONTAINERS):
+                    for visitor in scalar_visitors:
+                        visitor.scalar(key, value)
+        return visitors
+
+    def stats(self):
+        return {
+            "pages": self.pages,
+            "direct_pages": self.pages - self.fallback_pages,
+            "fallback_pages": self.fallback_pages,
+            "fallbacks": dict(self.fallbacks),
+        }
+
+    def reset(self):
+        self.pages = 0
+        self.fallback_pages = 0
+        self.fallbacks = {}
+
+
+# Process-wide decoder (scan_timeline); its counters cover every page parsed in the run
+timeline_decoder = TimelineDecoder()
+
+
+class TimelineScan:
+    """Everything one pass over a timeline page found (fields of collectors that were not requested stay empty)"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.tweet_records = []
+        self.bottom_cursor = None
+        self.next_cursor = None
+        self.tweet_ids = []
+        self.tweets = []
+        self.conversation_ids = set()
+
+    @property
+    def tweet_texts(self):
+        return [record["text"] for record in self.tweet_records]
+
+    def page_signature(self, sorted_ids=None):
+        """
+        Hash of the page for repeated-page detection: its sorted tweet ids (tolerates cursor metadata
+        changes), else the whole payload. Pass sorted(set(tweet_ids)) if the caller already built it.
+        """
+        tweet_ids = sorted(set(self.tweet_ids)) if sorted_ids is None else sorted_ids
+        basis = {"tweets": tweet_ids} if tweet_ids else self.payload
+        serialized = json.dumps(basis, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def scan_timeline(payload, texts=True, bottom_cursor=False, next_cursor=False, tweet_ids=False,
+                  tweets=False, conversation_ids=False, max_tweets=None, direct=True):
+    """
+    One traversal collecting the requested parts of a timeline page. With max_tweets the walk ends
+    as soon as that many tweet texts were found (the cursor is not needed then: the caller has enough).
+    direct=False walks the whole payload generically instead of decoding the known timeline paths.
+    """
+    scan = TimelineScan(payload)
+    visitors = {}
+    if texts:
+        visitors["texts"] = TweetTextVisitor(max_tweets)
+    if bottom_cursor:
+        visitors["bottom_cursor"] = BottomCursorVisitor()
+    if next_cursor:
+        visitors["next_cursor"] = NextCursorVisitor()
+    if tweet_ids:
+        visitors["tweet_ids"] = TweetIdVisitor()
+    if tweets:
+        visitors["tweets"] = TweetObjectVisitor()
+    if conversation_ids:
+        visitors["conversation_ids"] = ConversationIdVisitor()
+
+    if direct:
+        visitors = dict(zip(visitors, timeline_decoder.decode(payload, visitors.values())))
+    else:
+        walk_timeline(payload, visitors.values())
+
+    if texts:
+        scan.tweet_records = visitors["texts"].records
+    if bottom_cursor:
+        scan.bottom_cursor = visitors["bottom_cursor"].cursor
+    if next_cursor:
+        scan.next_cursor = visitors["next_cursor"].cursor
+    if tweet_ids:
+        scan.tweet_ids = visitors["tweet_ids"].ids
+    if tweets:
+        scan.tweets = visitors["tweets"].tweets
+    if conversation_ids:
+        scan.conversation_ids = visitors["conversation_ids"].ids
+    return scan
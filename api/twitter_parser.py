@@ -41,41 +41,12 @@ def simplify_twitter_data(raw_data):
     logger.debug(f"Simplified data for @{simplified['profile'].get('screen_name')}: {len(simplified['tweets'])} tweets")
     return simplified
 
-def _find_full_text_recursively(data, results):
-    """
-    Helper function to recursively find tweet text within nested JSON structures.
-    Prioritizes 'note_tweet_results' for longer tweets, then 'full_text'.
-    """
-    if not data:
-        return
-
-    if isinstance(data, list):
-        for item in data:
-            _find_full_text_recursively(item, results)
-    elif isinstance(data, dict):
-        # Check for note_tweet (for longer tweets)
-        if 'note_tweet' in data and isinstance(data['note_tweet'], dict):
-            note_tweet = data['note_tweet']
-            if 'note_tweet_results' in note_tweet and isinstance(note_tweet['note_tweet_results'], dict):
-                note_result = note_tweet['note_tweet_results'].get('result')
-                if note_result and isinstance(note_result, dict) and note_result.get('text'):
-                    results.append(note_result['text'])
-                    return # Found a note tweet, no need to recurse further into this object
-
-        # Check for full_text
-        if 'full_text' in data and isinstance(data['full_text'], str) and data['full_text'].strip() != '':
-            results.append(data['full_text'])
-            return # Found full_text, no need to recurse further into this object
-
-        # Recurse into other dictionary properties
-        for key in data:
-            _find_full_text_recursively(data[key], results)
-
-def extract_tweets_from_response(data):
-    """
-    Extracts tweet texts from raw Twitter API response data.
-    """
-    results = []
-    _find_full_text_recursively(data, results)
-    logger.debug(f"Extracted {len(results)} tweets from raw response.")
-    return results
\ No newline at end of file
+def tweet_author_id(result, legacy):
+    """Author user id of a tweet result: legacy.user_id_str, else core.user_results.result.rest_id"""
+    if legacy.get('user_id_str'):
+        return str(legacy['user_id_str'])
+    core = result.get('core')
+    user_result = core.get('user_results', {}).get('result') if isinstance(core, dict) else None
+    if isinstance(user_result, dict) and user_result.get('rest_id'):
+        return str(user_result['rest_id'])
+    return None
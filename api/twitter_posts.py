@@ -1,11 +1,13 @@
 import argparse
 import asyncio
+import glob
 import json
 import os
 import sys
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Optional
 
-import hashlib
 import pytz
 import requests
 
@@ -15,12 +17,35 @@ if ROOT_DIR not in sys.path:
     sys.path.append(ROOT_DIR)
 
 from api.twitter_client import make_http_request, throttled_rapid_api_request
-from config import BASE_DIR, RAPID_API_KEY
+from api.timeline_visitor import scan_timeline
+from config import BASE_DIR, RAPID_API_KEY, TWEET_CACHE_ENABLED
+from db.tweet_cache import TweetCache
+from utils.json_stream import JsonStream
 from utils.logger import logger
+from utils.page_log import PAGE_LOG_SUFFIX, PageLog, PageLogReader, convert_page_log
+from utils.tweet_record import TweetAuthor, TweetRecord
 
 RAPID_API_HOST_283 = 'twitter283.p.rapidapi.com'
 BASE_URL = f"https://{RAPID_API_HOST_283}"
 ANALYSIS_DIR = os.path.join(BASE_DIR, 'twitter_post_analysis')
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+
+# Why pagination stopped (PaginationState.stop_reason); only STOP_HTTP_ERROR leaves it resumable
+STOP_DUPLICATE_PAGE = 'duplicate_page'
+STOP_NO_NEW_TWEETS = 'no_new_tweets'
+STOP_NO_NEXT_CURSOR = 'no_next_cursor'
+STOP_CURSOR_SEEN = 'cursor_seen'
+STOP_HTTP_ERROR = 'http_error'
+
+_tweet_cache = None
+
+
+def _get_tweet_cache():
+    """Process-wide TweetCache (db/tweet_cache.db), or None when TWEET_CACHE_ENABLED is off"""
+    global _tweet_cache
+    if _tweet_cache is None and TWEET_CACHE_ENABLED:
+        _tweet_cache = TweetCache()
+    return _tweet_cache
 
 
 def format_est_date_time():
@@ -51,119 +76,10 @@ def _extract_user_id(payload):
     return None
 
 
-def _extract_next_cursor(payload):
-    """
-    Attempts to find the next cursor in a paginated timeline response.
-    Prefers 'Bottom' cursors but falls back to any cursor-like field.
-    """
-    cursors = {"bottom": [], "any": []}
-
-    def record_typed_cursor(cursor_type_value, value):
-        """
-        Records cursor values that explicitly declare their type (e.g., Top/Bottom).
-        """
-        if cursor_type_value is None or not isinstance(value, (str, int)):
-            return
-
-        cursor_type = str(cursor_type_value).lower()
-        value_str = str(value)
-
-        if cursor_type == 'bottom':
-            cursors['bottom'].append(value_str)
-        elif cursor_type:
-            cursors['any'].append(value_str)
-
-    def walk(node):
-        if isinstance(node, dict):
-            cursor_type_value = node.get('cursorType', node.get('cursor_type'))
-            record_typed_cursor(cursor_type_value, node.get('value'))
-
-            for key, val in node.items():
-                key_lower = key.lower()
-                if key_lower not in ('cursortype', 'cursor_type') and 'cursor' in key_lower and isinstance(val, (str, int)):
-                    cursors['any'].append(str(val))
-                if isinstance(val, (dict, list)):
-                    walk(val)
-        elif isinstance(node, list):
-            for item in node:
-                walk(item)
-
-    walk(payload)
-
-    if cursors['bottom']:
-        return cursors['bottom'][0]
-    if cursors['any']:
-        return cursors['any'][0]
-    return None
-
-
 def _clean_username(username):
     return username.lstrip('@').strip()
 
 
-def _compute_page_signature(data):
-    """
-    Creates a stable hash of the page payload so we can detect repeated pages.
-    Prefer a hash of tweet ids when present to tolerate minor cursor metadata differences.
-    """
-    tweet_ids = sorted(set(_collect_tweet_ids(data)))
-    if tweet_ids:
-        basis = {"tweets": tweet_ids}
-    else:
-        basis = data
-
-    serialized = json.dumps(basis, sort_keys=True, separators=(',', ':'))
-    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
-
-
-def _collect_tweet_ids(payload):
-    """
-    Recursively collects tweet/rest ids from timeline entries.
-    """
-    ids = []
-
-    if isinstance(payload, dict):
-        # Direct tweet result hit
-        tweet_result = payload.get('tweet_results')
-        if isinstance(tweet_result, dict):
-            rid = _extract_user_id(tweet_result)  # reuse id finder; rest_id/id_str are covered
-            if rid:
-                ids.append(rid)
-        # Some timeline structures put tweet id under 'rest_id' on result
-        if payload.get('__typename') == 'Tweet':
-            rid = _extract_user_id(payload)
-            if rid:
-                ids.append(rid)
-
-        for val in payload.values():
-            ids.extend(_collect_tweet_ids(val))
-    elif isinstance(payload, list):
-        for item in payload:
-            ids.extend(_collect_tweet_ids(item))
-
-    return ids
-
-
-def _iter_tweets(payload):
-    """
-    Yields Tweet objects from a timeline payload.
-    """
-    tweets = []
-
-    def walk(node):
-        if isinstance(node, dict):
-            if node.get('__typename') == 'Tweet' and 'legacy' in node:
-                tweets.append(node)
-            for v in node.values():
-                walk(v)
-        elif isinstance(node, list):
-            for item in node:
-                walk(item)
-
-    walk(payload)
-    return tweets
-
-
 def _extract_author_from_tweet(tweet):
     user_result = tweet.get('core', {}).get('user_results', {})
     user_obj = user_result.get('result', user_result) if isinstance(user_result, dict) else {}
@@ -172,116 +88,82 @@ def _extract_author_from_tweet(tweet):
     relationship = user_obj.get('relationship_counts', {})
     verification = user_obj.get('verification', {}) or user_obj.get('legacy_verification_info', {})
 
-    return {
-        "id": _extract_user_id(user_obj),
-        "screenName": core_user.get('screen_name') or legacy_user.get('screen_name'),
-        "name": core_user.get('name') or legacy_user.get('name'),
-        "followersCount": relationship.get('followers') or legacy_user.get('followers_count'),
-        "followingCount": relationship.get('following') or legacy_user.get('friends_count'),
-        "verified": bool(verification.get('is_blue_verified')) if isinstance(verification, dict) else False,
-        "profileImageUrl": legacy_user.get('profile_image_url_https') or legacy_user.get('profile_image_url'),
-    }
+    return TweetAuthor(
+        id=_extract_user_id(user_obj),
+        screen_name=core_user.get('screen_name') or legacy_user.get('screen_name'),
+        name=core_user.get('name') or legacy_user.get('name'),
+        followers_count=relationship.get('followers') or legacy_user.get('followers_count'),
+        following_count=relationship.get('following') or legacy_user.get('friends_count'),
+        verified=bool(verification.get('is_blue_verified')) if isinstance(verification, dict) else False,
+        profile_image_url=legacy_user.get('profile_image_url_https') or legacy_user.get('profile_image_url'),
+    )
 
 
 def _extract_entities(legacy):
+    """urls, mentions, hashtags and media as tuples (field order documented on TweetRecord)"""
     entities = legacy.get('entities', {}) or {}
-    urls = []
-    for u in entities.get('urls', []):
-        if not isinstance(u, dict):
-            continue
-        urls.append({
-            "displayUrl": u.get('display_url'),
-            "expandedUrl": u.get('expanded_url'),
-            "url": u.get('url')
-        })
-
-    mentions = []
-    for m in entities.get('user_mentions', []):
-        if not isinstance(m, dict):
-            continue
-        mentions.append({
-            "screenName": m.get('screen_name'),
-            "id": m.get('id_str') or m.get('id')
-        })
-
-    hashtags = []
-    for h in entities.get('hashtags', []):
-        if not isinstance(h, dict):
-            continue
-        text = h.get('text')
-        if text:
-            hashtags.append(text)
-
-    media_items = []
+    urls = tuple(
+        (u.get('display_url'), u.get('expanded_url'), u.get('url'))
+        for u in entities.get('urls', []) if isinstance(u, dict)
+    )
+    mentions = tuple(
+        (m.get('screen_name'), m.get('id_str') or m.get('id'))
+        for m in entities.get('user_mentions', []) if isinstance(m, dict)
+    )
+    hashtags = tuple(
+        h.get('text') for h in entities.get('hashtags', []) if isinstance(h, dict) and h.get('text')
+    )
     media_list = (legacy.get('extended_entities') or {}).get('media') or entities.get('media') or []
-    for m in media_list:
-        if not isinstance(m, dict):
-            continue
-        media_items.append({
-            "id": m.get('id_str') or m.get('id'),
-            "type": m.get('type'),
-            "mediaKey": m.get('media_key'),
-            "displayUrl": m.get('display_url'),
-            "expandedUrl": m.get('expanded_url'),
-            "mediaUrl": m.get('media_url_https') or m.get('media_url'),
-        })
-
+    media_items = tuple(
+        (
+            m.get('id_str') or m.get('id'),
+            m.get('type'),
+            m.get('media_key'),
+            m.get('display_url'),
+            m.get('expanded_url'),
+            m.get('media_url_https') or m.get('media_url'),
+        )
+        for m in media_list if isinstance(m, dict)
+    )
     return urls, mentions, hashtags, media_items
 
 
 def _sanitize_tweet(tweet):
+    """Hydrated tweet object -> TweetRecord (serialized only when the output is assembled)"""
     legacy = tweet.get('legacy', {}) or {}
-    author = _extract_author_from_tweet(tweet)
     urls, mentions, hashtags, media_items = _extract_entities(legacy)
 
-    # Pick metrics that are usually present in legacy
-    engagement = {
-        "replyCount": legacy.get('reply_count'),
-        "retweetCount": legacy.get('retweet_count'),
-        "quoteCount": legacy.get('quote_count'),
-        "likeCount": legacy.get('favorite_count'),
-        "bookmarkCount": legacy.get('bookmark_count'),
-        "viewCount": None
-    }
     view_info = tweet.get('view_count_info') or tweet.get('view_counts') or {}
-    if isinstance(view_info, dict):
-        engagement["viewCount"] = view_info.get('count')
 
-    return {
-        "id": tweet.get('rest_id') or legacy.get('id_str'),
-        "conversationId": legacy.get('conversation_id_str'),
-        "createdAt": legacy.get('created_at'),
-        "text": legacy.get('full_text') or legacy.get('text'),
-        "inReplyToStatusId": legacy.get('in_reply_to_status_id_str'),
-        "inReplyToUserId": legacy.get('in_reply_to_user_id_str'),
-        "quotedStatusId": legacy.get('quoted_status_id_str'),
-        "isQuoteStatus": bool(legacy.get('is_quote_status')),
-        "author": author,
-        "engagement": engagement,
-        "urls": urls,
-        "mentions": mentions,
-        "hashtags": hashtags,
-        "media": media_items,
-        "language": legacy.get('lang'),
-        "source": legacy.get('source'),
-        "replyToUserResults": tweet.get('reply_to_user_results')
-    }
+    # Metrics are usually present in legacy
+    return TweetRecord(
+        id=tweet.get('rest_id') or legacy.get('id_str'),
+        conversation_id=legacy.get('conversation_id_str'),
+        created_at=legacy.get('created_at'),
+        text=legacy.get('full_text') or legacy.get('text'),
+        in_reply_to_status_id=legacy.get('in_reply_to_status_id_str'),
+        in_reply_to_user_id=legacy.get('in_reply_to_user_id_str'),
+        quoted_status_id=legacy.get('quoted_status_id_str'),
+        is_quote_status=bool(legacy.get('is_quote_status')),
+        author=_extract_author_from_tweet(tweet),
+        reply_count=legacy.get('reply_count'),
+        retweet_count=legacy.get('retweet_count'),
+        quote_count=legacy.get('quote_count'),
+        like_count=legacy.get('favorite_count'),
+        bookmark_count=legacy.get('bookmark_count'),
+        view_count=view_info.get('count') if isinstance(view_info, dict) else None,
+        urls=urls,
+        mentions=mentions,
+        hashtags=hashtags,
+        media=media_items,
+        language=legacy.get('lang'),
+        source=legacy.get('source'),
+        reply_to_user_results=tweet.get('reply_to_user_results'),
+    )
 
 
 def _tweet_sort_key(tweet):
-    tid = tweet.get('id')
-    if tid:
-        try:
-            return int(tid)
-        except (TypeError, ValueError):
-            pass
-    created_at = tweet.get('createdAt')
-    if created_at:
-        try:
-            return datetime.strptime(created_at, '%a %b %d %H:%M:%S %z %Y').timestamp()
-        except Exception:
-            return 0
-    return 0
+    return tweet.sort_key
 
 
 def _collect_referenced_ids_from_tweet(tweet):
@@ -294,27 +176,6 @@ def _collect_referenced_ids_from_tweet(tweet):
     return refs
 
 
-def _collect_conversation_ids(payload):
-    """
-    Collects IDs listed in conversation_metadata.all_tweet_ids if present.
-    """
-    ids = set()
-
-    def walk(node):
-        if isinstance(node, dict):
-            convo_meta = node.get('conversation_metadata')
-            if isinstance(convo_meta, dict):
-                ids.update(str(tid) for tid in convo_meta.get('all_tweet_ids', []) if tid)
-            for v in node.values():
-                walk(v)
-        elif isinstance(node, list):
-            for item in node:
-                walk(item)
-
-    walk(payload)
-    return ids
-
-
 def _build_headers():
     return {
         'x-rapidapi-key': RAPID_API_KEY,
@@ -347,20 +208,66 @@ async def fetch_user_result(screen_name):
     return user_id, data
 
 
-async def fetch_all_tweets_and_replies(user_id, on_page_saved=None):
+@dataclass
+class PaginationState:
     """
-    Fetches all pages of tweets and replies for a user by paging through cursors.
-    Optionally persists each page via on_page_saved.
+    Loop state of fetch_all_tweets_and_replies. Every saved page record carries its own delta
+    (nextCursor, pageSignature, newTweetIds), so replaying the page log rebuilds the state exactly (--resume).
     """
-    pages = []
-    seen_cursors = set()
-    seen_signatures = set()
-    seen_tweet_ids = set()
-    cursor = None
-    page_index = 0
+    cursor: Optional[str] = None
+    page_index: int = 0
+    seen_cursors: set = field(default_factory=set)
+    seen_signatures: set = field(default_factory=set)
+    seen_tweet_ids: set = field(default_factory=set)
+    complete: bool = False
+    stop_reason: Optional[str] = None
+
+    @classmethod
+    def replay(cls, pages):
+        state = cls()
+        for page_record in pages:
+            if state.advance(page_record):
+                break
+        return state
+
+    def advance(self, page_record):
+        """Applies one saved page; returns the stop reason when pagination ends with it, else None"""
+        self.page_index = page_record.get('pageNumber', self.page_index + 1)
+        next_cursor = page_record.get('nextCursor')
+        signature = page_record.get('pageSignature')
+        if signature in self.seen_signatures:
+            reason = STOP_DUPLICATE_PAGE
+        elif not page_record.get('newTweetIds'):
+            reason = STOP_NO_NEW_TWEETS
+        elif not next_cursor:
+            reason = STOP_NO_NEXT_CURSOR
+        elif next_cursor in self.seen_cursors:
+            reason = STOP_CURSOR_SEEN
+        else:
+            self.seen_cursors.add(next_cursor)
+            self.seen_signatures.add(signature)
+            self.seen_tweet_ids.update(page_record['newTweetIds'])
+            self.cursor = next_cursor
+            return None
+        self.complete = True
+        self.stop_reason = reason
+        return reason
 
-    while True:
-        page_index += 1
+
+async def fetch_all_tweets_and_replies(user_id, on_page_saved=None, state=None, pages=None):
+    """
+    Fetches all pages of tweets and replies for a user by paging through cursors.
+    Optionally persists each page via on_page_saved(pages, page_record, state), called once the state
+    includes the page. A resumed run passes the pages saved so far and their replayed state.
+    """
+    pages = pages if pages is not None else []
+    state = state or PaginationState()
+    if state.complete:
+        logger.log(f"Pagination already complete ({state.stop_reason}) after {len(pages)} page(s)")
+
+    while not state.complete:
+        page_index = state.page_index + 1
+        cursor = state.cursor
         params = {'user_id': user_id}
         if cursor:
             params['cursor'] = cursor
@@ -399,14 +306,16 @@ async def fetch_all_tweets_and_replies(user_id, on_page_saved=None):
                 break
 
         if response is None:
+            state.stop_reason = STOP_HTTP_ERROR
             break
 
         data = response.get('data', {})
-        tweet_ids = sorted(set(_collect_tweet_ids(data)))
-        next_cursor = _extract_next_cursor(data)
-        signature = _compute_page_signature(data)
-        is_duplicate_page = signature in seen_signatures
-        new_tweet_ids = [tid for tid in tweet_ids if tid not in seen_tweet_ids]
+        # One pass over the page for its tweet ids and next cursor
+        scan = scan_timeline(data, texts=False, next_cursor=True, tweet_ids=True)
+        tweet_ids = sorted(set(scan.tweet_ids))
+        next_cursor = scan.next_cursor
+        signature = scan.page_signature(tweet_ids)
+        new_tweet_ids = [tid for tid in tweet_ids if tid not in state.seen_tweet_ids]
 
         page_record = {
             "pageNumber": page_index,
@@ -419,32 +328,21 @@ async def fetch_all_tweets_and_replies(user_id, on_page_saved=None):
             "data": data
         }
         pages.append(page_record)
+        reason = state.advance(page_record)
 
         if on_page_saved:
-            on_page_saved(pages, page_record)
+            on_page_saved(pages, page_record, state)
 
-        if is_duplicate_page:
+        if reason == STOP_DUPLICATE_PAGE:
             logger.warn(f"Page {page_index} content identical to a previous page; stopping to avoid a loop.")
-            break
-
-        if not new_tweet_ids:
+        elif reason == STOP_NO_NEW_TWEETS:
             logger.warn(f"Page {page_index} contained no new tweets; stopping pagination.")
-            break
-
-        if next_cursor:
+        elif next_cursor:
             logger.log(f"Next cursor from page {page_index}: {next_cursor}")
+            if reason == STOP_CURSOR_SEEN:
+                logger.warn(f"Cursor {next_cursor} already seen; stopping to avoid a loop.")
         else:
             logger.log("No next cursor found; pagination complete.")
-            break
-
-        if next_cursor in seen_cursors:
-            logger.warn(f"Cursor {next_cursor} already seen; stopping to avoid a loop.")
-            break
-
-        seen_cursors.add(next_cursor)
-        seen_signatures.add(signature)
-        seen_tweet_ids.update(new_tweet_ids)
-        cursor = next_cursor
 
     logger.log(f"Collected {len(pages)} page(s) of tweets and replies for user {user_id}")
     return pages
@@ -459,23 +357,35 @@ def _derive_missing_tweet_ids(target_user_id, pages):
     referenced = set()
 
     for page in pages:
-        data = page.get('data', {})
-        for tweet in _iter_tweets(data):
-            sanitized = _sanitize_tweet(tweet)
-            tid = sanitized.get('id')
-            if tid:
-                hydrated[tid] = sanitized
+        scan = scan_timeline(page.get('data', {}), texts=False, tweets=True, conversation_ids=True)
+        for tweet in scan.tweets:
+            record = _sanitize_tweet(tweet)
+            if record.id:
+                hydrated[record.id] = record
             referenced.update(_collect_referenced_ids_from_tweet(tweet))
         # Conversation metadata may list thread IDs
-        referenced.update(_collect_conversation_ids(data))
+        referenced.update(scan.conversation_ids)
 
     # Only chase references we haven't hydrated yet
     missing_candidates = [tid for tid in referenced if tid not in hydrated]
     return hydrated, missing_candidates
 
 
-async def _fetch_and_filter_missing(target_user_id, missing_ids):
+async def _fetch_and_filter_missing(target_user_id, missing_ids, cache=None):
+    """
+    Backfills referenced tweets: served from the shared tweet cache where possible, the rest fetched
+    from TweetResultsByRestIds in batches of 20 and stored in the cache as each batch arrives.
+    """
     fetched = {}
+    if not missing_ids:
+        return fetched
+    cache = cache or _get_tweet_cache()
+    loop = asyncio.get_running_loop()
+    if cache:
+        # SQLite lookups and commits run off the event loop (TweetCache serializes them with its own lock)
+        fetched.update(await loop.run_in_executor(None, cache.get_many, missing_ids))
+        missing_ids = [tid for tid in missing_ids if tid not in fetched]
+        logger.log(f"Tweet cache: {len(fetched)} of {len(fetched) + len(missing_ids)} referenced tweet(s) cached")
 
     def extract_from_batch(data):
         if not isinstance(data, dict):
@@ -516,75 +426,66 @@ async def _fetch_and_filter_missing(target_user_id, missing_ids):
             tweet_obj = item.get('result') if isinstance(item, dict) else None
             if not tweet_obj:
                 continue
-            sanitized = _sanitize_tweet(tweet_obj)
-            if sanitized.get('id'):
-                collected[sanitized['id']] = sanitized
+            record = _sanitize_tweet(tweet_obj)
+            if record.id:
+                collected[record.id] = record
         logger.log(f"Backfill batch {idx}/{len(batches)} retrieved {len(collected)} tweet(s)")
+        if cache:
+            await loop.run_in_executor(None, cache.put_many, list(collected.values()))
         return collected
 
     results = await asyncio.gather(*(fetch_chunk(i + 1, chunk) for i, chunk in enumerate(batches)))
     for part in results:
         fetched.update(part)
+    if cache:
+        logger.log(cache.summary())
     return fetched
 
 
-def _build_minimal_tweet(sanitized):
+def _build_minimal_tweet(record):
     """
     Reduce tweet payload to sentiment/context-friendly essentials.
     """
-    return {
-        "id": sanitized.get("id"),
-        "createdAt": sanitized.get("createdAt"),
-        "text": sanitized.get("text"),
-        "conversationId": sanitized.get("conversationId"),
-        "inReplyToStatusId": sanitized.get("inReplyToStatusId"),
-        "inReplyToUserId": sanitized.get("inReplyToUserId"),
-        "quotedStatusId": sanitized.get("quotedStatusId"),
-        "isQuoteStatus": sanitized.get("isQuoteStatus"),
-        "author": {
-            "id": sanitized.get("author", {}).get("id"),
-            "screenName": sanitized.get("author", {}).get("screenName"),
-            "name": sanitized.get("author", {}).get("name"),
-        },
-        "engagement": sanitized.get("engagement"),
-        "urls": sanitized.get("urls"),
-    }
+    return record.to_minimal_dict()
 
 
-def _build_threads(minimal_tweets):
+def _build_threads(records, minimal_tweets=None):
     """
     Build threaded view: roots sorted newest->oldest; replies sorted oldest->newest.
     Replies are nested; orphans (no parent in set) appear as roots with flag.
+    Threads are linked by id over the records; a node is a shallow copy of the tweet's minimal dict
+    (minimal_tweets, aligned with records, so author/engagement/urls are shared with tweetsFlat).
     """
-    by_id = {t["id"]: dict(t) for t in minimal_tweets if t.get("id")}
+    if minimal_tweets is None:
+        minimal_tweets = [_build_minimal_tweet(r) for r in records]
+    minimal_by_id = {r.id: m for r, m in zip(records, minimal_tweets) if r.id}
+    by_id = {r.id: r for r in records if r.id}
     children = {}
-    for t in minimal_tweets:
-        pid = t.get("inReplyToStatusId")
-        tid = t.get("id")
-        if pid and tid and pid in by_id:
-            children.setdefault(pid, []).append(dict(t))
-
-    def attach_replies(parent_id):
-        replies = children.get(parent_id, [])
-        replies.sort(key=_tweet_sort_key)  # oldest -> newest
-        for r in replies:
-            r_id = r.get("id")
-            r["replies"] = attach_replies(r_id) if r_id else []
-        return replies
+    for r in records:
+        pid = r.in_reply_to_status_id
+        if pid and r.id and pid in by_id:
+            children.setdefault(pid, []).append(r)
+
+    def emit(record, orphan=False):
+        node = dict(minimal_by_id[record.id])
+        if orphan:
+            node["orphanReply"] = True
+        replies = sorted(children.get(record.id, []), key=_tweet_sort_key)  # oldest -> newest
+        node["replies"] = [emit(reply) for reply in replies]
+        return node
 
     roots = []
     orphan_replies = []
-    for tid, tweet in by_id.items():
-        if tweet.get("inReplyToStatusId") and tweet.get("inReplyToStatusId") in by_id:
+    for tid, record in by_id.items():
+        pid = record.in_reply_to_status_id
+        if pid and pid in by_id:
             continue  # will be attached as child
-        if tweet.get("inReplyToStatusId") and tweet.get("inReplyToStatusId") not in by_id:
-            tweet["orphanReply"] = True
+        if pid:
             orphan_replies.append(tid)
-        tweet["replies"] = attach_replies(tid)
-        roots.append(tweet)
+        roots.append(record)
 
     roots.sort(key=_tweet_sort_key, reverse=True)  # newest -> oldest
-    return roots, orphan_replies
+    return [emit(r, orphan=bool(r.in_reply_to_status_id)) for r in roots], orphan_replies
 
 
 def _strip_for_slim(node):
@@ -621,26 +522,26 @@ def _assemble_ai_ready_output(username, user_id, fetched_at, raw_filename, pages
     tweets = list(merged.values())
     tweets.sort(key=_tweet_sort_key, reverse=True)
     minimal_tweets = [_build_minimal_tweet(t) for t in tweets]
-    threads, orphan_replies = _build_threads(minimal_tweets)
+    threads, orphan_replies = _build_threads(tweets, minimal_tweets)
 
-    def sum_metric(key):
+    def sum_metric(attribute):
         total = 0
         for t in tweets:
-            val = (t.get("engagement") or {}).get(key)
+            val = getattr(t, attribute)
             if isinstance(val, (int, float)):
                 total += val
         return total
 
-    replies_count = sum(1 for t in minimal_tweets if t.get("inReplyToStatusId"))
-    quotes_count = sum(1 for t in minimal_tweets if t.get("isQuoteStatus"))
-    originals_count = len(minimal_tweets) - replies_count - quotes_count
+    replies_count = sum(1 for t in tweets if t.in_reply_to_status_id)
+    quotes_count = sum(1 for t in tweets if t.is_quote_status)
+    originals_count = len(tweets) - replies_count - quotes_count
     metrics = {
-        "replyCountTotal": sum_metric("replyCount"),
-        "retweetCountTotal": sum_metric("retweetCount"),
-        "quoteCountTotal": sum_metric("quoteCount"),
-        "likeCountTotal": sum_metric("likeCount"),
-        "bookmarkCountTotal": sum_metric("bookmarkCount"),
-        "viewCountTotal": sum_metric("viewCount"),
+        "replyCountTotal": sum_metric("reply_count"),
+        "retweetCountTotal": sum_metric("retweet_count"),
+        "quoteCountTotal": sum_metric("quote_count"),
+        "likeCountTotal": sum_metric("like_count"),
+        "bookmarkCountTotal": sum_metric("bookmark_count"),
+        "viewCountTotal": sum_metric("view_count"),
     }
 
     return {
@@ -736,11 +637,11 @@ async def fetch_tweets_by_ids(tweet_ids):
 
 def _build_output_path(username, timestamp=None):
     """
-    Prepares a timestamped output path for incremental JSON dumps.
+    Prepares a timestamped path for the append-only page log of a run (<username>_<timestamp>.pages.jsonl).
     """
     os.makedirs(ANALYSIS_DIR, exist_ok=True)
     timestamp = timestamp or format_est_date_time()
-    filename = os.path.join(ANALYSIS_DIR, f"{username}_{timestamp}.json")
+    filename = os.path.join(ANALYSIS_DIR, f"{username}_{timestamp}{PAGE_LOG_SUFFIX}")
     fetched_at = datetime.now(pytz.timezone('America/New_York')).isoformat()
     return filename, fetched_at, timestamp
 
@@ -755,9 +656,69 @@ def _build_clean_slim_output_path(username, timestamp):
     return filename
 
 
+def _raw_file_timestamp(raw_path):
+    """The <timestamp> of a <username>_<timestamp>.json raw file or .pages.jsonl page log"""
+    name = os.path.basename(raw_path)
+    name = name[:-len(PAGE_LOG_SUFFIX)] if name.endswith(PAGE_LOG_SUFFIX) else name.rsplit('.', 1)[0]
+    return name.split('_', 1)[-1]
+
+
+def _checkpoint_path(page_log_path):
+    return page_log_path[:-len(PAGE_LOG_SUFFIX)] + CHECKPOINT_SUFFIX
+
+
+def _write_checkpoint(path, username, user_id, page_log_path, page_count, state):
+    """
+    Atomically replaces the run's checkpoint (temp file + os.replace, never torn): where the page log is
+    and where pagination stands. Written once the new log's header is fsynced, then right after each
+    fsync of the log (and when pagination stops), so it never counts pages the log could still lose.
+    The seen cursor / signature / tweet id sets are not copied here; they are the deltas already in the
+    page log and are rebuilt by PaginationState.replay.
+    """
+    checkpoint = {
+        "username": username,
+        "userId": user_id,
+        "pageLog": page_log_path,
+        "pageCount": page_count,
+        "cursor": state.cursor,
+        "complete": state.complete,
+        "stopReason": state.stop_reason,
+        "seenCursorCount": len(state.seen_cursors),
+        "seenSignatureCount": len(state.seen_signatures),
+        "seenTweetIdCount": len(state.seen_tweet_ids),
+        "updatedAt": datetime.now(pytz.timezone('America/New_York')).isoformat(),
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _find_checkpoint(username):
+    """Newest checkpoint of an unfinished run for this username, or None"""
+    candidates = []
+    for path in glob.glob(os.path.join(ANALYSIS_DIR, f"{username}_*{CHECKPOINT_SUFFIX}")):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as error:
+            logger.warn(f"Ignoring unreadable checkpoint {path}: {error}")
+            continue
+        # username_* also matches other handles that start with username_
+        if checkpoint.get('username') == username and os.path.exists(checkpoint.get('pageLog') or ''):
+            candidates.append((os.path.getmtime(path), path, checkpoint))
+    if not candidates:
+        return None
+    _, path, checkpoint = max(candidates, key=lambda c: c[0])
+    return path, checkpoint
+
+
 def _write_partial_results(filename, username, user_id, user_payload, pages, fetched_at):
     """
-    Writes the current collection state to disk. Intended to be called after each page fetch.
+    Writes a legacy combined raw file (header + all pages, indent=2) in one go.
+    Runs save pages to an append-only PageLog instead; convert_page_log emits this layout on demand.
     """
     output = {
         "username": username,
@@ -774,17 +735,81 @@ def _write_partial_results(filename, username, user_id, user_payload, pages, fet
         json.dump(output, f, indent=2)
 
 
-def _load_raw_file(raw_path):
+class _RawPages:
+    """
+    The pages of a raw file, read from disk one page at a time on every iteration, so a raw file
+    of hundreds of MB is processed in the memory of its largest page.
+    """
+
+    def __init__(self, raw_path, page_count=None):
+        self.raw_path = raw_path
+        self.page_count = page_count
+
+    def __iter__(self):
+        with open(self.raw_path, 'r', encoding='utf-8') as f:
+            stream = JsonStream(f)
+            for key in stream.object_keys():
+                if key != 'tweetsAndReplies':
+                    stream.value()
+                    continue
+                for inner_key in stream.object_keys():
+                    if inner_key != 'pages':
+                        stream.value()
+                        continue
+                    for _ in stream.array_items():
+                        yield stream.value()
+
+    def __len__(self):
+        if self.page_count is None:
+            self.page_count = sum(1 for _ in self)
+        return self.page_count
+
+
+def _stream_raw_file(raw_path):
+    """
+    Like _load_raw_file, but only the header fields are read up front; the returned pages stream from
+    disk when iterated. _write_partial_results puts the pages last, so the header is found without
+    decoding them. Page logs (.pages.jsonl) are read the same way, header from their first line.
+    """
+    if raw_path.endswith(PAGE_LOG_SUFFIX):
+        pages = PageLogReader(raw_path)
+        header = pages.header
+        fetched_at = header.get('fetchedAt', datetime.now(pytz.timezone('America/New_York')).isoformat())
+        return header.get('username'), header.get('userId'), fetched_at, pages, header.get('user', {})
+
+    header = {}
+    page_count = None
     with open(raw_path, 'r', encoding='utf-8') as f:
-        payload = json.load(f)
-    username = payload.get('username')
-    user_id = payload.get('userId')
-    fetched_at = payload.get('fetchedAt', datetime.now(pytz.timezone('America/New_York')).isoformat())
-    pages = payload.get('tweetsAndReplies', {}).get('pages', [])
-    user_payload = payload.get('user', {})
+        stream = JsonStream(f)
+        for key in stream.object_keys():
+            if key != 'tweetsAndReplies':
+                header[key] = stream.value()
+                continue
+            reached_pages = False
+            for inner_key in stream.object_keys():
+                if inner_key == 'pageCount':
+                    page_count = stream.value()
+                elif inner_key == 'pages' and isinstance(page_count, int) and {'username', 'userId'} <= header.keys():
+                    reached_pages = True
+                    break
+                else:
+                    stream.value()
+            if reached_pages:
+                break
+
+    username = header.get('username')
+    user_id = header.get('userId')
+    fetched_at = header.get('fetchedAt', datetime.now(pytz.timezone('America/New_York')).isoformat())
+    user_payload = header.get('user', {})
+    pages = _RawPages(raw_path, page_count if isinstance(page_count, int) else None)
     return username, user_id, fetched_at, pages, user_payload
 
 
+def _load_raw_file(raw_path):
+    username, user_id, fetched_at, pages, user_payload = _stream_raw_file(raw_path)
+    return username, user_id, fetched_at, list(pages), user_payload
+
+
 async def run(username):
     """
     Orchestrates lookup, pagination, backfill, and cleaning for a given username.
@@ -802,15 +827,22 @@ async def run_entry(args):
     - pages-only: fetch pages and save raw
     - backfill-only: reuse raw file to backfill/clean
     - process-only: reuse raw file to build clean without backfill
+    - convert-page-log: write the legacy combined raw file of a page log
+    - resume: continue the newest unfinished full flow of the username from its checkpoint
     - default: full flow
     """
+    if args.convert_page_log:
+        output_path = convert_page_log(args.convert_page_log, args.output)
+        logger.log(f"Wrote combined raw file {output_path}")
+        return
+
     if args.backfill_only:
         if not args.raw_file:
             raise ValueError("backfill-only requires --raw-file")
-        username, user_id, fetched_at, pages, user_payload = _load_raw_file(args.raw_file)
+        username, user_id, fetched_at, pages, user_payload = _stream_raw_file(args.raw_file)
         if not user_id or not username:
             raise ValueError("raw file missing username/userId")
-        timestamp = os.path.basename(args.raw_file).rsplit('.', 1)[0].split('_', 1)[-1]
+        timestamp = _raw_file_timestamp(args.raw_file)
         clean_filename = _build_clean_output_path(username, timestamp)
         hydrated, missing_ids = _derive_missing_tweet_ids(user_id, pages)
         if missing_ids:
@@ -843,18 +875,16 @@ async def run_entry(args):
     if args.process_only:
         if not args.raw_file:
             raise ValueError("process-only requires --raw-file")
-        username, user_id, fetched_at, pages, user_payload = _load_raw_file(args.raw_file)
+        username, user_id, fetched_at, pages, user_payload = _stream_raw_file(args.raw_file)
         timestamp = format_est_date_time()
         clean_filename = _build_clean_output_path(username, timestamp)
         # Skip backfill entirely; just process hydrated tweets
         hydrated = {}
         for page in pages:
-            data = page.get('data', {})
-            for tweet in _iter_tweets(data):
-                sanitized = _sanitize_tweet(tweet)
-                tid = sanitized.get('id')
-                if tid:
-                    hydrated[tid] = sanitized
+            for tweet in scan_timeline(page.get('data', {}), texts=False, tweets=True).tweets:
+                record = _sanitize_tweet(tweet)
+                if record.id:
+                    hydrated[record.id] = record
         missing_fetched = {}
         clean_payload = _assemble_ai_ready_output(
             username=username,
@@ -889,7 +919,7 @@ async def run_entry(args):
 
     if args.raw_file:
         # Reuse raw file for backfill/clean after ensuring username if provided matches
-        username, user_id, fetched_at, pages, user_payload = _load_raw_file(args.raw_file)
+        username, user_id, fetched_at, pages, user_payload = _stream_raw_file(args.raw_file)
         if args.username and _clean_username(args.username) != _clean_username(username):
             raise ValueError("Provided username does not match raw file username")
         clean_filename = _build_clean_output_path(username, format_est_date_time())
@@ -910,25 +940,60 @@ async def run_entry(args):
         logger.log(f"Saved AI-friendly tweet data to {clean_filename}")
         return
 
-    await run_full_flow(_clean_username(args.username))
-
-
-async def run_full_flow(clean_username):
-    user_id, user_payload = await fetch_user_result(clean_username)
-    raw_filename, fetched_at, timestamp = _build_output_path(clean_username)
+    if args.resume and not args.username:
+        raise ValueError("resume requires a username")
+
+    await run_full_flow(_clean_username(args.username), resume=args.resume)
+
+
+async def run_full_flow(clean_username, resume=False):
+    found = _find_checkpoint(clean_username) if resume else None
+    if found:
+        checkpoint_path, checkpoint = found
+        raw_filename = checkpoint['pageLog']
+        saved_pages = PageLogReader(raw_filename)
+        user_id = saved_pages.header.get('userId')
+        user_payload = saved_pages.header.get('user', {})
+        fetched_at = saved_pages.header.get('fetchedAt')
+        timestamp = _raw_file_timestamp(raw_filename)
+        page_log = PageLog(raw_filename)
+        page_log.reopen()
+        pages = list(saved_pages)
+        state = PaginationState.replay(pages)
+        lost = (checkpoint.get('pageCount') or 0) - len(pages)
+        if lost > 0:
+            logger.warn(f"{lost} page(s) in the checkpoint were not durable in {raw_filename}; fetching them again")
+        logger.log(
+            f"Resuming @{clean_username} from {raw_filename}: {len(pages)} saved page(s), "
+            + (f"pagination complete ({state.stop_reason})" if state.complete else f"next cursor {state.cursor or 'start'}")
+        )
+    else:
+        if resume:
+            logger.log(f"No unfinished collection to resume for @{clean_username}; starting a new one")
+        user_id, user_payload = await fetch_user_result(clean_username)
+        raw_filename, fetched_at, timestamp = _build_output_path(clean_username)
+        checkpoint_path = _checkpoint_path(raw_filename)
+        page_log = PageLog(raw_filename)
+        page_log.open({"username": clean_username, "userId": user_id, "fetchedAt": fetched_at, "user": user_payload})
+        pages = []
+        state = PaginationState()
+        # The header is fsynced: from here on a hard kill leaves a run that --resume finds
+        _write_checkpoint(checkpoint_path, clean_username, user_id, raw_filename, 0, state)
     clean_filename = _build_clean_output_path(clean_username, timestamp)
     clean_slim_filename = _build_clean_slim_output_path(clean_username, timestamp)
 
-    def persist(pages, page_record=None, final=False):
-        _write_partial_results(raw_filename, clean_username, user_id, user_payload, pages, fetched_at)
-        if page_record:
-            used_cursor = page_record['requestedCursor'] or 'start'
-            logger.log(f"Saved page {page_record['pageNumber']} (cursor used: {used_cursor}) to {raw_filename}")
-        elif final:
-            logger.log(f"Saved tweet and reply data to {raw_filename}")
+    def persist(pages, page_record, state):
+        if page_log.append(page_record):
+            _write_checkpoint(checkpoint_path, clean_username, user_id, raw_filename, page_log.pages, state)
+        used_cursor = page_record['requestedCursor'] or 'start'
+        logger.log(f"Saved page {page_record['pageNumber']} (cursor used: {used_cursor}) to {raw_filename}")
 
-    pages = await fetch_all_tweets_and_replies(user_id, on_page_saved=persist)
-    persist(pages, final=True)
+    try:
+        pages = await fetch_all_tweets_and_replies(user_id, on_page_saved=persist, state=state, pages=pages)
+    finally:
+        page_log.close()
+        _write_checkpoint(checkpoint_path, clean_username, user_id, raw_filename, page_log.pages, state)
+    logger.log(f"Saved tweet and reply data to {raw_filename} ({page_log.pages} pages)")
 
     hydrated, missing_ids = _derive_missing_tweet_ids(user_id, pages)
     if missing_ids:
@@ -957,14 +1022,22 @@ async def run_full_flow(clean_username):
     _save_clean_output(clean_slim_filename, slim_payload)
     logger.log(f"Saved slim tweet data to {clean_slim_filename}")
 
+    if state.complete:
+        os.remove(checkpoint_path)
+    else:
+        logger.warn(f"Pagination stopped early ({state.stop_reason}); run again with --resume to continue from page {state.page_index + 1}")
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Download tweets/replies and backfill missing tweets via RapidAPI.")
     parser.add_argument('username', nargs='?', help="Twitter username (with or without @). Not required for backfill-only.")
-    parser.add_argument('--raw-file', help="Use an existing raw JSON file (skips pagination when provided).")
+    parser.add_argument('--raw-file', help="Use an existing raw JSON file or .pages.jsonl page log (skips pagination when provided).")
     parser.add_argument('--pages-only', action='store_true', help="Only fetch and save pages; skip backfill/clean output.")
     parser.add_argument('--backfill-only', action='store_true', help="Only run backfill/clean on an existing raw file.")
     parser.add_argument('--process-only', action='store_true', help="Only run cleaning on an existing raw file (no backfill).")
+    parser.add_argument('--resume', action='store_true', help="Continue the newest unfinished collection of this username from its checkpoint instead of starting over.")
+    parser.add_argument('--convert-page-log', metavar='PAGE_LOG', help="Write the legacy combined raw JSON of a .pages.jsonl page log and exit.")
+    parser.add_argument('--output', help="Output path for --convert-page-log (default: the log path with .json).")
     return parser.parse_args()
 
 
@@ -24,6 +24,16 @@ AI_TWEETS_DIR = os.path.join(TWEETS_DIR, 'ai_tweets')
 DB_DIR = os.path.join(BASE_DIR, 'db')
 SCHEMA_SQL = os.path.join(DB_DIR, 'schema.sql')
 
+# SQLite tuning (applied to every repository connection)
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 65536))  # Page cache per connection (64 MB)
+SQLITE_MMAP_SIZE_MB = int(os.getenv('SQLITE_MMAP_SIZE_MB', 256))  # Memory-mapped I/O window
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+DB_READER_THREADS = int(os.getenv('DB_READER_THREADS', 4))  # Parallel WAL readers behind the async repository
+DB_WRITE_BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', 100))  # Buffered profile records per commit
+DB_WRITE_BATCH_MS = int(os.getenv('DB_WRITE_BATCH_MS', 200))  # Max time a buffered record waits for its commit
+DB_MAINTENANCE_AFTER_RUN = os.getenv('DB_MAINTENANCE_AFTER_RUN', 'False').lower() == 'true'  # Archive/vacuum/analyze before the S3 upload
+RELATIONSHIP_ARCHIVE_DAYS = int(os.getenv('RELATIONSHIP_ARCHIVE_DAYS', 365))  # Older source relationships are archived (0 = keep all)
+
 # Limit how many profiles we process from CSV
 MAX_PROFILES = int(os.getenv('MAX_PROFILES', 75))
 
@@ -40,15 +50,35 @@ OPENAI_TIMEOUT_MS = int(os.getenv('OPENAI_TIMEOUT_MS', 120000))
 OPENAI_REQUESTS_PER_MINUTE = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', 60))
 OPENAI_THROTTLE_INTERVAL_MS = 60000 / OPENAI_REQUESTS_PER_MINUTE
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-5.2') # Default to 'o3' as per app.js
+CLASSIFICATION_CACHE_ENABLED = os.getenv('CLASSIFICATION_CACHE_ENABLED', 'True').lower() == 'true'  # Reuse stored AI results for unchanged profiles
+TWEET_STORE_ENABLED = os.getenv('TWEET_STORE_ENABLED', 'True').lower() == 'true'  # Keep fetched tweets per user id; re-checks stop paging at the first known tweet
+MAX_TWEETS_PER_PROFILE = int(os.getenv('MAX_TWEETS_PER_PROFILE', 40))  # Newest tweets (fetched + stored) sent to the AI per profile when the tweet store is enabled
+TWEET_STORE_KEEP_PER_USER = int(os.getenv('TWEET_STORE_KEEP_PER_USER', 100))  # Stored tweets kept per user id (older ones pruned)
 
 # Deduplication and filtering
 MAX_FOLLOWERS = int(os.getenv('MAX_FOLLOWERS', 1000))
 MAX_FOLLOWING = int(os.getenv('MAX_FOLLOWING', 1000))
 MAX_ACCOUNT_AGE_DAYS = int(os.getenv('MAX_ACCOUNT_AGE_DAYS', 45))
+DEDUP_SEEN_WITHIN_DAYS = int(os.getenv('DEDUP_SEEN_WITHIN_DAYS', 90))  # Recency window before a known handle is re-processed
+DEDUP_INDEX_ENABLED = os.getenv('DEDUP_INDEX_ENABLED', 'False').lower() == 'true'  # Preload processed_profiles into memory at startup
+
+# Source health (protected / suspended / renamed / not-found sources are re-checked with exponential backoff)
+SOURCE_HEALTH_RECHECK_BASE_DAYS = float(os.getenv('SOURCE_HEALTH_RECHECK_BASE_DAYS', 1))
+SOURCE_HEALTH_RECHECK_MAX_DAYS = float(os.getenv('SOURCE_HEALTH_RECHECK_MAX_DAYS', 32))
 
 # Concurrency
 MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', 20)) # For tweet collection
 CONCURRENT_PROCESSES = int(os.getenv('CONCURRENT_PROCESSES', 10)) # For AI analysis
+NOTION_CONCURRENT_UPLOADS = int(os.getenv('NOTION_CONCURRENT_UPLOADS', 3)) # Notion API allows ~3 requests/second
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 100)) # Max profiles waiting between pipeline stages (backpressure)
+SAVE_TWEET_FILES = os.getenv('SAVE_TWEET_FILES', 'False').lower() == 'true' # Also write follower_tweets/<handle>_tweets.json (debugging / recovery mode)
+RAW_RESPONSE_ARCHIVE = os.getenv('RAW_RESPONSE_ARCHIVE', 'all').lower() # Raw API responses in raw_api_responses/: all, errors (error / empty responses only) or off; any other value is treated as off
+RAW_RESPONSE_ARCHIVE_QUEUE = int(os.getenv('RAW_RESPONSE_ARCHIVE_QUEUE', 256)) # Max responses waiting for the archive writer; further ones are dropped (counted)
+
+# Standalone tweet/reply downloader (api/twitter_posts.py)
+PAGE_LOG_FSYNC_PAGES = int(os.getenv('PAGE_LOG_FSYNC_PAGES', 10)) # fsync the append-only page log every N pages (always when it is closed)
+TWEET_CACHE_ENABLED = os.getenv('TWEET_CACHE_ENABLED', 'True').lower() == 'true' # Backfill reads/fills the shared tweet-by-id cache in db/tweet_cache.db
+TWEET_CACHE_MAX_AGE_DAYS = float(os.getenv('TWEET_CACHE_MAX_AGE_DAYS', 30)) # Older cached tweets are re-fetched (engagement counts drift)
 
 # Debug mode
 DEBUG_MODE = os.getenv('DEBUG_MODE', 'False').lower() == 'true'
@@ -0,0 +1,256 @@
+import asyncio
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from utils.logger import logger
+from config import DB_READER_THREADS, DB_WRITE_BATCH_SIZE, DB_WRITE_BATCH_MS
+from db.repository import repository as default_repository
+
+_STOP = object()
+# Marks queued record_new_profile calls that the writer groups into one transaction
+_RECORD_PROFILE = object()
+
+
+class AsyncRepository:
+    """
+    Awaitable facade over Repository that keeps SQLite I/O off the event loop.
+    All writes go through one dedicated writer thread (a single SQLite writer never contends
+    for the lock); reads run on a small thread pool, each thread on its own WAL connection,
+    so they proceed in parallel with each other and with the writer.
+
+    record_new_profile calls are write-behind: the writer groups them into one transaction every
+    `batch_size` records or `batch_ms` milliseconds, so commits stop being one fsync per profile.
+    Pending records are flushed before any other write, on flush()/close() and at interpreter exit.
+    """
+
+    def __init__(self, repository=None, reader_threads=DB_READER_THREADS,
+                 batch_size=DB_WRITE_BATCH_SIZE, batch_ms=DB_WRITE_BATCH_MS):
+        self.repository = repository or default_repository
+        self._reader_threads = max(int(reader_threads), 1)
+        self._batch_size = max(int(batch_size), 1)
+        self._batch_seconds = max(float(batch_ms), 0) / 1000
+        self._atexit_registered = False
+        self._lock = threading.Lock()
+        self._requests = None
+        self._writer = None
+        self._readers = None
+
+    def _ensure_started(self):
+        """
+        Starts the writer and reader threads unless they run; returns their (requests, readers).
+        Called with self._lock held, and the caller queues its work before releasing it: a concurrent
+        _stop_writer then either sees that work ahead of its _STOP or swaps the threads out first,
+        in which case this call starts new ones.
+        """
+        if self._writer is None:
+            self._requests = queue.Queue()
+            self._readers = ThreadPoolExecutor(
+                max_workers=self._reader_threads, thread_name_prefix="db-reader"
+            )
+            writer = threading.Thread(
+                target=self._writer_loop, args=(self._requests,), name="db-writer", daemon=True
+            )
+            writer.start()
+            self._writer = writer
+            if not self._atexit_registered:
+                atexit.register(self._stop_writer)
+                self._atexit_registered = True
+        return self._requests, self._readers
+
+    def _writer_loop(self, requests):
+        pending = []
+        deadline = None
+        while True:
+            timeout = max(deadline - time.monotonic(), 0) if pending else None
+            try:
+                item = requests.get(timeout=timeout)
+            except queue.Empty:
+                self._flush_records(pending)
+                pending = []
+                continue
+            if item is _STOP:
+                self._flush_records(pending)
+                return
+            func, args, kwargs, future = item
+            if func is _RECORD_PROFILE:
+                if not pending:
+                    deadline = time.monotonic() + self._batch_seconds
+                pending.append(item)
+                if len(pending) >= self._batch_size:
+                    self._flush_records(pending)
+                    pending = []
+                continue
+            # Any other write sees every record queued before it
+            self._flush_records(pending)
+            pending = []
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _flush_records(self, pending):
+        """Commits the buffered record_new_profile calls in one transaction"""
+        if not pending:
+            return
+        # Records are committed even if the awaiting caller was cancelled; only live futures get a result
+        try:
+            self.repository.record_new_profiles([args for _, args, _, _ in pending])
+            for _, _, _, future in pending:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(None)
+            logger.debug(f"Committed {len(pending)} buffered profile records")
+        except Exception as e:
+            # Retry one by one so a single bad record does not drop the whole batch
+            logger.warn(f"Batched commit of {len(pending)} profile records failed ({e}); retrying individually")
+            for _, args, _, future in pending:
+                try:
+                    self.repository.record_new_profile(*args)
+                    error = None
+                except Exception as record_error:
+                    error = record_error
+                if future.set_running_or_notify_cancel():
+                    if error is None:
+                        future.set_result(None)
+                    else:
+                        future.set_exception(error)
+
+    def _stop_writer(self):
+        """Synchronous shutdown used at interpreter exit: flushes buffered records and stops the writer"""
+        with self._lock:
+            writer, requests, readers = self._writer, self._requests, self._readers
+            self._writer = self._requests = self._readers = None
+        if writer is not None:
+            requests.put(_STOP)
+            writer.join()
+            readers.shutdown(wait=True)
+
+    async def _read(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            _, readers = self._ensure_started()
+            result = loop.run_in_executor(readers, lambda: func(*args, **kwargs))
+        return await result
+
+    def _submit(self, func, args, kwargs):
+        """Queues a request for the writer thread and returns its concurrent future"""
+        future = Future()
+        with self._lock:
+            requests, _ = self._ensure_started()
+            requests.put((func, args, kwargs, future))
+        return future
+
+    async def _write(self, func, *args, **kwargs):
+        return await asyncio.wrap_future(self._submit(func, args, kwargs))
+
+    # Reads
+
+    async def find_by_handle(self, twitter_handle):
+        return await self._read(self.repository.find_by_handle, twitter_handle)
+
+    async def find_by_handles(self, twitter_handles):
+        return await self._read(self.repository.find_by_handles, list(twitter_handles))
+
+    async def find_profile(self, twitter_handle, twitter_user_id=None):
+        return await self._read(self.repository.find_profile, twitter_handle, twitter_user_id)
+
+    async def find_by_user_ids(self, twitter_user_ids):
+        return await self._read(self.repository.find_by_user_ids, list(twitter_user_ids))
+
+    async def get_classification(self, twitter_handle):
+        return await self._read(self.repository.get_classification, twitter_handle)
+
+    async def get_user_tweets(self, twitter_user_id, limit=None):
+        return await self._read(self.repository.get_user_tweets, twitter_user_id, limit)
+
+    async def get_sources_for_profile(self, twitter_handle):
+        return await self._read(self.repository.get_sources_for_profile, twitter_handle)
+
+    async def get_sources_for_profiles(self, twitter_handles):
+        return await self._read(self.repository.get_sources_for_profiles, list(twitter_handles))
+
+    async def get_source_health(self, source_handle):
+        return await self._read(self.repository.get_source_health, source_handle)
+
+    async def get_all_source_health(self):
+        return await self._read(self.repository.get_all_source_health)
+
+    # Writes
+
+    async def record_new_profile(self, twitter_handle, notion_page_id, source_username, category=None,
+                                 twitter_user_id=None, wait=True):
+        """
+        Buffers the upsert for the next batched commit. With wait=True the call returns once that batch
+        is committed (and raises its error); with wait=False it returns as soon as the record is queued.
+        """
+        future = self._submit(
+            _RECORD_PROFILE, (twitter_handle, notion_page_id, source_username, category, twitter_user_id), {}
+        )
+        if not wait:
+            future.add_done_callback(self._log_failed_record)
+            return None
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _log_failed_record(future):
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Buffered profile record failed: {error}")
+
+    async def rename_profile(self, twitter_user_id, new_handle):
+        return await self._write(self.repository.rename_profile, twitter_user_id, new_handle)
+
+    async def save_classification(self, twitter_handle, content_hash, model, prompt_hash, result_json,
+                                  twitter_user_id=None):
+        return await self._write(
+            self.repository.save_classification,
+            twitter_handle, content_hash, model, prompt_hash, result_json, twitter_user_id,
+        )
+
+    async def mark_classification_reused(self, twitter_handle):
+        return await self._write(self.repository.mark_classification_reused, twitter_handle)
+
+    async def save_user_tweets(self, twitter_user_id, tweets, keep=None):
+        return await self._write(self.repository.save_user_tweets, twitter_user_id, list(tweets), keep)
+
+    async def upsert_source_health(self, source_handle, status, failure_count, next_check_date,
+                                   source_user_id=None, detail=None):
+        return await self._write(
+            self.repository.upsert_source_health, source_handle, status, failure_count, next_check_date,
+            source_user_id=source_user_id, detail=detail,
+        )
+
+    async def clear_source_health(self, source_handle, statuses=None):
+        return await self._write(self.repository.clear_source_health, source_handle, statuses=statuses)
+
+    async def add_source_relationship(self, twitter_handle, source_username):
+        return await self._write(self.repository.add_source_relationship, twitter_handle, source_username)
+
+    async def add_source_relationships(self, relationships):
+        return await self._write(self.repository.add_source_relationships, list(relationships))
+
+    async def run_maintenance(self, **kwargs):
+        return await self._write(self.repository.run_maintenance, **kwargs)
+
+    async def flush(self):
+        """Returns once every write queued so far (including buffered records) is committed"""
+        return await self._write(lambda: None)
+
+    async def checkpoint(self):
+        return await self._write(self.repository.checkpoint)
+
+    async def close(self):
+        """
+        Flushes buffered records, stops the writer and reader threads and closes the connections.
+        The facade restarts lazily if it is used again.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self._stop_writer)
+        self.repository.close()
+        logger.debug("Async repository closed")
+
+
+# Global async facade over the global repository
+async_repository = AsyncRepository()
@@ -0,0 +1,164 @@
+import math
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+from utils.logger import logger
+
+# Category codes stored in the compact category column
+_CATEGORY_CODES = {None: 0, "Project": 1, "Profile": 2}
+_CATEGORY_NAMES = {code: name for name, code in _CATEGORY_CODES.items()}
+
+
+def _to_epoch(value):
+    """ISO-8601 timestamp (as stored in processed_profiles) -> POSIX epoch seconds, NaN if unparseable"""
+    if not value or not isinstance(value, str):
+        return math.nan
+    try:
+        normalized = value[:-1] + "+00:00" if value.endswith("Z") else value
+        return datetime.fromisoformat(normalized).timestamp()
+    except ValueError:
+        return math.nan
+
+
+class DedupIndex:
+    """
+    Compact in-memory copy of processed_profiles used to answer dedup decisions without SQLite I/O.
+    Handles (and, where known, user ids) map to a slot; per-slot data lives in parallel typed arrays:
+    category code, last_updated epoch and whether a Notion page exists.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._user_slots = {}
+        self._handles = []
+        self._category = array("b")
+        self._last_updated = array("d")
+        self._has_notion = array("b")
+
+    def __len__(self):
+        return len(self._handles)
+
+    def load(self, repository):
+        """
+        Builds the index from processed_profiles. Returns (rows, seconds, bytes).
+        """
+        start = time.perf_counter()
+        slots = {}
+        user_slots = {}
+        handles = []
+        category = array("b")
+        last_updated = array("d")
+        has_notion = array("b")
+        for handle, last_updated_date, last_updated_epoch, notion_flag, category_name, user_id in repository.iter_dedup_rows():
+            key = handle.lower()
+            if key in slots:
+                continue
+            if user_id:
+                user_slots[user_id] = len(handles)
+            slots[key] = len(handles)
+            handles.append(handle)
+            category.append(_CATEGORY_CODES.get(category_name, 0))
+            last_updated.append(
+                # 0 is the migration's marker for an unparseable date
+                float(last_updated_epoch) if last_updated_epoch else _to_epoch(last_updated_date)
+            )
+            has_notion.append(1 if notion_flag else 0)
+
+        with self._lock:
+            self._slots = slots
+            self._user_slots = user_slots
+            self._handles = handles
+            self._category = category
+            self._last_updated = last_updated
+            self._has_notion = has_notion
+            self.loaded = True
+
+        elapsed = time.perf_counter() - start
+        size = self.memory_bytes()
+        logger.log(
+            f"Dedup index loaded: {len(handles):,} profiles in {elapsed:.2f}s "
+            f"(~{size / 1024 / 1024:.1f} MB in memory)"
+        )
+        return len(handles), elapsed, size
+
+    def memory_bytes(self):
+        """Approximate footprint: the slot dict, its key strings and the column arrays"""
+        with self._lock:
+            total = sys.getsizeof(self._slots) + sys.getsizeof(self._handles) + sys.getsizeof(self._user_slots)
+            total += sum(sys.getsizeof(key) for key in self._slots)
+            total += sum(sys.getsizeof(key) for key in self._user_slots)
+            # Canonical handles are only separate objects when their case differs from the key
+            total += sum(sys.getsizeof(h) for h, key in zip(self._handles, self._slots) if h != key)
+            for column in (self._category, self._last_updated, self._has_notion):
+                total += column.buffer_info()[1] * column.itemsize
+            return total
+
+    def get(self, twitter_handle, twitter_user_id=None):
+        """
+        Returns a profile dict shaped like Repository.find_by_handle (without notion_page_id / created_at,
+        which the index does not keep) or None if the profile is unknown. The user id is tried first.
+        """
+        slot = self._user_slots.get(str(twitter_user_id)) if twitter_user_id else None
+        if slot is None and twitter_handle:
+            slot = self._slots.get(str(twitter_handle).strip().lstrip("@").lower())
+        if slot is None:
+            return None
+        epoch = self._last_updated[slot]
+        return {
+            "twitter_handle": self._handles[slot],
+            "last_updated_date": None if math.isnan(epoch) else datetime.fromtimestamp(epoch).isoformat(),
+            "last_updated_epoch": None if math.isnan(epoch) else epoch,
+            "has_notion_page": bool(self._has_notion[slot]),
+            "category": _CATEGORY_NAMES.get(self._category[slot]),
+        }
+
+    def rename(self, twitter_user_id, new_handle):
+        """Mirrors Repository.rename_profile: the slot of this user id is re-keyed to the new handle"""
+        if not self.loaded or not twitter_user_id or not new_handle:
+            return
+        key = str(new_handle).strip().lstrip("@").lower()
+        with self._lock:
+            slot = self._user_slots.get(str(twitter_user_id))
+            if slot is None or key in self._slots:
+                return
+            self._slots.pop(self._handles[slot].lower(), None)
+            self._slots[key] = slot
+            self._handles[slot] = key
+
+    def record(self, twitter_handle, category=None, notion_page_id=None, twitter_user_id=None):
+        """
+        Write-through for Repository.record_new_profile: same COALESCE semantics for category and
+        notion_page_id, last_updated set to now.
+        """
+        if not self.loaded or not twitter_handle:
+            return
+        if twitter_user_id:
+            self.rename(twitter_user_id, twitter_handle)
+        key = str(twitter_handle).strip().lstrip("@").lower()
+        now = time.time()
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                if twitter_user_id:
+                    self._user_slots[str(twitter_user_id)] = len(self._handles)
+                self._slots[key] = len(self._handles)
+                self._handles.append(key)
+                self._category.append(_CATEGORY_CODES.get(category, 0))
+                self._last_updated.append(now)
+                self._has_notion.append(1 if notion_page_id else 0)
+                return
+            if twitter_user_id:
+                self._user_slots.setdefault(str(twitter_user_id), slot)
+            if category is not None:
+                self._category[slot] = _CATEGORY_CODES.get(category, 0)
+            if notion_page_id:
+                self._has_notion[slot] = 1
+            self._last_updated[slot] = now
+
+
+# Global index instance; only consulted once load() has been called (DEDUP_INDEX_ENABLED)
+dedup_index = DedupIndex()
@@ -0,0 +1,92 @@
+import json
+import zlib
+from datetime import datetime
+
+# Column order of the rows packed into source_relationships_archive.payload
+ARCHIVE_COLUMNS = ("twitter_handle", "discovered_by_handle", "discovery_date", "created_at", "twitter_user_id")
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def archive_relationships(conn, cutoff_date, batch_size=50000):
+    """
+    Moves source_relationships rows discovered before cutoff_date (ISO string) into
+    source_relationships_archive, batch_size rows per zlib-compressed JSON payload.
+    Each batch is its own write transaction on the caller's autocommit connection.
+    Archived rows leave the hot table, so source lookups and the source_counts / db_stats counters
+    only cover relationships discovered inside the window. A pair rediscovered later is inserted
+    again with its new discovery_date and archived again once that ages out: the archive keeps one
+    entry per archived discovery, not one per pair.
+    Returns (rows archived, batches written).
+    """
+    archived = 0
+    batches = 0
+    last_rowid = 0
+    columns = ", ".join(ARCHIVE_COLUMNS)
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT rowid, {columns}
+                FROM source_relationships
+                WHERE rowid > ? AND discovery_date < ?
+                ORDER BY rowid
+                LIMIT ?
+                """,
+                (last_rowid, cutoff_date, batch_size),
+            ).fetchall()
+            if not rows:
+                conn.execute("COMMIT")
+                break
+            payload = zlib.compress(
+                json.dumps([list(row[1:]) for row in rows], separators=(",", ":")).encode("utf-8"),
+                9,
+            )
+            discovery_dates = [row[3] for row in rows]
+            conn.execute(
+                """
+                INSERT INTO source_relationships_archive
+                (archived_date, oldest_discovery_date, newest_discovery_date, row_count, payload)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (datetime.now().isoformat(), min(discovery_dates), max(discovery_dates), len(rows), payload),
+            )
+            conn.executemany("DELETE FROM source_relationships WHERE rowid = ?", [(row[0],) for row in rows])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        archived += len(rows)
+        batches += 1
+        last_rowid = rows[-1][0]
+    return archived, batches
+
+
+def iter_archived_relationships(conn):
+    """Yields every archived relationship as a dict (oldest batch first)"""
+    for (payload,) in conn.execute("SELECT payload FROM source_relationships_archive ORDER BY batch_id"):
+        for values in json.loads(zlib.decompress(payload).decode("utf-8")):
+            yield dict(zip(ARCHIVE_COLUMNS, values))
+
+
+def enable_incremental_vacuum(conn):
+    """
+    Switches the DB to auto_vacuum=INCREMENTAL. On an existing DB this only takes effect after a
+    full VACUUM, which rewrites the file once. Returns True if the conversion ran.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        return False
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def incremental_vacuum(conn, max_pages=None):
+    """
+    Returns free pages to the filesystem (all of them, or at most max_pages). Returns the number freed.
+    """
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    statement = "PRAGMA incremental_vacuum" + (f"({int(max_pages)})" if max_pages else "")
+    conn.execute(statement).fetchall()
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
@@ -0,0 +1,244 @@
+import sqlite3
+from datetime import datetime
+from config import DEDUP_SEEN_WITHIN_DAYS
+
+SECONDS_PER_DAY = 86400
+
+# Columns added to processed_profiles after the original schema
+EPOCH_COLUMNS = {
+    "first_discovered_epoch": "INTEGER",
+    "last_updated_epoch": "INTEGER",
+    # Epoch after which a re-discovered handle may be processed again; NULL = never (category Profile)
+    "eligible_after": "INTEGER",
+}
+
+EPOCH_INDEXES = [
+    # (eligible_after, twitter_handle) lets "what ages out this week" be answered from the index alone
+    "CREATE INDEX IF NOT EXISTS idx_profiles_eligible_after ON processed_profiles(eligible_after, twitter_handle)",
+    "CREATE INDEX IF NOT EXISTS idx_profiles_last_updated_epoch ON processed_profiles(last_updated_epoch)",
+]
+
+
+def iso_to_epoch(value):
+    """ISO-8601 timestamp as stored in the DB (naive local time or with offset / 'Z') -> int epoch, None if unparseable"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        normalized = value[:-1] + "+00:00" if value.endswith("Z") else value
+        return int(datetime.fromisoformat(normalized).timestamp())
+    except ValueError:
+        return None
+
+
+def eligible_after(last_updated_epoch, category, seen_within_days=DEDUP_SEEN_WITHIN_DAYS):
+    """Epoch at which a profile leaves the recency window; None for permanently skipped profiles"""
+    if category and category.lower() == "profile":
+        return None
+    if last_updated_epoch is None:
+        # Missing/unparseable last_updated_date is treated as eligible right away
+        return 0
+    return last_updated_epoch + int(seen_within_days * SECONDS_PER_DAY)
+
+
+# Stable user-id identity (added after the epoch columns)
+USER_ID_COLUMNS = {
+    "processed_profiles": "twitter_user_id",
+    "source_relationships": "twitter_user_id",
+}
+
+USER_ID_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_profiles_user_id ON processed_profiles(twitter_user_id) "
+    "WHERE twitter_user_id IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_relationships_user_id ON source_relationships(twitter_user_id)",
+]
+
+
+# Triggers that keep db_stats and source_counts current. Created here rather than in schema.sql
+# because trigger bodies contain semicolons, which _apply_schema splits on.
+STATS_TRIGGERS = {
+    "trg_stats_profiles_insert": """
+        CREATE TRIGGER trg_stats_profiles_insert AFTER INSERT ON processed_profiles
+        BEGIN
+            UPDATE db_stats SET total_profiles = total_profiles + 1 WHERE id = 1;
+        END
+    """,
+    "trg_stats_profiles_delete": """
+        CREATE TRIGGER trg_stats_profiles_delete AFTER DELETE ON processed_profiles
+        BEGIN
+            UPDATE db_stats SET total_profiles = total_profiles - 1 WHERE id = 1;
+        END
+    """,
+    "trg_stats_relationships_insert": """
+        CREATE TRIGGER trg_stats_relationships_insert AFTER INSERT ON source_relationships
+        BEGIN
+            UPDATE db_stats SET total_relationships = total_relationships + 1 WHERE id = 1;
+            INSERT INTO source_counts (discovered_by_handle, relationship_count)
+            SELECT NEW.discovered_by_handle, 1 WHERE NEW.discovered_by_handle IS NOT NULL
+            ON CONFLICT(discovered_by_handle) DO UPDATE SET relationship_count = relationship_count + 1;
+        END
+    """,
+    "trg_stats_relationships_delete": """
+        CREATE TRIGGER trg_stats_relationships_delete AFTER DELETE ON source_relationships
+        BEGIN
+            UPDATE db_stats SET total_relationships = total_relationships - 1 WHERE id = 1;
+            UPDATE source_counts SET relationship_count = relationship_count - 1
+            WHERE discovered_by_handle = OLD.discovered_by_handle;
+            DELETE FROM source_counts
+            WHERE discovered_by_handle = OLD.discovered_by_handle AND relationship_count <= 0;
+        END
+    """,
+    "trg_stats_relationships_update_source": """
+        CREATE TRIGGER trg_stats_relationships_update_source AFTER UPDATE OF discovered_by_handle ON source_relationships
+        BEGIN
+            UPDATE source_counts SET relationship_count = relationship_count - 1
+            WHERE discovered_by_handle = OLD.discovered_by_handle;
+            DELETE FROM source_counts
+            WHERE discovered_by_handle = OLD.discovered_by_handle AND relationship_count <= 0;
+            INSERT INTO source_counts (discovered_by_handle, relationship_count)
+            SELECT NEW.discovered_by_handle, 1 WHERE NEW.discovered_by_handle IS NOT NULL
+            ON CONFLICT(discovered_by_handle) DO UPDATE SET relationship_count = relationship_count + 1;
+        END
+    """,
+}
+
+
+def _existing_columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def needs_epoch_migration(conn):
+    columns = _existing_columns(conn, "processed_profiles")
+    if not set(EPOCH_COLUMNS) <= columns:
+        return True
+    row = conn.execute(
+        "SELECT 1 FROM processed_profiles WHERE last_updated_epoch IS NULL LIMIT 1"
+    ).fetchone()
+    return row is not None
+
+
+def migrate_epoch_timestamps(conn, seen_within_days=DEDUP_SEEN_WITHIN_DAYS, batch_size=50000):
+    """
+    Adds the integer epoch columns and eligible_after to processed_profiles (if missing), backfills
+    rows that do not have them yet and creates their indexes. Idempotent; returns the number of rows backfilled.
+    """
+    columns = _existing_columns(conn, "processed_profiles")
+    for name, column_type in EPOCH_COLUMNS.items():
+        if name not in columns:
+            conn.execute(f"ALTER TABLE processed_profiles ADD COLUMN {name} {column_type}")
+
+    backfilled = 0
+    last_rowid = 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT rowid, first_discovered_date, last_updated_date, category
+            FROM processed_profiles
+            WHERE rowid > ? AND last_updated_epoch IS NULL
+            ORDER BY rowid
+            LIMIT ?
+            """,
+            (last_rowid, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for rowid, first_discovered_date, last_updated_date, category in rows:
+            last_epoch = iso_to_epoch(last_updated_date)
+            updates.append((
+                iso_to_epoch(first_discovered_date),
+                # 0 marks an unparseable date so the row is not picked up by the backfill again
+                last_epoch if last_epoch is not None else 0,
+                eligible_after(last_epoch, category, seen_within_days),
+                rowid,
+            ))
+        conn.executemany(
+            """
+            UPDATE processed_profiles
+            SET first_discovered_epoch = ?, last_updated_epoch = ?, eligible_after = ?
+            WHERE rowid = ?
+            """,
+            updates,
+        )
+        conn.commit()
+        backfilled += len(rows)
+        last_rowid = rows[-1][0]
+
+    for statement in EPOCH_INDEXES:
+        conn.execute(statement)
+    conn.commit()
+    return backfilled
+
+
+def migrate_user_ids(conn):
+    """
+    Adds the twitter_user_id columns and their indexes (idempotent). There is nothing to backfill:
+    ids are filled in as profiles are seen again with their id_str.
+    """
+    for table, column in USER_ID_COLUMNS.items():
+        if column not in _existing_columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+    for statement in USER_ID_INDEXES:
+        conn.execute(statement)
+    conn.commit()
+
+
+def needs_stats_rebuild(conn):
+    """
+    True if the stats row or any of its triggers is missing (new DB, or tables rebuilt by a script,
+    which drops their triggers and leaves the counters stale)
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    if not set(STATS_TRIGGERS) <= existing:
+        return True
+    return conn.execute("SELECT 1 FROM db_stats WHERE id = 1").fetchone() is None
+
+
+def rebuild_stats(conn):
+    """
+    (Re)creates the stats triggers and recounts db_stats / source_counts from the tables,
+    in one write transaction so no write can land between the count and the triggers.
+    """
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for name, statement in STATS_TRIGGERS.items():
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(statement)
+        conn.execute("DELETE FROM source_counts")
+        conn.execute("""
+            INSERT INTO source_counts (discovered_by_handle, relationship_count)
+            SELECT discovered_by_handle, COUNT(*)
+            FROM source_relationships
+            WHERE discovered_by_handle IS NOT NULL
+            GROUP BY discovered_by_handle
+        """)
+        conn.execute("""
+            INSERT OR REPLACE INTO db_stats (id, total_profiles, total_relationships)
+            VALUES (1, (SELECT COUNT(*) FROM processed_profiles), (SELECT COUNT(*) FROM source_relationships))
+        """)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+def apply_migrations(conn):
+    """
+    Runs every schema migration that is not applied yet (called when the repository opens the DB).
+    Returns the number of rows backfilled.
+    """
+    backfilled = 0
+    try:
+        if needs_epoch_migration(conn):
+            backfilled = migrate_epoch_timestamps(conn)
+        else:
+            for statement in EPOCH_INDEXES:
+                conn.execute(statement)
+            conn.commit()
+        migrate_user_ids(conn)
+        if needs_stats_rebuild(conn):
+            rebuild_stats(conn)
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return backfilled
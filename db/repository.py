@@ -1,14 +1,27 @@
 import sqlite3
 import os
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from utils.logger import logger
-from config import DB_DIR, SCHEMA_SQL
+from config import (
+    DB_DIR, SCHEMA_SQL, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE_MB, SQLITE_BUSY_TIMEOUT_MS, RELATIONSHIP_ARCHIVE_DAYS
+)
+from db.migrations import apply_migrations, eligible_after
+from db.maintenance import archive_relationships, enable_incremental_vacuum, incremental_vacuum
 
 class Repository:
     def __init__(self, db_name="twitter_profiles.db"):
         os.makedirs(DB_DIR, exist_ok=True)
         self.db_path = os.path.join(DB_DIR, db_name)
         self._initialized = False
+        self._init_lock = threading.Lock()
+        # One long-lived connection per thread (sqlite3 connections must not be shared across threads
+        # without external locking). All open connections are tracked so close() can release them.
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._generation = 0
 
     @staticmethod
     def _normalize_handle(value):
@@ -21,8 +34,10 @@ class Repository:
     def _ensure_initialized(self):
         """Ensure database is initialized before any operation"""
         if not self._initialized:
-            self._initialize_db()
-            self._initialized = True
+            with self._init_lock:
+                if not self._initialized:
+                    self._initialize_db()
+                    self._initialized = True
     
     def _initialize_db(self):
         # Check if database already exists
@@ -37,6 +52,11 @@ class Repository:
                 cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='processed_profiles'")
                 if cursor.fetchone():
                     logger.debug(f"Using existing database at {self.db_path}")
+                    # Apply the schema anyway so tables added later (e.g. source_health) exist on older DBs
+                    self._apply_schema(conn)
+                    backfilled = apply_migrations(conn)
+                    if backfilled:
+                        logger.log(f"Backfilled epoch timestamps for {backfilled} profiles in {self.db_path}")
                     conn.close()
                     return
                 conn.close()
@@ -49,24 +69,11 @@ class Repository:
         conn = None
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            with open(SCHEMA_SQL, 'r') as f:
-                schema_sql = f.read()
-            
-            # Split the schema into individual statements
-            statements = [s.strip() for s in schema_sql.split(';') if s.strip()]
-            
-            for statement in statements:
-                try:
-                    cursor.execute(statement + ';')
-                except sqlite3.OperationalError as e:
-                    # Ignore "index already exists" errors
-                    if "already exists" in str(e):
-                        logger.debug(f"Skipping existing database object: {e}")
-                    else:
-                        raise
-            
-            conn.commit()
+            if not db_exists:
+                # Must be set before the first table exists; lets maintenance hand freed pages back cheaply
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._apply_schema(conn)
+            apply_migrations(conn)
             if not db_exists:
                 logger.log(f"Created new database at {self.db_path}")
             else:
@@ -78,14 +85,161 @@ class Repository:
             if conn:
                 conn.close()
 
-    def _execute_query(self, query, params=(), fetch_one=False, fetch_all=False):
+    @staticmethod
+    def _apply_schema(conn):
+        cursor = conn.cursor()
+        with open(SCHEMA_SQL, 'r') as f:
+            schema_sql = f.read()
+        
+        # Split the schema into individual statements
+        statements = [s.strip() for s in schema_sql.split(';') if s.strip()]
+        
+        for statement in statements:
+            try:
+                cursor.execute(statement + ';')
+            except sqlite3.OperationalError as e:
+                # Ignore "index already exists" errors
+                if "already exists" in str(e):
+                    logger.debug(f"Skipping existing database object: {e}")
+                else:
+                    raise
+        
+        conn.commit()
+
+    def _connect(self):
+        """
+        Opens a connection tuned for this workload: WAL journal (readers never block the writer),
+        synchronous=NORMAL (no fsync per commit; durable at WAL checkpoints), a larger page cache,
+        memory-mapped reads and a statement cache so hot queries are prepared once per connection.
+        Autocommit mode is used; multi-statement writes run in explicit transactions via _transaction().
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(SQLITE_CACHE_SIZE_KB)}")
+        conn.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE_MB) * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+        return conn
+
+    def _get_connection(self):
+        """Returns this thread's persistent connection, opening it on first use"""
         self._ensure_initialized()
-        conn = None
+        cached = getattr(self._local, "conn", None)
+        if cached and cached[0] == self._generation:
+            return cached[1]
+        conn = self._connect()
+        with self._connections_lock:
+            self._connections.append(conn)
+        self._local.conn = (self._generation, conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Runs the enclosed statements in one explicit write transaction on this thread's connection.
+        Nested use joins the outer transaction.
+        """
+        conn = self._get_connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            conn.commit()
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def checkpoint(self):
+        """
+        Folds the WAL back into the main database file (e.g. before uploading it to S3).
+        """
+        if not self._initialized:
+            return
+        try:
+            self._get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to checkpoint database {self.db_path}: {e}")
+
+    def close(self):
+        """
+        Closes every connection opened by this repository. Later calls reconnect lazily.
+        """
+        with self._connections_lock:
+            connections = self._connections
+            self._connections = []
+            self._generation += 1
+        for conn in connections:
+            try:
+                # Lets SQLite refresh planner statistics for the queries this connection ran
+                conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.debug(f"PRAGMA optimize failed: {e}")
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.debug(f"Error closing database connection: {e}")
+
+    def run_maintenance(self, archive_days=RELATIONSHIP_ARCHIVE_DAYS, vacuum=True, analyze=True):
+        """
+        Keeps the DB small and its planner statistics fresh:
+        archives source relationships older than archive_days (0/None = keep all), switches the DB to
+        incremental auto-vacuum (one full VACUUM the first time) and returns freed pages to the filesystem,
+        then runs ANALYZE and checkpoints the WAL. Returns a report dict.
+        """
+        started = datetime.now()
+        report = {
+            "archived_relationships": 0,
+            "archive_batches": 0,
+            "converted_to_incremental_vacuum": False,
+            "freed_pages": 0,
+            "size_before_mb": self._file_size_mb(),
+        }
+        conn = self._get_connection()
+        try:
+            if archive_days:
+                cutoff = (datetime.now() - timedelta(days=archive_days)).isoformat()
+                report["archived_relationships"], report["archive_batches"] = archive_relationships(conn, cutoff)
+            if vacuum:
+                report["converted_to_incremental_vacuum"] = enable_incremental_vacuum(conn)
+                report["freed_pages"] = incremental_vacuum(conn)
+            if analyze:
+                conn.execute("ANALYZE")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            logger.error(f"Database maintenance failed for {self.db_path}: {e}")
+            report["error"] = str(e)
+        report["size_after_mb"] = self._file_size_mb()
+        report["seconds"] = (datetime.now() - started).total_seconds()
+        logger.log(
+            f"Database maintenance: archived {report['archived_relationships']:,} relationships "
+            f"in {report['archive_batches']} batches, freed {report['freed_pages']:,} pages"
+            f"{' (converted to incremental vacuum)' if report['converted_to_incremental_vacuum'] else ''}, "
+            f"size {report['size_before_mb']:.1f} MB -> {report['size_after_mb']:.1f} MB "
+            f"in {report['seconds']:.1f}s"
+        )
+        return report
+
+    def _file_size_mb(self):
+        return sum(
+            os.path.getsize(self.db_path + suffix)
+            for suffix in ("", "-wal")
+            if os.path.exists(self.db_path + suffix)
+        ) / 1024 / 1024
+
+    def _execute_query(self, query, params=(), fetch_one=False, fetch_all=False):
+        cursor = None
+        try:
+            cursor = self._get_connection().execute(query, params)
             if fetch_one:
                 return cursor.fetchone()
             if fetch_all:
@@ -95,81 +249,353 @@ class Repository:
             logger.error(f"Database query error: {e} - Query: {query} - Params: {params}")
             raise
         finally:
-            if conn:
-                conn.close()
+            if cursor is not None:
+                cursor.close()
 
-    def record_new_profile(self, twitter_handle, notion_page_id, source_username, category=None):
+    def record_new_profile(self, twitter_handle, notion_page_id, source_username, category=None, twitter_user_id=None):
         """
         Records a new profile or updates an existing one.
-        Uses the two-table structure: processed_profiles and source_relationships
+        Uses the two-table structure: processed_profiles and source_relationships.
+        With twitter_user_id the profile is matched by id first, so a renamed account updates its existing row.
         """
-        self._ensure_initialized()
         twitter_handle = self._normalize_handle(twitter_handle)
         source_username = self._normalize_handle(source_username)
-        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get current timestamp
-            now = datetime.now().isoformat()
-            
-            # Check if profile already exists
-            cursor.execute(
-                """
-                SELECT twitter_handle, category
-                FROM processed_profiles
-                WHERE twitter_handle = ? COLLATE NOCASE
-                ORDER BY
-                    (notion_page_id IS NOT NULL) DESC,
-                    first_discovered_date ASC,
-                    last_updated_date DESC,
-                    rowid DESC
-                LIMIT 1
-                """,
-                (twitter_handle,),
-            )
-            existing = cursor.fetchone()
+            with self._transaction() as conn:
+                self._record_profile(conn, twitter_handle, notion_page_id, source_username, category, twitter_user_id)
+            logger.debug(f"Recorded/updated profile {twitter_handle} for source {source_username}")
+        except Exception as e:
+            logger.error(f"Failed to record new profile {twitter_handle}: {e}")
+            raise
+
+    def record_new_profiles(self, records):
+        """
+        Batch version of record_new_profile: applies every
+        (twitter_handle, notion_page_id, source_username, category, twitter_user_id) upsert in one transaction.
+        """
+        try:
+            with self._transaction() as conn:
+                for twitter_handle, notion_page_id, source_username, category, twitter_user_id in records:
+                    self._record_profile(
+                        conn,
+                        self._normalize_handle(twitter_handle),
+                        notion_page_id,
+                        self._normalize_handle(source_username),
+                        category,
+                        twitter_user_id,
+                    )
+            logger.debug(f"Recorded/updated {len(records)} profiles in one transaction")
+        except Exception as e:
+            logger.error(f"Failed to record {len(records)} profiles: {e}")
+            raise
+
+    @staticmethod
+    def _record_profile(conn, twitter_handle, notion_page_id, source_username, category, twitter_user_id=None):
+        """Upserts one profile and its source relationship inside the caller's transaction"""
+        twitter_user_id = str(twitter_user_id) if twitter_user_id else None
+        cursor = conn.cursor()
+        try:
+            # Get current timestamp (ISO for the legacy columns, epoch seconds for the indexed ones)
+            now_dt = datetime.now()
+            now = now_dt.isoformat()
+            now_epoch = int(now_dt.timestamp())
+
+            existing = None
+            if twitter_user_id:
+                # The user id is the stable identity: a known id under a new handle is a rename
+                cursor.execute(
+                    "SELECT twitter_handle, category FROM processed_profiles WHERE twitter_user_id = ?",
+                    (twitter_user_id,),
+                )
+                existing = cursor.fetchone()
+                if existing and existing[0].lower() != twitter_handle:
+                    if Repository._rename_profile(conn, twitter_user_id, existing[0], twitter_handle, now):
+                        existing = (twitter_handle, existing[1])
+
+            if not existing:
+                # Check if profile already exists
+                cursor.execute(
+                    """
+                    SELECT twitter_handle, category
+                    FROM processed_profiles
+                    WHERE twitter_handle = ? COLLATE NOCASE
+                    ORDER BY
+                        (notion_page_id IS NOT NULL) DESC,
+                        first_discovered_date ASC,
+                        last_updated_date DESC,
+                        rowid DESC
+                    LIMIT 1
+                    """,
+                    (twitter_handle,),
+                )
+                existing = cursor.fetchone()
             
             canonical_handle = twitter_handle
             if existing:
                 canonical_handle = existing[0]
+                final_category = category if category is not None else existing[1]
                 # Update existing profile
                 if notion_page_id is None:
                     cursor.execute("""
                         UPDATE processed_profiles
-                        SET last_updated_date = ?, category = COALESCE(?, category)
+                        SET last_updated_date = ?, category = COALESCE(?, category),
+                            last_updated_epoch = ?, eligible_after = ?,
+                            twitter_user_id = COALESCE(twitter_user_id, ?)
                         WHERE twitter_handle = ?
-                    """, (now, category, canonical_handle))
+                    """, (now, category, now_epoch, eligible_after(now_epoch, final_category), twitter_user_id, canonical_handle))
                 else:
                     cursor.execute("""
                         UPDATE processed_profiles 
-                        SET last_updated_date = ?, notion_page_id = ?, category = COALESCE(?, category)
+                        SET last_updated_date = ?, notion_page_id = ?, category = COALESCE(?, category),
+                            last_updated_epoch = ?, eligible_after = ?,
+                            twitter_user_id = COALESCE(twitter_user_id, ?)
                         WHERE twitter_handle = ?
-                    """, (now, notion_page_id, category, canonical_handle))
+                    """, (now, notion_page_id, category, now_epoch, eligible_after(now_epoch, final_category), twitter_user_id, canonical_handle))
             else:
                 # Insert new profile
                 cursor.execute("""
                     INSERT INTO processed_profiles 
-                    (twitter_handle, first_discovered_date, last_updated_date, notion_page_id, category)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (twitter_handle, now, now, notion_page_id, category))
+                    (twitter_handle, first_discovered_date, last_updated_date, notion_page_id, category,
+                     first_discovered_epoch, last_updated_epoch, eligible_after, twitter_user_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (twitter_handle, now, now, notion_page_id, category,
+                      now_epoch, now_epoch, eligible_after(now_epoch, category), twitter_user_id))
             
             # Record source relationship
             cursor.execute("""
                 INSERT OR IGNORE INTO source_relationships 
-                (twitter_handle, discovered_by_handle, discovery_date)
-                VALUES (?, ?, ?)
-            """, (canonical_handle, source_username, now))
+                (twitter_handle, discovered_by_handle, discovery_date, twitter_user_id)
+                VALUES (?, ?, ?, ?)
+            """, (canonical_handle, source_username, now, twitter_user_id))
+
+            if twitter_user_id:
+                Repository._touch_handle_history(conn, twitter_user_id, canonical_handle, now)
             
-            conn.commit()
-            logger.debug(f"Recorded/updated profile {twitter_handle} for source {source_username}")
-        except Exception as e:
-            logger.error(f"Failed to record new profile {twitter_handle}: {e}")
-            raise
+            return canonical_handle
         finally:
-            if conn:
-                conn.close()
+            cursor.close()
+
+    @staticmethod
+    def _touch_handle_history(conn, twitter_user_id, twitter_handle, now):
+        conn.execute("""
+            INSERT INTO handle_history (twitter_user_id, twitter_handle, first_seen_date, last_seen_date)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(twitter_user_id, twitter_handle) DO UPDATE SET last_seen_date = excluded.last_seen_date
+        """, (twitter_user_id, twitter_handle, now, now))
+
+    @staticmethod
+    def _rename_profile(conn, twitter_user_id, old_handle, new_handle, now):
+        """
+        Moves a profile (and its source relationships) from old_handle to new_handle inside the caller's
+        transaction. Returns False without changes if new_handle already belongs to another row.
+        """
+        taken = conn.execute(
+            "SELECT twitter_user_id FROM processed_profiles WHERE twitter_handle = ? COLLATE NOCASE",
+            (new_handle,),
+        ).fetchone()
+        if taken:
+            logger.warn(
+                f"Cannot rename @{old_handle} -> @{new_handle} (user id {twitter_user_id}): "
+                f"@{new_handle} is already recorded (user id {taken[0]})"
+            )
+            return False
+
+        conn.execute(
+            "UPDATE processed_profiles SET twitter_handle = ? WHERE twitter_handle = ? COLLATE NOCASE",
+            (new_handle, old_handle),
+        )
+        conn.execute("""
+            UPDATE OR IGNORE source_relationships
+            SET twitter_handle = ?, twitter_user_id = COALESCE(twitter_user_id, ?)
+            WHERE twitter_handle = ? COLLATE NOCASE
+        """, (new_handle, twitter_user_id, old_handle))
+        # Relationships that already existed under the new handle stay; drop the leftovers
+        conn.execute("DELETE FROM source_relationships WHERE twitter_handle = ? COLLATE NOCASE", (old_handle,))
+        conn.execute(
+            "UPDATE OR IGNORE classification_results SET twitter_handle = ? WHERE twitter_handle = ? COLLATE NOCASE",
+            (new_handle, old_handle),
+        )
+        Repository._touch_handle_history(conn, twitter_user_id, old_handle, now)
+        Repository._touch_handle_history(conn, twitter_user_id, new_handle, now)
+        logger.log(f"Detected rename for user id {twitter_user_id}: @{old_handle} -> @{new_handle}")
+        return True
+
+    def rename_profile(self, twitter_user_id, new_handle):
+        """
+        Applies a rename detected during discovery. Returns the previous handle if the profile was renamed.
+        """
+        new_handle = self._normalize_handle(new_handle)
+        twitter_user_id = str(twitter_user_id)
+        try:
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT twitter_handle FROM processed_profiles WHERE twitter_user_id = ?",
+                    (twitter_user_id,),
+                ).fetchone()
+                if not row or row[0].lower() == new_handle:
+                    return None
+                now = datetime.now().isoformat()
+                return row[0] if self._rename_profile(conn, twitter_user_id, row[0], new_handle, now) else None
+        except Exception as e:
+            logger.error(f"Failed to rename profile {twitter_user_id} to {new_handle}: {e}")
+            return None
+
+    def get_handle_history(self, twitter_user_id):
+        """
+        All handles recorded for a user id, oldest first
+        """
+        query = """
+        SELECT twitter_handle, first_seen_date, last_seen_date
+        FROM handle_history
+        WHERE twitter_user_id = ?
+        ORDER BY first_seen_date, rowid
+        """
+        try:
+            results = self._execute_query(query, (str(twitter_user_id),), fetch_all=True)
+            return [
+                {"twitter_handle": row[0], "first_seen_date": row[1], "last_seen_date": row[2]}
+                for row in results
+            ]
+        except Exception as e:
+            logger.error(f"Failed to get handle history for {twitter_user_id}: {e}")
+            return []
+
+    def get_classification(self, twitter_handle):
+        """
+        The stored classification for a handle (None if it was never classified)
+        """
+        twitter_handle = self._normalize_handle(twitter_handle)
+        query = """
+        SELECT twitter_handle, twitter_user_id, content_hash, model, prompt_hash, result_json,
+               classified_date, last_reused_date, reuse_count
+        FROM classification_results
+        WHERE twitter_handle = ? COLLATE NOCASE
+        """
+        try:
+            row = self._execute_query(query, (twitter_handle,), fetch_one=True)
+            if not row:
+                return None
+            return {
+                "twitter_handle": row[0],
+                "twitter_user_id": row[1],
+                "content_hash": row[2],
+                "model": row[3],
+                "prompt_hash": row[4],
+                "result_json": row[5],
+                "classified_date": row[6],
+                "last_reused_date": row[7],
+                "reuse_count": row[8],
+            }
+        except Exception as e:
+            logger.error(f"Failed to get classification for {twitter_handle}: {e}")
+            return None
+
+    def save_classification(self, twitter_handle, content_hash, model, prompt_hash, result_json, twitter_user_id=None):
+        """
+        Stores (or replaces) the classification for a handle
+        """
+        twitter_handle = self._normalize_handle(twitter_handle)
+        now = datetime.now().isoformat()
+        query = """
+        INSERT INTO classification_results
+        (twitter_handle, twitter_user_id, content_hash, model, prompt_hash, result_json, classified_date, reuse_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+        ON CONFLICT(twitter_handle) DO UPDATE SET
+            twitter_user_id = COALESCE(excluded.twitter_user_id, classification_results.twitter_user_id),
+            content_hash = excluded.content_hash,
+            model = excluded.model,
+            prompt_hash = excluded.prompt_hash,
+            result_json = excluded.result_json,
+            classified_date = excluded.classified_date,
+            last_reused_date = NULL,
+            reuse_count = 0
+        """
+        try:
+            self._execute_query(
+                query,
+                (twitter_handle, twitter_user_id, content_hash, model, prompt_hash, result_json, now),
+            )
+        except Exception as e:
+            logger.error(f"Failed to save classification for {twitter_handle}: {e}")
+
+    def mark_classification_reused(self, twitter_handle):
+        """
+        Counts a reuse of the stored classification (answered without an OpenAI call)
+        """
+        twitter_handle = self._normalize_handle(twitter_handle)
+        query = """
+        UPDATE classification_results
+        SET last_reused_date = ?, reuse_count = reuse_count + 1
+        WHERE twitter_handle = ? COLLATE NOCASE
+        """
+        try:
+            self._execute_query(query, (datetime.now().isoformat(), twitter_handle))
+        except Exception as e:
+            logger.error(f"Failed to mark classification reuse for {twitter_handle}: {e}")
+
+    def get_user_tweets(self, twitter_user_id, limit=None):
+        """
+        Stored tweets for a user id, newest first: [{"tweet_id", "text", "created_at"}]
+        """
+        if not twitter_user_id:
+            return []
+        query = """
+        SELECT tweet_id, text, created_at
+        FROM user_tweets
+        WHERE twitter_user_id = ?
+        ORDER BY tweet_id DESC
+        """ + ("LIMIT ?" if limit else "")
+        params = (str(twitter_user_id), int(limit)) if limit else (str(twitter_user_id),)
+        try:
+            rows = self._execute_query(query, params, fetch_all=True) or []
+            return [{"tweet_id": str(row[0]), "text": row[1], "created_at": row[2]} for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to get stored tweets for user {twitter_user_id}: {e}")
+            return []
+
+    def save_user_tweets(self, twitter_user_id, tweets, keep=None):
+        """
+        Upserts fetched tweets ({"tweet_id", "text", "created_at"}, tweets without a numeric id are skipped)
+        and prunes the user's stored tweets to the newest `keep`. Returns the number of rows written.
+        """
+        if not twitter_user_id:
+            return 0
+        twitter_user_id = str(twitter_user_id)
+        now = datetime.now().isoformat()
+        rows = [
+            (twitter_user_id, int(tweet["tweet_id"]), tweet["text"], tweet.get("created_at"), now)
+            for tweet in tweets
+            if str(tweet.get("tweet_id") or "").isdigit() and tweet.get("text")
+        ]
+        if not rows:
+            return 0
+        try:
+            with self._transaction() as conn:
+                conn.executemany("""
+                    INSERT INTO user_tweets (twitter_user_id, tweet_id, text, created_at, fetched_date)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(twitter_user_id, tweet_id) DO UPDATE SET
+                        text = excluded.text,
+                        created_at = COALESCE(excluded.created_at, user_tweets.created_at),
+                        fetched_date = excluded.fetched_date
+                """, rows)
+                if keep:
+                    conn.execute("""
+                        DELETE FROM user_tweets
+                        WHERE twitter_user_id = ?
+                          AND tweet_id < (
+                              SELECT MIN(tweet_id) FROM (
+                                  SELECT tweet_id FROM user_tweets
+                                  WHERE twitter_user_id = ?
+                                  ORDER BY tweet_id DESC
+                                  LIMIT ?
+                              )
+                          )
+                    """, (twitter_user_id, twitter_user_id, int(keep)))
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to save {len(rows)} tweets for user {twitter_user_id}: {e}")
+            return 0
 
     def get_processed_profile(self, twitter_handle, source_username):
         """
@@ -195,13 +621,53 @@ class Repository:
             logger.error(f"Failed to get processed profile {twitter_handle}: {e}")
             return None
 
+    PROFILE_COLUMNS = (
+        "twitter_handle, first_discovered_date, last_updated_date, notion_page_id, category, created_at, "
+        "last_updated_epoch, eligible_after, twitter_user_id"
+    )
+
+    @staticmethod
+    def _profile_row_to_dict(row):
+        return {
+            "twitter_handle": row[0],
+            "first_discovered_date": row[1],
+            "last_updated_date": row[2],
+            "notion_page_id": row[3],
+            "category": row[4],
+            "created_at": row[5],
+            "last_updated_epoch": row[6],
+            "eligible_after": row[7],
+            "twitter_user_id": row[8]
+        }
+
+    def find_by_user_id(self, twitter_user_id):
+        """
+        Find a profile by its stable X/Twitter user id
+        """
+        if not twitter_user_id:
+            return None
+        query = f"SELECT {self.PROFILE_COLUMNS} FROM processed_profiles WHERE twitter_user_id = ?"
+        try:
+            result = self._execute_query(query, (str(twitter_user_id),), fetch_one=True)
+            return self._profile_row_to_dict(result) if result else None
+        except Exception as e:
+            logger.error(f"Failed to find profile by user id {twitter_user_id}: {e}")
+            return None
+
+    def find_profile(self, twitter_handle, twitter_user_id=None):
+        """
+        Dedup lookup: by user id first (survives renames), then by handle
+        """
+        profile = self.find_by_user_id(twitter_user_id) if twitter_user_id else None
+        return profile or self.find_by_handle(twitter_handle)
+
     def find_by_handle(self, twitter_handle):
         """
         Find a profile by Twitter handle (globally, like JavaScript)
         """
         twitter_handle = self._normalize_handle(twitter_handle)
-        query = """
-        SELECT *
+        query = f"""
+        SELECT {self.PROFILE_COLUMNS}
         FROM processed_profiles
         WHERE twitter_handle = ? COLLATE NOCASE
         ORDER BY
@@ -213,16 +679,7 @@ class Repository:
         """
         try:
             result = self._execute_query(query, (twitter_handle,), fetch_one=True)
-            if result:
-                return {
-                    "twitter_handle": result[0],
-                    "first_discovered_date": result[1],
-                    "last_updated_date": result[2],
-                    "notion_page_id": result[3],
-                    "category": result[4],
-                    "created_at": result[5]
-                }
-            return None
+            return self._profile_row_to_dict(result) if result else None
         except Exception as e:
             logger.error(f"Failed to find profile by handle {twitter_handle}: {e}")
             return None
@@ -232,13 +689,57 @@ class Repository:
         Update the last_updated_date for a profile
         """
         twitter_handle = self._normalize_handle(twitter_handle)
-        now = datetime.now().isoformat()
-        query = "UPDATE processed_profiles SET last_updated_date = ? WHERE twitter_handle = ? COLLATE NOCASE"
+        now_dt = datetime.now()
+        now_epoch = int(now_dt.timestamp())
+        query = """
+        UPDATE processed_profiles
+        SET last_updated_date = ?, last_updated_epoch = ?,
+            eligible_after = CASE WHEN category = 'Profile' THEN NULL ELSE ? END
+        WHERE twitter_handle = ? COLLATE NOCASE
+        """
         try:
-            self._execute_query(query, (now, twitter_handle))
+            self._execute_query(query, (now_dt.isoformat(), now_epoch, eligible_after(now_epoch, None), twitter_handle))
         except Exception as e:
             logger.error(f"Failed to update last seen for {twitter_handle}: {e}")
 
+    def is_eligible(self, twitter_handle, now_epoch=None):
+        """
+        Whether a known handle has left the recency window (index lookup on eligible_after).
+        Returns None for unknown handles and False for permanently skipped (Profile) handles.
+        """
+        twitter_handle = self._normalize_handle(twitter_handle)
+        now_epoch = int(datetime.now().timestamp()) if now_epoch is None else now_epoch
+        query = """
+        SELECT eligible_after
+        FROM processed_profiles
+        WHERE twitter_handle = ? COLLATE NOCASE
+        """
+        try:
+            result = self._execute_query(query, (twitter_handle,), fetch_one=True)
+            if result is None:
+                return None
+            return result[0] is not None and result[0] <= now_epoch
+        except Exception as e:
+            logger.error(f"Failed to check eligibility for {twitter_handle}: {e}")
+            return None
+
+    def list_aging_out(self, start_epoch, end_epoch):
+        """
+        Handles whose recency window ends in [start_epoch, end_epoch), oldest first, as
+        (twitter_handle, eligible_after) tuples. Answered from idx_profiles_eligible_after alone.
+        """
+        query = """
+        SELECT twitter_handle, eligible_after
+        FROM processed_profiles
+        WHERE eligible_after >= ? AND eligible_after < ?
+        ORDER BY eligible_after
+        """
+        try:
+            return self._execute_query(query, (start_epoch, end_epoch), fetch_all=True)
+        except Exception as e:
+            logger.error(f"Failed to list profiles aging out between {start_epoch} and {end_epoch}: {e}")
+            return []
+
     def add_source_relationship(self, twitter_handle, source_username):
         """
         Add a new source relationship (or ignore if already exists)
@@ -258,7 +759,7 @@ class Repository:
 
     def get_sources_for_profile(self, twitter_handle):
         """
-        Get all sources that discovered this profile
+        Get all sources that discovered this profile (relationships archived by run_maintenance are not included)
         """
         twitter_handle = self._normalize_handle(twitter_handle)
         query = """
@@ -280,5 +781,256 @@ class Repository:
             logger.error(f"Failed to get sources for profile {twitter_handle}: {e}")
             return []
 
+    def iter_dedup_rows(self):
+        """
+        Streams (twitter_handle, last_updated_date, last_updated_epoch, has_notion_page, category, twitter_user_id)
+        for every profile.
+        twitter_handle is the NOCASE primary key, so each handle appears once. Used to build the dedup index.
+        """
+        query = """
+        SELECT twitter_handle, last_updated_date, last_updated_epoch, notion_page_id IS NOT NULL, category,
+               twitter_user_id
+        FROM processed_profiles
+        """
+        cursor = self._get_connection().execute(query)
+        try:
+            while True:
+                rows = cursor.fetchmany(10000)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def _load_handle_batch(self, handles):
+        """
+        Fills this connection's temp.batch_handles table with the normalized handles and returns it.
+        The temp table lives per connection, so concurrent threads never see each other's batch.
+        """
+        conn = self._get_connection()
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_handles (handle TEXT PRIMARY KEY COLLATE NOCASE)")
+        conn.execute("DELETE FROM temp.batch_handles")
+        conn.executemany(
+            "INSERT OR IGNORE INTO temp.batch_handles (handle) VALUES (?)",
+            [(handle,) for handle in handles],
+        )
+        return conn
+
+    def _load_user_id_batch(self, user_ids):
+        """
+        Fills this connection's temp.batch_user_ids table with the user ids and returns it.
+        Ids are matched exactly, unlike the NOCASE handle batch.
+        """
+        conn = self._get_connection()
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_user_ids (user_id TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.batch_user_ids")
+        conn.executemany(
+            "INSERT OR IGNORE INTO temp.batch_user_ids (user_id) VALUES (?)",
+            [(user_id,) for user_id in user_ids],
+        )
+        return conn
+
+    def find_by_handles(self, twitter_handles):
+        """
+        Batch version of find_by_handle: one set-based lookup for all handles.
+        Returns {normalized_handle: profile} for the handles that exist; the canonical row per handle
+        is picked with the same ordering as find_by_handle.
+        CROSS JOIN pins the batch table as the outer loop: it has no ANALYZE stats, so the planner
+        would otherwise be free to scan processed_profiles instead.
+        """
+        handles = {self._normalize_handle(h) for h in twitter_handles if h}
+        if not handles:
+            return {}
+        query = """
+        SELECT b.handle, p.twitter_handle, p.first_discovered_date, p.last_updated_date,
+               p.notion_page_id, p.category, p.created_at, p.last_updated_epoch, p.eligible_after,
+               p.twitter_user_id
+        FROM temp.batch_handles b
+        CROSS JOIN processed_profiles p ON p.twitter_handle = b.handle COLLATE NOCASE
+        ORDER BY
+            b.handle,
+            (p.notion_page_id IS NOT NULL) DESC,
+            p.first_discovered_date ASC,
+            p.last_updated_date DESC,
+            p.rowid DESC
+        """
+        try:
+            conn = self._load_handle_batch(handles)
+            profiles = {}
+            for row in conn.execute(query):
+                key = row[0].lower()
+                if key in profiles:
+                    continue
+                profiles[key] = self._profile_row_to_dict(row[1:])
+            return profiles
+        except Exception as e:
+            logger.error(f"Failed to find profiles for {len(handles)} handles: {e}")
+            return {}
+
+    def find_by_user_ids(self, twitter_user_ids):
+        """
+        Batch version of find_by_user_id: {user_id: profile} for the ids that exist, in one query
+        """
+        user_ids = {str(user_id) for user_id in twitter_user_ids if user_id}
+        if not user_ids:
+            return {}
+        query = f"""
+        SELECT {self.PROFILE_COLUMNS}
+        FROM processed_profiles
+        WHERE twitter_user_id IN (SELECT user_id FROM temp.batch_user_ids)
+        """
+        try:
+            conn = self._load_user_id_batch(user_ids)
+            profiles = {}
+            for row in conn.execute(query):
+                profile = self._profile_row_to_dict(row)
+                profiles[profile["twitter_user_id"]] = profile
+            return profiles
+        except Exception as e:
+            logger.error(f"Failed to find profiles for {len(user_ids)} user ids: {e}")
+            return {}
+
+    def add_source_relationships(self, relationships):
+        """
+        Batch version of add_source_relationship: inserts every (twitter_handle, source_username)
+        pair in a single transaction (existing pairs are ignored)
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (self._normalize_handle(handle), self._normalize_handle(source), now)
+            for handle, source in relationships
+            if handle
+        ]
+        if not rows:
+            return
+        try:
+            with self._transaction() as conn:
+                conn.executemany("""
+                    INSERT OR IGNORE INTO source_relationships
+                    (twitter_handle, discovered_by_handle, discovery_date)
+                    VALUES (?, ?, ?)
+                """, rows)
+        except Exception as e:
+            logger.error(f"Failed to add {len(rows)} source relationships: {e}")
+
+    def get_sources_for_profiles(self, twitter_handles):
+        """
+        Batch version of get_sources_for_profile: {normalized_handle: [sources]} for all handles in one query
+        """
+        handles = {self._normalize_handle(h) for h in twitter_handles if h}
+        if not handles:
+            return {}
+        query = """
+        SELECT b.handle, sr.discovered_by_handle, sr.discovery_date
+        FROM temp.batch_handles b
+        CROSS JOIN source_relationships sr ON sr.twitter_handle = b.handle COLLATE NOCASE
+        ORDER BY b.handle, sr.discovery_date
+        """
+        try:
+            conn = self._load_handle_batch(handles)
+            sources = {}
+            for row in conn.execute(query):
+                sources.setdefault(row[0].lower(), []).append({
+                    "discovered_by": row[1],
+                    "discovery_date": row[2]
+                })
+            return sources
+        except Exception as e:
+            logger.error(f"Failed to get sources for {len(handles)} profiles: {e}")
+            return {}
+
+    @staticmethod
+    def _source_health_row_to_dict(row):
+        return {
+            "source_handle": row[0],
+            "source_user_id": row[1],
+            "status": row[2],
+            "detail": row[3],
+            "failure_count": row[4],
+            "first_failed_date": row[5],
+            "last_checked_date": row[6],
+            "next_check_date": row[7],
+        }
+
+    def get_source_health(self, source_handle):
+        """
+        Get the recorded health status for a source account (None if it has no recorded problem)
+        """
+        source_handle = self._normalize_handle(source_handle)
+        query = """
+        SELECT source_handle, source_user_id, status, detail, failure_count,
+               first_failed_date, last_checked_date, next_check_date
+        FROM source_health
+        WHERE source_handle = ? COLLATE NOCASE
+        """
+        try:
+            result = self._execute_query(query, (source_handle,), fetch_one=True)
+            return self._source_health_row_to_dict(result) if result else None
+        except Exception as e:
+            logger.error(f"Failed to get source health for {source_handle}: {e}")
+            return None
+
+    def get_all_source_health(self):
+        """
+        Get every recorded source health entry, keyed by lowercase source handle
+        """
+        query = """
+        SELECT source_handle, source_user_id, status, detail, failure_count,
+               first_failed_date, last_checked_date, next_check_date
+        FROM source_health
+        """
+        try:
+            results = self._execute_query(query, fetch_all=True)
+            return {row[0].lower(): self._source_health_row_to_dict(row) for row in results}
+        except Exception as e:
+            logger.error(f"Failed to get source health entries: {e}")
+            return {}
+
+    def upsert_source_health(self, source_handle, status, failure_count, next_check_date, source_user_id=None, detail=None):
+        """
+        Record (or refresh) an unhealthy source. first_failed_date is kept while the status stays the same.
+        """
+        source_handle = self._normalize_handle(source_handle)
+        now = datetime.now().isoformat()
+        query = """
+        INSERT INTO source_health
+        (source_handle, source_user_id, status, detail, failure_count, first_failed_date, last_checked_date, next_check_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(source_handle) DO UPDATE SET
+            source_user_id = COALESCE(excluded.source_user_id, source_health.source_user_id),
+            first_failed_date = CASE
+                WHEN source_health.status = excluded.status THEN source_health.first_failed_date
+                ELSE excluded.first_failed_date
+            END,
+            status = excluded.status,
+            detail = excluded.detail,
+            failure_count = excluded.failure_count,
+            last_checked_date = excluded.last_checked_date,
+            next_check_date = excluded.next_check_date
+        """
+        try:
+            self._execute_query(
+                query,
+                (source_handle, source_user_id, status, detail, failure_count, now, now, next_check_date),
+            )
+        except Exception as e:
+            logger.error(f"Failed to record source health for {source_handle}: {e}")
+
+    def clear_source_health(self, source_handle, statuses=None):
+        """
+        Remove the health entry for a source that is working again.
+        If statuses is given, only entries with one of those statuses are cleared.
+        """
+        source_handle = self._normalize_handle(source_handle)
+        query = "DELETE FROM source_health WHERE source_handle = ? COLLATE NOCASE"
+        params = [source_handle]
+        if statuses:
+            query += f" AND status IN ({', '.join('?' for _ in statuses)})"
+            params.extend(statuses)
+        try:
+            self._execute_query(query, tuple(params))
+        except Exception as e:
+            logger.error(f"Failed to clear source health for {source_handle}: {e}")
+
 # Initialize a global repository instance
 repository = Repository()
@@ -5,6 +5,7 @@ import zipfile
 from datetime import datetime
 import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
+from db.migrations import STATS_TRIGGERS
 from utils.logger import logger
 from config import (
     DB_DIR,
@@ -57,7 +58,8 @@ class S3DatabaseSync:
                 logger.error(f"Error accessing S3 bucket: {e}")
                 raise
     
-    def _get_database_stats(self, db_path):
+    @staticmethod
+    def _get_database_stats(db_path):
         """Get statistics about the database"""
         stats = {
             'total_profiles': 0,
@@ -76,19 +78,21 @@ class S3DatabaseSync:
             conn = sqlite3.connect(db_path)
             cursor = conn.cursor()
             
-            # Get profile count
-            cursor.execute("SELECT COUNT(*) FROM processed_profiles")
-            stats['total_profiles'] = cursor.fetchone()[0]
-            
-            # Get relationship count
-            cursor.execute("SELECT COUNT(*) FROM source_relationships")
-            stats['total_relationships'] = cursor.fetchone()[0]
-            
-            # Get unique source count
-            cursor.execute("SELECT COUNT(DISTINCT discovered_by_handle) FROM source_relationships")
-            stats['unique_sources'] = cursor.fetchone()[0]
+            counters = S3DatabaseSync._read_maintained_counters(cursor)
+            if counters:
+                stats['total_profiles'], stats['total_relationships'], stats['unique_sources'] = counters
+            else:
+                # DB predates the maintained counters (e.g. just downloaded from S3): count directly
+                cursor.execute("SELECT COUNT(*) FROM processed_profiles")
+                stats['total_profiles'] = cursor.fetchone()[0]
+
+                cursor.execute("SELECT COUNT(*) FROM source_relationships")
+                stats['total_relationships'] = cursor.fetchone()[0]
+
+                cursor.execute("SELECT COUNT(DISTINCT discovered_by_handle) FROM source_relationships")
+                stats['unique_sources'] = cursor.fetchone()[0]
             
-            # Get most recent profile date
+            # Get most recent profile date (index search on idx_profiles_last_updated)
             cursor.execute("SELECT MAX(last_updated_date) FROM processed_profiles")
             last_date = cursor.fetchone()[0]
             if last_date:
@@ -100,6 +104,41 @@ class S3DatabaseSync:
         
         return stats
     
+    @staticmethod
+    def _read_maintained_counters(cursor):
+        """
+        (total_profiles, total_relationships, unique_sources) from db_stats / source_counts,
+        or None if the DB does not have them or their triggers are missing (counters could be stale)
+        """
+        try:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' "
+                f"AND name IN ({', '.join('?' for _ in STATS_TRIGGERS)})",
+                tuple(STATS_TRIGGERS),
+            )
+            if cursor.fetchone()[0] != len(STATS_TRIGGERS):
+                return None
+            cursor.execute("""
+                SELECT total_profiles, total_relationships, (SELECT COUNT(*) FROM source_counts)
+                FROM db_stats
+                WHERE id = 1
+            """)
+            return cursor.fetchone()
+        except sqlite3.Error:
+            return None
+
+    @staticmethod
+    def _remove_stale_wal_files(db_path):
+        """Remove WAL/shared-memory files left by the replaced database so they are not replayed onto the new one"""
+        for suffix in ("-wal", "-shm"):
+            stale_path = db_path + suffix
+            if os.path.exists(stale_path):
+                try:
+                    os.remove(stale_path)
+                    logger.debug(f"Removed stale {suffix} file for {db_path}")
+                except OSError as e:
+                    logger.warn(f"Could not remove stale {stale_path}: {e}")
+
     async def smart_download(self):
         """Download from S3 if local doesn't exist OR if S3 is newer"""
         if not USE_S3_SYNC:
@@ -227,6 +266,7 @@ class S3DatabaseSync:
             logger.log(f"\n⬇️  Downloading database from S3...")
             absolute_path = os.path.abspath(self.local_path)
             self.s3.download_file(self.bucket, self.key, self.local_path)
+            self._remove_stale_wal_files(self.local_path)
             
             # Get stats of downloaded database
             stats = self._get_database_stats(self.local_path)
@@ -8,7 +8,13 @@ CREATE TABLE IF NOT EXISTS processed_profiles (
     last_updated_date TEXT NOT NULL,
     notion_page_id TEXT,
     category TEXT CHECK(category IN ('Project', 'Profile')),
-    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- Integer mirrors of the ISO dates (epoch seconds), maintained by the repository (see db/migrations.py)
+    first_discovered_epoch INTEGER,
+    last_updated_epoch INTEGER,
+    eligible_after INTEGER,
+    -- Stable numeric X/Twitter user id (id_str), survives renames. NULL for rows recorded before it was tracked
+    twitter_user_id TEXT
 );
 
 -- Source relationships table
@@ -17,11 +23,83 @@ CREATE TABLE IF NOT EXISTS source_relationships (
     discovered_by_handle TEXT COLLATE NOCASE,
     discovery_date TEXT NOT NULL,
     created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    twitter_user_id TEXT,
     PRIMARY KEY (twitter_handle, discovered_by_handle),
     FOREIGN KEY (twitter_handle) REFERENCES processed_profiles(twitter_handle)
 );
 
+-- Handle history (every handle seen for a user id, a rename adds a row)
+CREATE TABLE IF NOT EXISTS handle_history (
+    twitter_user_id TEXT NOT NULL,
+    twitter_handle TEXT NOT NULL COLLATE NOCASE,
+    first_seen_date TEXT NOT NULL,
+    last_seen_date TEXT NOT NULL,
+    PRIMARY KEY (twitter_user_id, twitter_handle)
+);
+
+-- Classification results (last parsed AI answer per handle, reused while content, model and prompt are unchanged)
+CREATE TABLE IF NOT EXISTS classification_results (
+    twitter_handle TEXT PRIMARY KEY COLLATE NOCASE,
+    twitter_user_id TEXT,
+    content_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    result_json TEXT NOT NULL,
+    classified_date TEXT NOT NULL,
+    last_reused_date TEXT,
+    reuse_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Tweets already fetched per user id (newest kept), so a re-check only pages until it reaches a known tweet
+CREATE TABLE IF NOT EXISTS user_tweets (
+    twitter_user_id TEXT NOT NULL,
+    tweet_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    created_at TEXT,
+    fetched_date TEXT NOT NULL,
+    PRIMARY KEY (twitter_user_id, tweet_id)
+) WITHOUT ROWID;
+
+-- Maintained counters read by the S3 sync stats instead of counting every table (kept current by triggers, see db/migrations.py)
+CREATE TABLE IF NOT EXISTS db_stats (
+    id INTEGER PRIMARY KEY CHECK(id = 1),
+    total_profiles INTEGER NOT NULL DEFAULT 0,
+    total_relationships INTEGER NOT NULL DEFAULT 0
+);
+
+-- Relationship count per discovering source (one row per distinct discovered_by_handle)
+CREATE TABLE IF NOT EXISTS source_counts (
+    discovered_by_handle TEXT PRIMARY KEY COLLATE NOCASE,
+    relationship_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Archived source relationships: rows older than RELATIONSHIP_ARCHIVE_DAYS, moved here in zlib-compressed JSON batches by db/maintenance.py
+CREATE TABLE IF NOT EXISTS source_relationships_archive (
+    batch_id INTEGER PRIMARY KEY,
+    archived_date TEXT NOT NULL,
+    oldest_discovery_date TEXT NOT NULL,
+    newest_discovery_date TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+
+-- Source health table (sources that cannot produce work: protected, suspended, renamed, not found)
+CREATE TABLE IF NOT EXISTS source_health (
+    source_handle TEXT PRIMARY KEY COLLATE NOCASE,
+    source_user_id TEXT,
+    status TEXT NOT NULL CHECK(status IN ('protected', 'suspended', 'renamed', 'not_found')),
+    detail TEXT,
+    failure_count INTEGER NOT NULL DEFAULT 1,
+    first_failed_date TEXT NOT NULL,
+    last_checked_date TEXT NOT NULL,
+    next_check_date TEXT NOT NULL
+);
+
 -- Indices
 CREATE INDEX idx_profiles_category ON processed_profiles(category);
 CREATE INDEX idx_profiles_last_updated ON processed_profiles(last_updated_date);
-CREATE INDEX idx_relationships_discovered_by ON source_relationships(discovered_by_handle); 
+CREATE INDEX idx_relationships_discovered_by ON source_relationships(discovered_by_handle);
+-- Covers get_sources_for_profile(s): rows come back already ordered by discovery_date without touching the table
+CREATE INDEX idx_relationships_handle_date ON source_relationships(twitter_handle, discovery_date, discovered_by_handle);
+CREATE INDEX idx_source_health_next_check ON source_health(next_check_date);
+CREATE INDEX idx_handle_history_handle ON handle_history(twitter_handle);
@@ -0,0 +1,113 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import DB_DIR, SQLITE_BUSY_TIMEOUT_MS, TWEET_CACHE_MAX_AGE_DAYS
+from utils.logger import logger
+from utils.tweet_record import TweetRecord
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    tweet_id TEXT PRIMARY KEY,
+    tweet TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+)
+"""
+
+# SQLite's default limit on host parameters per statement is 999 on older builds
+_MAX_PARAMS = 500
+
+
+class TweetCache:
+    """
+    Sanitized tweets by id, shared by every twitter_posts backfill (any account, any run), in its own
+    SQLite file so the profiles database synced to S3 does not grow with it. Entries older than max_age_days
+    count as misses and are re-fetched. Hits / misses / stores are counted per instance for the run summary.
+    Calls are serialized by a lock, so the async backfill can run them on executor threads.
+    """
+
+    def __init__(self, db_name="tweet_cache.db", max_age_days=TWEET_CACHE_MAX_AGE_DAYS):
+        os.makedirs(DB_DIR, exist_ok=True)
+        self.db_path = os.path.join(DB_DIR, db_name)
+        self.max_age_seconds = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, tweet_ids):
+        """Fresh cached tweets among tweet_ids, as {id: TweetRecord}"""
+        tweet_ids = list(dict.fromkeys(str(tid) for tid in tweet_ids))
+        found = {}
+        if tweet_ids:
+            oldest = time.time() - self.max_age_seconds
+            with self._lock:
+                conn = self._connection()
+                for i in range(0, len(tweet_ids), _MAX_PARAMS):
+                    chunk = tweet_ids[i:i + _MAX_PARAMS]
+                    rows = conn.execute(
+                        f"SELECT tweet_id, tweet FROM tweets WHERE fetched_at >= ? AND tweet_id IN ({','.join('?' * len(chunk))})",
+                        [oldest, *chunk],
+                    ).fetchall()
+                    for tweet_id, tweet in rows:
+                        try:
+                            found[tweet_id] = TweetRecord.from_dict(json.loads(tweet))
+                        except (ValueError, TypeError, AttributeError) as error:
+                            logger.warn(f"Ignoring unreadable cached tweet {tweet_id}: {error}")
+                self.hits += len(found)
+                self.misses += len(tweet_ids) - len(found)
+        return found
+
+    def put_many(self, records):
+        """Stores (or refreshes) TweetRecords, one transaction per call"""
+        rows = [
+            (record.id, json.dumps(record.to_dict(), ensure_ascii=False, separators=(',', ':')), time.time())
+            for record in records if record.id
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany("INSERT OR REPLACE INTO tweets (tweet_id, tweet, fetched_at) VALUES (?, ?, ?)", rows)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            self.stored += len(rows)
+        return len(rows)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self):
+        return (
+            f"Tweet cache: {self.hits} hit(s), {self.misses} miss(es) "
+            f"({self.hit_rate():.0%} hit rate), {self.stored} tweet(s) stored"
+        )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -20,11 +20,13 @@ from config import (
     OPENAI_API_KEY, OPENAI_MAX_RETRIES, OPENAI_TIMEOUT_MS, OPENAI_REQUESTS_PER_MINUTE,
     OPENAI_MODEL, MAX_FOLLOWERS, MAX_FOLLOWING, MAX_ACCOUNT_AGE_DAYS,
     MAX_CONCURRENT_REQUESTS, CONCURRENT_PROCESSES, DEBUG_MODE, RECOVERY_FILE,
-    USE_S3_SYNC
+    USE_S3_SYNC, DEDUP_INDEX_ENABLED, DB_MAINTENANCE_AFTER_RUN,
+    NOTION_CONCURRENT_UPLOADS, PIPELINE_QUEUE_SIZE, SAVE_TWEET_FILES, RAW_RESPONSE_ARCHIVE, RAW_RESPONSE_ARCHIVE_QUEUE
 )
 
 from api.twitter_client import TwitterClient, throttled_rapid_api_request
-from api.twitter_parser import simplify_twitter_data, extract_tweets_from_response
+from api.twitter_parser import simplify_twitter_data
+from api.timeline_visitor import scan_timeline, timeline_decoder
 from api.notion_client import (
     initialize_notion_categories,
     add_notion_database_entry,
@@ -33,13 +35,22 @@ from api.notion_client import (
 )
 from api.openai_client import get_openai_client, create_throttler
 from services.deduplication_service import DeduplicationService
+from services.source_health_service import SourceHealthService
+from services.classification_service import ClassificationService
+from services.tweet_store_service import TweetStoreService
 from db.s3_sync import S3DatabaseSync
-from db.repository import repository
+from db.async_repository import async_repository
+from db.dedup_index import dedup_index
+from utils.worker_pool import WorkerPool
+from utils.work_item import ProfileWorkItem
+from utils.raw_archive import RawResponseArchive
 # from services.email_service import send_completion_email  # Email functionality disabled
 
 # Initialize clients
 twitter_client = TwitterClient()
 openai_client = get_openai_client()
+# Raw API responses go to a compressed per-run archive written by a background thread
+raw_archive = RawResponseArchive(RAW_RESPONSES_DIR, mode=RAW_RESPONSE_ARCHIVE, max_queue=RAW_RESPONSE_ARCHIVE_QUEUE)
 
 # Global list for skipped profiles
 skipped_profiles = []
@@ -53,6 +64,9 @@ stale_notion_updates = []
 # Global counters for discovery filtering decisions (dedup + in-run duplicates)
 discovery_filter_stats = {}
 
+# Global counters for AI classifications: fresh OpenAI calls vs stored results reused for unchanged profiles
+classification_stats = {"classified": 0, "reused": 0}
+
 # Utility function to check if a file exists
 async def file_exists(file_path):
     return os.path.exists(file_path)
@@ -135,18 +149,44 @@ async def prepare_analysis_prompt():
         logger.error(f"Error preparing prompt: {e}")
         raise
 
-async def analyze_tweets_with_ai(tweets_file_path, custom_throttler=None):
+async def _record_analysis_failure(item, error):
     """
-    Analyzes tweets and profile with OpenAI, and optionally uploads results to Notion.
+    Records a profile whose analysis or upload failed: marks it as processed (so it is not retried forever)
+    and adds it to the run's error list.
     """
-    global skipped_profiles, analysis_errors, stale_notion_updates # Declare intent to modify global lists
+    global analysis_errors
+    logger.error(f"Error analyzing tweets for @{item.screen_name}: {error}")
 
     try:
-        # 1. Read local JSON (already fetched from Twitter)
-        with open(tweets_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        raw_data = json.loads(content)
-        simplified_data = simplify_twitter_data(raw_data)
+        if item.screen_name:
+            logger.log(f"Marking {item.screen_name} as processed despite error to avoid infinite retry loop")
+            await DeduplicationService.record_new_profile({
+                "twitter_handle": item.screen_name,
+                "twitter_user_id": item.profile.get('id_str'),
+                "notion_page_id": None
+            }, item.source_username)
+    except Exception as record_error:
+        logger.error(f"Failed to record error in deduplication service for @{item.screen_name}: {record_error}")
+
+    analysis_errors.append({
+        "username": item.screen_name or "Unknown",
+        "sourceUsername": item.source_username or "unknown",
+        "file": item.file_name,
+        "reason": "analysis_exception",
+        "error": str(error),
+    })
+
+async def classify_work_item(item, custom_throttler=None):
+    """
+    AI stage: classifies one collected profile with OpenAI (or reuses the stored classification).
+    Profiles triaged out (Profile-only / meme categories) are recorded here and None is returned;
+    for the rest, returns the classification to hand to upload_classified_profile().
+    """
+    global skipped_profiles, analysis_errors # Declare intent to modify global lists
+
+    try:
+        # 1. Simplify the collected profile + tweets (already fetched from Twitter)
+        simplified_data = simplify_twitter_data(item.to_dict())
 
         screen_name = simplified_data['profile'].get('screen_name', 'Unknown')
         logger.log(f"\n🤖 Starting AI analysis for @{screen_name}")
@@ -176,7 +216,7 @@ async def analyze_tweets_with_ai(tweets_file_path, custom_throttler=None):
         }
 
         # Save AI input data to persistent storage
-        ai_tweets_dir = os.path.join(os.path.dirname(tweets_file_path), 'ai_tweets')
+        ai_tweets_dir = AI_TWEETS_DIR
         os.makedirs(ai_tweets_dir, exist_ok=True)
         ai_input_file = os.path.join(ai_tweets_dir, f"{screen_name}_ai_input.json")
         with open(ai_input_file, 'w', encoding='utf-8') as f:
@@ -261,14 +301,23 @@ async def analyze_tweets_with_ai(tweets_file_path, custom_throttler=None):
             
             raise ValueError('Max retries exceeded for OpenAI analysis')
 
-        # 4. Call OpenAI with retry logic
-        ai_response = await try_analysis_with_retry(data_for_ai)
+        # 4. Reuse the stored classification if profile, tweets, model and prompt are unchanged; otherwise call OpenAI
+        content_hash = ClassificationService.content_hash(data_for_ai)
+        prompt_hash = ClassificationService.prompt_hash(prompt)
+        ai_response = await ClassificationService.get_reusable(screen_name, content_hash, OPENAI_MODEL, prompt_hash)
+        reused_classification = ai_response is not None
+        if reused_classification:
+            classification_stats["reused"] += 1
+            logger.log(f"Reusing stored classification for @{screen_name} (profile and tweets unchanged)")
+        else:
+            classification_stats["classified"] += 1
+            ai_response = await try_analysis_with_retry(data_for_ai)
         
         if not ai_response:
             logger.error('AI returned empty response')
             analysis_errors.append({
                 "username": screen_name,
-                "file": os.path.basename(tweets_file_path),
+                "file": item.file_name,
                 "reason": "openai_empty_response",
             })
             return None
@@ -302,7 +351,7 @@ async def analyze_tweets_with_ai(tweets_file_path, custom_throttler=None):
                     logger.error(f'Recovery attempt failed: {recovery_error}')
                     analysis_errors.append({
                         "username": screen_name,
-                        "file": os.path.basename(tweets_file_path),
+                        "file": item.file_name,
                         "reason": "openai_json_recovery_failed",
                         "error": str(recovery_error),
                     })
@@ -310,17 +359,24 @@ async def analyze_tweets_with_ai(tweets_file_path, custom_throttler=None):
             else:
                 analysis_errors.append({
                     "username": screen_name,
-                    "file": os.path.basename(tweets_file_path),
+                    "file": item.file_name,
                     "reason": "openai_json_parse_failed",
                     "error": str(parse_error),
                 })
                 return None
 
+        if not reused_classification:
+            await ClassificationService.store(
+                screen_name, content_hash, OPENAI_MODEL, prompt_hash, parsed_data,
+                simplified_data['profile'].get('user_id'),
+            )
+
         # Save AI response for debugging
         ai_response_file = os.path.join(ai_tweets_dir, f"{screen_name}_ai_response.json")
         with open(ai_response_file, 'w', encoding='utf-8') as f:
             json.dump({
                 "timestamp": datetime.now().isoformat(),
+                "reusedClassification": reused_classification,
                 "rawResponse": ai_response,
                     "parsedResponse": parsed_data
                 }, f, indent=2)
@@ -402,13 +458,37 @@ async def analyze_tweets_with_ai(tweets_file_path, custom_throttler=None):
 
             await DeduplicationService.record_new_profile({
                 "twitter_handle": screen_name,
+                "twitter_user_id": simplified_data['profile'].get('user_id'),
                 "notion_page_id": None,
                 "category": "Profile"
             }, simplified_data['sourceUsername'])
 
             return None
 
-        # 7. Otherwise, proceed with Notion upload
+        return {
+            "item": item,
+            "screen_name": screen_name,
+            "simplified_data": simplified_data,
+            "parsed_data": parsed_data,
+        }
+    except Exception as error:
+        await _record_analysis_failure(item, error)
+        return None
+
+async def upload_classified_profile(classified):
+    """
+    Notion/DB stage: creates or updates the Notion page for a profile returned by classify_work_item()
+    and records it in the dedup DB.
+    """
+    global stale_notion_updates # Declare intent to modify global lists
+
+    item = classified["item"]
+    screen_name = classified["screen_name"]
+    simplified_data = classified["simplified_data"]
+    parsed_data = classified["parsed_data"]
+
+    try:
+        # 7. Proceed with Notion upload
         final_cats = parsed_data.get('categories', []) or ['Unknown']
 
         logger.log(f"\n✅ UPLOADING to Notion: @{screen_name}")
@@ -435,22 +515,15 @@ async def analyze_tweets_with_ai(tweets_file_path, custom_throttler=None):
 
         # 8. Upload/update to Notion
         try:
-            existing_profile = repository.find_by_handle(screen_name)
+            # By user id first, so a renamed account updates its existing Notion page instead of creating a new one
+            existing_profile = await async_repository.find_profile(screen_name, simplified_data['profile'].get('user_id'))
             existing_page_id = existing_profile.get('notion_page_id') if existing_profile else None
 
-            days_since_last_update = None
             last_updated_raw = existing_profile.get("last_updated_date") if existing_profile else None
-            if last_updated_raw:
-                try:
-                    normalized_last_updated = last_updated_raw
-                    if isinstance(normalized_last_updated, str) and normalized_last_updated.endswith("Z"):
-                        normalized_last_updated = normalized_last_updated[:-1] + "+00:00"
-
-                    last_updated_dt = datetime.fromisoformat(normalized_last_updated)
-                    now_dt = datetime.now(last_updated_dt.tzinfo) if last_updated_dt.tzinfo else datetime.now()
-                    days_since_last_update = (now_dt - last_updated_dt).days
-                except ValueError:
-                    logger.warn(f"Could not parse last_updated_date for @{screen_name}: {last_updated_raw}")
+            days_since_last_update = (
+                DeduplicationService.days_since_last_update(existing_profile, screen_name)
+                if existing_profile else None
+            )
 
             account_age_days = None
             created_at_raw = simplified_data.get('profile', {}).get('created_at')
@@ -500,6 +573,7 @@ async def analyze_tweets_with_ai(tweets_file_path, custom_throttler=None):
 
             await DeduplicationService.record_new_profile({
                 "twitter_handle": screen_name,
+                "twitter_user_id": simplified_data['profile'].get('user_id'),
                 "notion_page_id": notion_page_id,
                 "category": "Project"
             }, simplified_data['sourceUsername'])
@@ -508,41 +582,33 @@ async def analyze_tweets_with_ai(tweets_file_path, custom_throttler=None):
         except Exception as notion_error:
             logger.error(f"Notion API Error Details: {notion_error}")
             raise
-
     except Exception as error:
-        logger.error(f"Error analyzing tweets for {tweets_file_path}: {error}")
-
-        error_username = None
-        error_source_username = None
-        try:
-            # Attempt to extract screen_name and source_username for deduplication
-            with open(tweets_file_path, 'r', encoding='utf-8') as f:
-                temp_data = json.load(f)
-            screen_name = temp_data['profile'].get('screen_name')
-            source_username = temp_data.get('sourceUsername', 'unknown')
-
-            error_username = screen_name
-            error_source_username = source_username
-            
-            if screen_name:
-                logger.log(f"Marking {screen_name} as processed despite error to avoid infinite retry loop")
-                await DeduplicationService.record_new_profile({
-                    "twitter_handle": screen_name,
-                    "notion_page_id": None
-                }, source_username)
-        except Exception as record_error:
-            logger.error(f"Failed to record error in deduplication service for {tweets_file_path}: {record_error}")
+        await _record_analysis_failure(item, error)
+        return None
 
+async def analyze_tweets_with_ai(tweets_file_path, custom_throttler=None):
+    """
+    Analyzes tweets and profile with OpenAI, and optionally uploads results to Notion.
+    Runs both pipeline stages back to back for one tweets file.
+    """
+    try:
+        item = ProfileWorkItem.from_file(tweets_file_path)
+    except Exception as error:
+        logger.error(f"Error reading tweets file {tweets_file_path}: {error}")
         analysis_errors.append({
-            "username": error_username or "Unknown",
-            "sourceUsername": error_source_username or "unknown",
+            "username": "Unknown",
+            "sourceUsername": "unknown",
             "file": os.path.basename(tweets_file_path),
             "reason": "analysis_exception",
             "error": str(error),
         })
-        
         return None
 
+    classified = await classify_work_item(item, custom_throttler)
+    if classified is None:
+        return None
+    return await upload_classified_profile(classified)
+
 async def get_following_counts(profiles):
     """
     Retrieves following counts in a batch request.
@@ -551,6 +617,8 @@ async def get_following_counts(profiles):
     batch_size = 200
     max_retries = 3
     failed_users = set()
+    # Per-ID lookup outcome, used to record suspended / renamed / not-found sources
+    lookup_results = {}
     
     try:
         user_ids = [p['user_id'] for p in profiles]
@@ -586,6 +654,20 @@ async def get_following_counts(profiles):
 
                             screen_name = core.get('screen_name')
                             following_count = rel_counts.get('following')
+                            rest_id = result.get('rest_id')
+
+                            if result.get('__typename') == 'UserUnavailable':
+                                if rest_id:
+                                    lookup_results[str(rest_id)] = {
+                                        "unavailable": True,
+                                        "reason": result.get('reason') or result.get('message'),
+                                    }
+                                continue
+
+                            if screen_name is not None:
+                                lookup_results[str(rest_id) if rest_id else f"@{screen_name.lower()}"] = {
+                                    "screen_name": screen_name,
+                                }
 
                             if screen_name is None or following_count is None:
                                 continue
@@ -632,12 +714,56 @@ async def get_following_counts(profiles):
         
         if failed_count > 0:
             logger.warn(f"Warning: {failed_count} users had failed count retrievals")
+
+        await record_source_lookup_health(profiles, lookup_results, failed_users)
         
         return count_map
     except Exception as e:
         logger.error(f"Error checking following counts: {e}")
         return {}
 
+async def record_source_lookup_health(profiles, lookup_results, failed_users):
+    """
+    Records sources that the batch count lookup could not resolve (suspended, renamed, not found)
+    and clears lookup-level health entries for sources that resolved normally.
+    Failed batches are ignored so transient API errors never mark a source unhealthy.
+    """
+    try:
+        known_health = await SourceHealthService.get_all()
+
+        for profile in profiles:
+            screen_name = profile.get('screen_name')
+            user_id = str(profile.get('user_id') or '')
+            if not screen_name or user_id in failed_users:
+                continue
+
+            by_id = lookup_results.get(user_id)
+            by_name = lookup_results.get(f"@{screen_name.lower()}")
+            existing = known_health.get(screen_name.lower())
+
+            if by_id and by_id.get("unavailable"):
+                reason = by_id.get("reason") or ""
+                status = 'suspended' if 'suspend' in str(reason).lower() else 'not_found'
+                await SourceHealthService.record_failure(
+                    screen_name, status, source_user_id=user_id, detail=reason or None, only_if_due=True
+                )
+            elif by_id and by_id.get("screen_name", "").lower() != screen_name.lower():
+                new_handle = by_id.get("screen_name")
+                logger.warn(f"Source @{screen_name} (ID: {user_id}) is now @{new_handle}; update input_usernames.csv")
+                await SourceHealthService.record_failure(
+                    screen_name, 'renamed', source_user_id=user_id, detail=f"renamed to @{new_handle}", only_if_due=True
+                )
+            elif by_id or by_name:
+                if existing and existing.get("status") in SourceHealthService.LOOKUP_STATUSES:
+                    await SourceHealthService.record_healthy(screen_name, statuses=SourceHealthService.LOOKUP_STATUSES)
+            else:
+                await SourceHealthService.record_failure(
+                    screen_name, 'not_found', source_user_id=user_id, detail="missing from UserResultsByRestIds",
+                    only_if_due=True,
+                )
+    except Exception as e:
+        logger.error(f"Error recording source health from count lookup: {e}")
+
 async def process_username(username, is_new_username, following_counts):
     """
     Processes a single username's following changes.
@@ -668,6 +794,15 @@ async def process_username(username, is_new_username, following_counts):
                 "followings": []
             }
 
+        source_health = await SourceHealthService.should_skip(username)
+        if source_health:
+            logger.log(
+                f"Skipping @{username} - source {source_health['status']} "
+                f"(re-check after {source_health['next_check_date']})"
+            )
+            discovery_filter_stats["source_health_skip"] = discovery_filter_stats.get("source_health_skip", 0) + 1
+            return { "total": current_count, "new": 0, "previousCount": previous_count or 0, "followings": [] }
+
         fetch_count = count_diff if count_diff > 0 else 3
 
         retry_count = 0
@@ -682,6 +817,7 @@ async def process_username(username, is_new_username, following_counts):
                 if response['data'] and response['data'].get('error') == "Not authorized.":
                     logger.log('Profile is private')
                     discovery_filter_stats["source_not_authorized"] = discovery_filter_stats.get("source_not_authorized", 0) + 1
+                    await SourceHealthService.record_failure(username, 'protected', detail="Not authorized.")
                     return { "total": current_count, "new": 0, "previousCount": previous_count, "followings": [] }
 
                 if not response['data'] or not response['data'].get('users'):
@@ -703,6 +839,13 @@ async def process_username(username, is_new_username, following_counts):
                 if protected:
                     logger.log('Protected account; skipping')
                     discovery_filter_stats["source_not_authorized"] = discovery_filter_stats.get("source_not_authorized", 0) + 1
+                    await SourceHealthService.record_failure(username, 'protected', detail="Not authorized.")
+                    return { "total": current_count, "new": 0, "previousCount": previous_count, "followings": [] }
+
+                if error.response is not None and error.response.status_code == 404:
+                    logger.log('Source account not found; skipping')
+                    discovery_filter_stats["source_not_found"] = discovery_filter_stats.get("source_not_found", 0) + 1
+                    await SourceHealthService.record_failure(username, 'not_found', detail="FollowingLight returned 404")
                     return { "total": current_count, "new": 0, "previousCount": previous_count, "followings": [] }
 
                 last_error = error
@@ -741,6 +884,8 @@ async def process_username(username, is_new_username, following_counts):
             logger.error('Error: Failed to get users data after retries')
             raise ValueError('Failed to get users data after retries')
 
+        await SourceHealthService.record_healthy(username)
+
         followings = response['data']['users']
         logger.log(
             f"@{username.ljust(15)} " +
@@ -761,12 +906,19 @@ async def process_username(username, is_new_username, following_counts):
         limited_followings = followings[:fetch_count]
         discovery_filter_stats["candidates_considered"] = discovery_filter_stats.get("candidates_considered", 0) + len(limited_followings)
 
+        # FIRST CHECK: Have we seen these profiles before? (one batched lookup for the whole source)
+        dedup_checks = await DeduplicationService.process_profiles(
+            [(user.get('screen_name'), username, user.get('created_at'), user.get('id_str')) for user in limited_followings]
+        )
+
         filtered_followings = []
-        for user in limited_followings:
+        for user, dedup_check in zip(limited_followings, dedup_checks):
             screen_name = user.get('screen_name')
+
+            if dedup_check.get("renamedFrom"):
+                discovery_filter_stats["dedup_renamed"] = discovery_filter_stats.get("dedup_renamed", 0) + 1
+                logger.log(f"    @{screen_name} was @{dedup_check['renamedFrom']} (same user id {user.get('id_str')})")
             
-            # FIRST CHECK: Have we seen this profile before?
-            dedup_check = await DeduplicationService.process_profile(screen_name, username, user.get('created_at'))
             if not dedup_check['isNew']:
                 skip_reason = dedup_check.get("skipReason")
                 skip_key = f"dedup_skip_{skip_reason or 'unknown'}"
@@ -822,227 +974,216 @@ async def process_username(username, is_new_username, following_counts):
         raise
 
 
-async def collect_tweets_for_new_followers(new_followings, source_username):
+async def collect_tweets_for_user(user, source_username, save_file=True):
     """
-    Collects tweets for new followings and saves to JSON.
+    Collects tweets for one newly-followed user.
+    Returns a result dict whose status is 'success' (with the ProfileWorkItem under "workItem") or 'error'.
+    save_file also writes the work item to TWEETS_DIR/<handle>_tweets.json.
     """
-    logger.log(f"\n🔍 Collecting tweets for {len(new_followings)} new followings from @{source_username}:")
+    try:
+        # Log basic user info for debugging
+        logger.log(f"Starting process for @{user.get('screen_name')} (ID: {user.get('id_str')})")
 
-    max_concurrent_requests = MAX_CONCURRENT_REQUESTS
-    logger.log(f"Using concurrent processing with up to {max_concurrent_requests} simultaneous requests (conservative rate limiting)")
-    
-    batches = [new_followings[i:i + max_concurrent_requests] for i in range(0, len(new_followings), max_concurrent_requests)]
-    
-    processed_count = 0
-    success_count = 0
-    error_count = 0
-    skipped_count = 0
-    
-    # Process batches of users concurrently
-    for batch_index, batch in enumerate(batches):
-        logger.log(f"Processing batch {batch_index + 1}/{len(batches)} ({len(batch)} users)")
-        
-        # Process all users in this batch concurrently
-        async def process_single_user(user):
-            nonlocal processed_count, success_count, error_count, skipped_count
-            processed_count += 1
-            try:
-                # Log basic user info for debugging
-                logger.log(f"Starting process for @{user.get('screen_name')} (ID: {user.get('id_str')})")
-                
-                # No need to filter or check duplicates - already done in process_username
-                logger.log(f"    {processed_count}/{len(new_followings)} Processing @{user.get('screen_name')}")
-
-                user_id = user.get('id_str')
-                if not user_id:
-                    logger.log(f"    {processed_count}/{len(new_followings)} ❌ @{user.get('screen_name')}: No valid ID")
-                    error_count += 1
-                    return { "user": user, "status": 'error', "reason": 'no_user_id' }
-
-                desired_tweet_target = 5
-                tweets = []
-                timeline_response = None
-                is_retryable_error = False
-
-                def find_bottom_cursor(payload):
-                    """
-                    Recursively search the timeline payload for the Bottom cursor value.
-                    """
-                    if isinstance(payload, dict):
-                        if payload.get('__typename') == 'TimelineTimelineCursor' and payload.get('cursor_type') == 'Bottom':
-                            return payload.get('value')
-                        for value in payload.values():
-                            cursor = find_bottom_cursor(value)
-                            if cursor:
-                                return cursor
-                    elif isinstance(payload, list):
-                        for item in payload:
-                            cursor = find_bottom_cursor(item)
-                            if cursor:
-                                return cursor
-                    return None
+        # No need to filter or check duplicates - already done in process_username / main
+        logger.log(f"    Processing @{user.get('screen_name')}")
 
-                try:
-                    logger.log(f"Fetching tweets for @{user.get('screen_name')} using UserTweets endpoint")
-                    timeline_response = await throttled_rapid_api_request(lambda: twitter_client.get_user_tweets(user_id))
-
-                    logger.log(f"UserTweets API raw response status: {timeline_response.get('status')}")
-                    logger.log(f"UserTweets API raw response headers: {json.dumps(timeline_response.get('headers'))}")
-                    logger.log(f"UserTweets API response keys: {list(timeline_response.get('data', {}).keys())}")
-
-                    timeline_data = timeline_response.get('data')
-                    if timeline_data and timeline_data.get('status') and timeline_data.get('status') != 'ok':
-                        logger.log(f"UserTweets API error response: {json.dumps(timeline_data)}")
-
-                    if timeline_data and timeline_data.get('error'):
-                        logger.error(f"API returned error for @{user.get('screen_name')}: {timeline_data['error']}")
-                        logger.error(f"Status code: {timeline_data.get('statusCode') or timeline_response.get('status')}")
-                        raise ValueError(f"API error: {timeline_data['error']}")
-
-                    tweets = extract_tweets_from_response(timeline_data)
-                    logger.log(f"Retrieved {len(tweets)} tweets from UserTweets endpoint for @{user.get('screen_name')}")
-
-                    raw_response_file = os.path.join(RAW_RESPONSES_DIR, f"{user.get('screen_name')}_raw_response_UserTweets_{datetime.now().isoformat().replace(':', '-').replace('.', '-')}.json")
-                    with open(raw_response_file, 'w', encoding='utf-8') as f:
-                        json.dump(timeline_data, f, indent=2)
-                    logger.log(f"Saved raw UserTweets response to {raw_response_file}")
-
-                    if len(tweets) < desired_tweet_target:
-                        bottom_cursor = find_bottom_cursor(timeline_data)
-                        if bottom_cursor:
-                            logger.log(f"Retrieved {len(tweets)} tweets; fetching next page with cursor for @{user.get('screen_name')}")
-                            next_page_response = await throttled_rapid_api_request(lambda: twitter_client.get_user_tweets(user_id, bottom_cursor))
-                            next_page_data = next_page_response.get('data')
-                            next_page_tweets = extract_tweets_from_response(next_page_data)
-                            logger.log(f"Retrieved {len(next_page_tweets)} additional tweets from paginated UserTweets call for @{user.get('screen_name')}")
-                            
-                            if next_page_tweets:
-                                tweets.extend(next_page_tweets)
-
-                            raw_response_file_cursor = os.path.join(RAW_RESPONSES_DIR, f"{user.get('screen_name')}_raw_response_UserTweets_cursor_{datetime.now().isoformat().replace(':', '-').replace('.', '-')}.json")
-                            with open(raw_response_file_cursor, 'w', encoding='utf-8') as f:
-                                json.dump(next_page_data, f, indent=2)
-                            logger.log(f"Saved paginated UserTweets response to {raw_response_file_cursor}")
-                        else:
-                            logger.log(f"No pagination cursor found in UserTweets response for @{user.get('screen_name')}")
+        user_id = user.get('id_str')
+        if not user_id:
+            logger.log(f"    ❌ @{user.get('screen_name')}: No valid ID")
+            return { "user": user, "status": 'error', "reason": 'no_user_id' }
 
-                except requests.exceptions.HTTPError as error:
-                    is_retryable_error = error.response and error.response.status_code in [500, 503, 504]
-                    if is_retryable_error:
-                        logger.warn(f"UserTweets endpoint failed with status {error.response.status_code}, retrying with UserTweetsAndReplies...")
-                    else:
-                        logger.error(f"Error fetching tweets for @{user.get('screen_name')}: {error}")
-                        if error.response:
-                            logger.error(f"Status: {error.response.status_code}, Data: {error.response.text[:500]}...")
-                        error_count += 1
-                        return { "user": user, "status": 'error', "reason": 'api_error', "error": str(error) }
-                except Exception as error:
-                    logger.error(f"Error fetching tweets from UserTweets for @{user.get('screen_name')}: {error}")
-                    error_count += 1
-                    return { "user": user, "status": 'error', "reason": 'api_error', "error": str(error) }
+        desired_tweet_target = 5
+        tweets = []
+        records = []
+        timeline_response = None
+        is_retryable_error = False
 
-                if not tweets or is_retryable_error:
-                    logger.log(f"No tweets found or retryable error, trying UserTweetsAndReplies endpoint for @{user.get('screen_name')}")
-                    await asyncio.sleep(0.5) # Smaller delay
-                    
-                    try:
-                        logger.log(f"UserTweetsAndReplies API call parameters: {{'user_id': '{user_id}'}}")
-                        logger.log(f"User ID being used: {user_id} (type: {type(user_id)})")
-                        
-                        timeline_response = await throttled_rapid_api_request(lambda: twitter_client.get_user_tweets_and_replies(user_id))
-                        
-                        logger.log(f"UserTweetsAndReplies API raw response status: {timeline_response.get('status')}")
-                        logger.log(f"UserTweetsAndReplies API raw response headers: {json.dumps(timeline_response.get('headers'))}")
-                        logger.log(f"UserTweetsAndReplies API response keys: {list(timeline_response.get('data', {}).keys())}")
-                        if timeline_response.get('data') and timeline_response['data'].get('status') and timeline_response['data']['status'] != 'ok':
-                            logger.log(f"UserTweetsAndReplies API error response: {json.dumps(timeline_response['data'])}")
-
-                        if timeline_response.get('data') and timeline_response['data'].get('error'):
-                            logger.error(f"API returned error for @{user.get('screen_name')}: {timeline_response['data']['error']}")
-                            logger.error(f"Status code: {timeline_response['data'].get('statusCode') or timeline_response.get('status')}")
-                            raise ValueError(f"API error: {timeline_response['data']['error']}")
-                        
-                        timeline_data_replies = timeline_response.get('data')
-                        tweets = extract_tweets_from_response(timeline_data_replies)
-                        logger.log(f"Retrieved {len(tweets)} tweets from UserTweetsAndReplies endpoint for @{user.get('screen_name')}")
-
-                        raw_response_file = os.path.join(RAW_RESPONSES_DIR, f"{user.get('screen_name')}_raw_response_UserTweetsAndReplies_{datetime.now().isoformat().replace(':', '-').replace('.', '-')}.json")
-                        with open(raw_response_file, 'w', encoding='utf-8') as f:
-                            json.dump(timeline_data_replies, f, indent=2)
-                        logger.log(f"Saved raw UserTweetsAndReplies response to {raw_response_file}")
-
-                        if len(tweets) < desired_tweet_target:
-                            bottom_cursor_replies = find_bottom_cursor(timeline_data_replies)
-                            if bottom_cursor_replies:
-                                logger.log(f"Retrieved {len(tweets)} tweets; fetching next page of UserTweetsAndReplies with cursor for @{user.get('screen_name')}")
-                                next_page_resp_replies = await throttled_rapid_api_request(lambda: twitter_client.get_user_tweets_and_replies(user_id, bottom_cursor_replies))
-                                next_page_data_replies = next_page_resp_replies.get('data')
-                                next_page_tweets_replies = extract_tweets_from_response(next_page_data_replies)
-                                logger.log(f"Retrieved {len(next_page_tweets_replies)} additional tweets from paginated UserTweetsAndReplies call for @{user.get('screen_name')}")
-                                if next_page_tweets_replies:
-                                    tweets.extend(next_page_tweets_replies)
-
-                                raw_response_file_cursor = os.path.join(RAW_RESPONSES_DIR, f"{user.get('screen_name')}_raw_response_UserTweetsAndReplies_cursor_{datetime.now().isoformat().replace(':', '-').replace('.', '-')}.json")
-                                with open(raw_response_file_cursor, 'w', encoding='utf-8') as f:
-                                    json.dump(next_page_data_replies, f, indent=2)
-                                logger.log(f"Saved paginated UserTweetsAndReplies response to {raw_response_file_cursor}")
-                            else:
-                                logger.log(f"No pagination cursor found in UserTweetsAndReplies response for @{user.get('screen_name')}")
-
-                    except Exception as error:
-                        logger.error(f"Error fetching tweets from UserTweetsAndReplies for @{user.get('screen_name')}: {error}")
-                        error_count += 1
-                        return { "user": user, "status": 'error', "reason": 'api_error', "error": str(error) }
-
-                user_profile = {
-                    "profile": user,
-                    "tweets": tweets,
-                    "sourceUsername": source_username
-                }
+        # Tweets fetched on earlier visits: paging stops at the first known tweet
+        stored_tweets = await TweetStoreService.get_stored(user_id)
+        known_tweet_ids = {tweet['tweet_id'] for tweet in stored_tweets}
+        if stored_tweets:
+            logger.log(f"{len(stored_tweets)} stored tweets for @{user.get('screen_name')}, fetching only newer ones")
 
-                tweets_file = os.path.join(TWEETS_DIR, f"{user.get('screen_name')}_tweets.json")
-                with open(tweets_file, 'w', encoding='utf-8') as f:
-                    json.dump(user_profile, f, indent=2)
-                logger.log(f"    {processed_count}/{len(new_followings)} ✅ @{user.get('screen_name')} - Retrieved {len(tweets)} tweets")
-                success_count += 1
-                return { "user": user, "status": 'success', "tweetCount": len(tweets) }
-            except Exception as error:
-                logger.error(f"Unexpected error processing @{user.get('screen_name')}: {error}")
-                if hasattr(error, 'stack'):
-                    logger.error(f"Stack trace: {error.stack}")
-                error_count += 1
-                return { "user": user, "status": 'error', "reason": 'unexpected', "error": str(error) }
-        # Create batch promises using list comprehension to ensure proper closure
-        batch_promises = [process_single_user(user) for user in batch]
-        
-        # Process batch without timeout - just like JavaScript
-        batch_results = await asyncio.gather(*batch_promises, return_exceptions=True)
-        
-        # Handle results, including exceptions
-        processed_results = []
-        for i, result in enumerate(batch_results):
-            if isinstance(result, Exception):
-                logger.error(f"Exception processing user {batch[i].get('screen_name', 'Unknown')}: {result}")
-                processed_results.append({'user': batch[i], 'status': 'error', 'reason': 'exception', 'error': str(result)})
-                error_count += 1
+        try:
+            logger.log(f"Fetching tweets for @{user.get('screen_name')} using UserTweets endpoint")
+            timeline_response = await throttled_rapid_api_request(lambda: twitter_client.get_user_tweets(user_id))
+
+            logger.log(f"UserTweets API raw response status: {timeline_response.get('status')}")
+            logger.log(f"UserTweets API raw response headers: {json.dumps(timeline_response.get('headers'))}")
+            logger.log(f"UserTweets API response keys: {list(timeline_response.get('data', {}).keys())}")
+
+            timeline_data = timeline_response.get('data')
+            if timeline_data and timeline_data.get('status') and timeline_data.get('status') != 'ok':
+                logger.log(f"UserTweets API error response: {json.dumps(timeline_data)}")
+
+            if timeline_data and timeline_data.get('error'):
+                raw_archive.record(user.get('screen_name'), 'UserTweets', timeline_data, error=True)
+                logger.error(f"API returned error for @{user.get('screen_name')}: {timeline_data['error']}")
+                logger.error(f"Status code: {timeline_data.get('statusCode') or timeline_response.get('status')}")
+                raise ValueError(f"API error: {timeline_data['error']}")
+
+            # One pass for the texts and the Bottom cursor
+            scan = scan_timeline(timeline_data, bottom_cursor=True)
+            records = scan.tweet_records
+            tweets = scan.tweet_texts
+            logger.log(f"Retrieved {len(tweets)} tweets from UserTweets endpoint for @{user.get('screen_name')}")
+
+            raw_archive.record(user.get('screen_name'), 'UserTweets', timeline_data, error=not tweets)
+
+            if TweetStoreService.reached_known(TweetStoreService.own_tweets(records, user_id), known_tweet_ids):
+                logger.log(f"Reached stored tweets for @{user.get('screen_name')}, no further pages needed")
+            elif len(tweets) + len(stored_tweets) < desired_tweet_target:
+                bottom_cursor = scan.bottom_cursor
+                if bottom_cursor:
+                    logger.log(f"Retrieved {len(tweets)} tweets; fetching next page with cursor for @{user.get('screen_name')}")
+                    next_page_response = await throttled_rapid_api_request(lambda: twitter_client.get_user_tweets(user_id, bottom_cursor))
+                    next_page_data = next_page_response.get('data')
+                    next_page_records = scan_timeline(next_page_data).tweet_records
+                    next_page_tweets = [record['text'] for record in next_page_records]
+                    logger.log(f"Retrieved {len(next_page_tweets)} additional tweets from paginated UserTweets call for @{user.get('screen_name')}")
+
+                    if next_page_tweets:
+                        records.extend(next_page_records)
+                        tweets.extend(next_page_tweets)
+
+                    raw_archive.record(
+                        user.get('screen_name'), 'UserTweets', next_page_data,
+                        error=not next_page_tweets, cursor=bottom_cursor,
+                    )
+                else:
+                    logger.log(f"No pagination cursor found in UserTweets response for @{user.get('screen_name')}")
+
+        except requests.exceptions.HTTPError as error:
+            is_retryable_error = error.response and error.response.status_code in [500, 503, 504]
+            if is_retryable_error:
+                logger.warn(f"UserTweets endpoint failed with status {error.response.status_code}, retrying with UserTweetsAndReplies...")
             else:
-                processed_results.append(result)
-        
-        batch_successes = sum(1 for r in processed_results if isinstance(r, dict) and r.get('status') == 'success')
-        batch_errors = sum(1 for r in processed_results if isinstance(r, dict) and r.get('status') == 'error')
-        batch_skipped = sum(1 for r in processed_results if isinstance(r, dict) and r.get('status') == 'skipped')
-        
-        logger.log(f"Batch {batch_index + 1} complete: {batch_successes} successful, {batch_errors} errors, {batch_skipped} skipped")
-        
-        if batch_index < len(batches) - 1:
-            logger.log(f"Waiting 0.1 seconds between batches...")
-            await asyncio.sleep(0.1)
-    
+                logger.error(f"Error fetching tweets for @{user.get('screen_name')}: {error}")
+                if error.response:
+                    logger.error(f"Status: {error.response.status_code}, Data: {error.response.text[:500]}...")
+                return { "user": user, "status": 'error', "reason": 'api_error', "error": str(error) }
+        except Exception as error:
+            logger.error(f"Error fetching tweets from UserTweets for @{user.get('screen_name')}: {error}")
+            return { "user": user, "status": 'error', "reason": 'api_error', "error": str(error) }
+
+        if not tweets or is_retryable_error:
+            logger.log(f"No tweets found or retryable error, trying UserTweetsAndReplies endpoint for @{user.get('screen_name')}")
+            await asyncio.sleep(0.5) # Smaller delay
+
+            try:
+                logger.log(f"UserTweetsAndReplies API call parameters: {{'user_id': '{user_id}'}}")
+                logger.log(f"User ID being used: {user_id} (type: {type(user_id)})")
+
+                timeline_response = await throttled_rapid_api_request(lambda: twitter_client.get_user_tweets_and_replies(user_id))
+
+                logger.log(f"UserTweetsAndReplies API raw response status: {timeline_response.get('status')}")
+                logger.log(f"UserTweetsAndReplies API raw response headers: {json.dumps(timeline_response.get('headers'))}")
+                logger.log(f"UserTweetsAndReplies API response keys: {list(timeline_response.get('data', {}).keys())}")
+                if timeline_response.get('data') and timeline_response['data'].get('status') and timeline_response['data']['status'] != 'ok':
+                    logger.log(f"UserTweetsAndReplies API error response: {json.dumps(timeline_response['data'])}")
+
+                if timeline_response.get('data') and timeline_response['data'].get('error'):
+                    raw_archive.record(user.get('screen_name'), 'UserTweetsAndReplies', timeline_response['data'], error=True)
+                    logger.error(f"API returned error for @{user.get('screen_name')}: {timeline_response['data']['error']}")
+                    logger.error(f"Status code: {timeline_response['data'].get('statusCode') or timeline_response.get('status')}")
+                    raise ValueError(f"API error: {timeline_response['data']['error']}")
+
+                timeline_data_replies = timeline_response.get('data')
+                scan = scan_timeline(timeline_data_replies, bottom_cursor=True)
+                records = scan.tweet_records
+                tweets = scan.tweet_texts
+                logger.log(f"Retrieved {len(tweets)} tweets from UserTweetsAndReplies endpoint for @{user.get('screen_name')}")
+
+                raw_archive.record(user.get('screen_name'), 'UserTweetsAndReplies', timeline_data_replies, error=not tweets)
+
+                if TweetStoreService.reached_known(TweetStoreService.own_tweets(records, user_id), known_tweet_ids):
+                    logger.log(f"Reached stored tweets for @{user.get('screen_name')}, no further pages needed")
+                elif len(tweets) + len(stored_tweets) < desired_tweet_target:
+                    bottom_cursor_replies = scan.bottom_cursor
+                    if bottom_cursor_replies:
+                        logger.log(f"Retrieved {len(tweets)} tweets; fetching next page of UserTweetsAndReplies with cursor for @{user.get('screen_name')}")
+                        next_page_resp_replies = await throttled_rapid_api_request(lambda: twitter_client.get_user_tweets_and_replies(user_id, bottom_cursor_replies))
+                        next_page_data_replies = next_page_resp_replies.get('data')
+                        next_page_records_replies = scan_timeline(next_page_data_replies).tweet_records
+                        next_page_tweets_replies = [record['text'] for record in next_page_records_replies]
+                        logger.log(f"Retrieved {len(next_page_tweets_replies)} additional tweets from paginated UserTweetsAndReplies call for @{user.get('screen_name')}")
+                        if next_page_tweets_replies:
+                            records.extend(next_page_records_replies)
+                            tweets.extend(next_page_tweets_replies)
+
+                        raw_archive.record(
+                            user.get('screen_name'), 'UserTweetsAndReplies', next_page_data_replies,
+                            error=not next_page_tweets_replies, cursor=bottom_cursor_replies,
+                        )
+                    else:
+                        logger.log(f"No pagination cursor found in UserTweetsAndReplies response for @{user.get('screen_name')}")
+
+            except Exception as error:
+                logger.error(f"Error fetching tweets from UserTweetsAndReplies for @{user.get('screen_name')}: {error}")
+                return { "user": user, "status": 'error', "reason": 'api_error', "error": str(error) }
+
+        # Only the profile's own tweets are stored; the AI input is everything fetched (quoted tweets
+        # by other authors included) plus the stored tweets, newest first
+        await TweetStoreService.save(user_id, TweetStoreService.own_tweets(records, user_id))
+        tweets = TweetStoreService.merge(records, stored_tweets)
+
+        item = ProfileWorkItem(profile=user, tweets=tweets, source_username=source_username)
+        if save_file:
+            item.write_file(TWEETS_DIR)
+        logger.log(f"    ✅ @{user.get('screen_name')} - Retrieved {len(tweets)} tweets")
+        return { "user": user, "status": 'success', "tweetCount": len(tweets), "workItem": item }
+    except Exception as error:
+        logger.error(f"Unexpected error processing @{user.get('screen_name')}: {error}")
+        if hasattr(error, 'stack'):
+            logger.error(f"Stack trace: {error.stack}")
+        return { "user": user, "status": 'error', "reason": 'unexpected', "error": str(error) }
+
+def create_tweet_collection_pool(on_result=None, handler=collect_tweets_for_user, queue_size=0):
+    """
+    Worker pool for tweet collection: MAX_CONCURRENT_REQUESTS workers share one queue, so a slow
+    user (up to four sequential calls) never holds back the others.
+    """
+    return WorkerPool(
+        handler,
+        MAX_CONCURRENT_REQUESTS,
+        name="Tweet collection",
+        queue_size=queue_size,
+        on_result=on_result,
+    )
+
+def _log_collection_summary(pool_stats, status_counts):
     logger.log(f"\n📊 Tweet collection complete:")
-    logger.log(f"   Total processed: {processed_count}")
-    logger.log(f"   Successful: {success_count}")
-    logger.log(f"   Errors: {error_count}")
-    logger.log(f"   Skipped: {skipped_count}")
+    logger.log(f"   Total processed: {pool_stats['completed']}")
+    logger.log(f"   Successful: {status_counts.get('success', 0)}")
+    logger.log(f"   Errors: {status_counts.get('error', 0)}")
+    logger.log(f"   Skipped: {status_counts.get('skipped', 0)}")
+    logger.log(
+        f"   Workers: {MAX_CONCURRENT_REQUESTS} (peak busy {pool_stats['peak_busy']}), "
+        f"{pool_stats['seconds']:.1f}s"
+    )
+    decoder_stats = timeline_decoder.stats()
+    logger.log(
+        f"   Timeline pages: {decoder_stats['pages']} "
+        f"({decoder_stats['fallback_pages']} needed the generic walker: {decoder_stats['fallbacks'] or 'none'})"
+    )
+
+async def collect_tweets_for_new_followers(new_followings, source_username):
+    """
+    Collects tweets for new followings and saves to JSON.
+    Standalone entry point for one source; main() feeds one shared pool from every source instead.
+    """
+    logger.log(f"\n🔍 Collecting tweets for {len(new_followings)} new followings from @{source_username}:")
+
+    status_counts = {}
+
+    def count_result(args, result, error):
+        status = result.get('status') if isinstance(result, dict) else 'error'
+        status_counts[status] = status_counts.get(status, 0) + 1
+
+    pool = create_tweet_collection_pool(on_result=count_result)
+    for user in new_followings:
+        await pool.submit(user, source_username)
+    _log_collection_summary(await pool.join(), status_counts)
 
 async def clean_directory(directory_path, create_if_not_exists=True):
     """
@@ -1226,6 +1367,13 @@ async def main():
             logger.error(f"Failed to initialize S3 sync: {e}")
             # Continue without S3 sync if it fails
             s3_sync = None
+
+    # Preload the dedup index after the (possibly refreshed) DB is in place
+    if DEDUP_INDEX_ENABLED:
+        try:
+            dedup_index.load(async_repository.repository)
+        except Exception as e:
+            logger.error(f"Failed to load dedup index, falling back to SQLite lookups: {e}")
     
     # Check for recovery marker file
     try:
@@ -1271,6 +1419,121 @@ async def main():
         # 2) Get initial following counts
         following_counts = await get_following_counts(current_profiles)
 
+        # Staged pipeline: discovery -> tweet collection -> AI analysis -> Notion/DB. Each stage is a worker
+        # pool with a bounded queue; a profile is handed to the next stage as soon as it is ready, and a full
+        # queue makes the stage feeding it wait instead of piling up work
+        collection_status_counts = {}
+        analysis_status_counts = {}
+        upload_status_counts = {}
+
+        def count_status(status_counts):
+            def on_result(args, result, error):
+                status = result.get('status') if isinstance(result, dict) else 'error'
+                status_counts[status] = status_counts.get(status, 0) + 1
+                if error is not None:
+                    analysis_errors.append({
+                        "username": "Unknown",
+                        "sourceUsername": "unknown",
+                        "file": "unknown",
+                        "reason": "analysis_task_exception",
+                        "error": str(error),
+                    })
+            return on_result
+
+        async def upload_stage(classified):
+            file = classified['item'].file_name
+            result = await upload_classified_profile(classified)
+            if result is None:
+                logger.log(f"[Notion] ⏩ Skipped: {file}")
+                return { "file": file, "status": 'skipped' }
+            logger.log(f"[Notion] ✅ Uploaded: {file}")
+            return { "file": file, "status": 'success' }
+
+        upload_pool = WorkerPool(
+            upload_stage,
+            NOTION_CONCURRENT_UPLOADS,
+            name="Notion upload",
+            queue_size=PIPELINE_QUEUE_SIZE,
+            on_result=count_status(upload_status_counts),
+        )
+
+        async def analysis_stage(item):
+            file = item.file_name
+            if resume_mode and file in processed_files:
+                logger.log(f"Skipping already processed file: {file}")
+                return { "file": file, "status": 'already_processed' }
+
+            logger.log(f"[AI] Processing: {file}")
+            start_time = time.time()
+            classified = await classify_work_item(item, create_throttler())
+            processing_time = (time.time() - start_time)
+            if classified is None:
+                logger.log(f"[AI] ⏩ Skipped: {file} ({processing_time:.1f}s)")
+                return { "file": file, "status": 'skipped' }
+            logger.log(f"[AI] Classified: {file} ({processing_time:.1f}s), queued for Notion")
+            await upload_pool.submit(classified)
+            return { "file": file, "status": 'classified' }
+
+        analysis_pool = WorkerPool(
+            analysis_stage,
+            max(CONCURRENT_PROCESSES, 1),
+            name="AI analysis",
+            queue_size=PIPELINE_QUEUE_SIZE,
+            on_result=count_status(analysis_status_counts),
+        )
+
+        # The work item itself goes downstream; the tweets file is only an optional copy, written off the event loop
+        tweet_file_writes = set()
+
+        async def save_tweets_file(item):
+            try:
+                await item.write_file_async(TWEETS_DIR)
+            except Exception as e:
+                logger.error(f"Failed to write tweets file for @{item.screen_name}: {e}")
+
+        async def collection_stage(user, source_username):
+            result = await collect_tweets_for_user(user, source_username, save_file=False)
+            if result.get('status') == 'success':
+                item = result['workItem']
+                if SAVE_TWEET_FILES:
+                    write = asyncio.ensure_future(save_tweets_file(item))
+                    tweet_file_writes.add(write)
+                    write.add_done_callback(tweet_file_writes.discard)
+                await analysis_pool.submit(item)
+            return result
+
+        def on_user_collected(args, result, error):
+            user = args[0]
+            status = result.get('status') if isinstance(result, dict) else 'error'
+            collection_status_counts[status] = collection_status_counts.get(status, 0) + 1
+            if status != 'success' and user.get('screen_name'):
+                # Not collected: a later source may queue this handle again
+                seen_handles.discard(user['screen_name'].lower())
+
+        collection_pool = create_tweet_collection_pool(
+            on_result=on_user_collected,
+            handler=collection_stage,
+            queue_size=PIPELINE_QUEUE_SIZE,
+        )
+        upload_pool.start()
+        analysis_pool.start()
+        collection_pool.start()
+
+        # Recovery mode keeps the previous run's tweet files; analyze the leftovers first (smallest first)
+        if resume_mode:
+            leftover_items = []
+            for file in os.listdir(TWEETS_DIR):
+                if not file.endswith('_tweets.json') or file in processed_files:
+                    continue
+                try:
+                    leftover_items.append(ProfileWorkItem.from_file(os.path.join(TWEETS_DIR, file)))
+                except Exception as e:
+                    logger.error(f"Could not read leftover tweets file {file}: {e}")
+            if leftover_items:
+                logger.log(f"Recovery mode: queueing {len(leftover_items)} tweet files from the previous run for analysis")
+                for item in sorted(leftover_items, key=lambda x: x.complexity):
+                    await analysis_pool.submit(item)
+
         # 3) Process each profile
         for profile in current_profiles:
             try:
@@ -1310,175 +1573,71 @@ async def main():
 
                             handle_key = screen_name.lower()
 
-                            if handle_key in seen_handles:
-                                logger.log(f"    Skip @{screen_name} - Already queued this run")
-                                discovery_filter_stats["run_skip_already_queued"] = discovery_filter_stats.get("run_skip_already_queued", 0) + 1
-                                continue
-
                             if handle_key in batch_seen:
                                 logger.log(f"    Skip @{screen_name} - Duplicate within this batch")
                                 discovery_filter_stats["run_skip_batch_duplicate"] = discovery_filter_stats.get("run_skip_batch_duplicate", 0) + 1
                                 continue
 
+                            if handle_key in seen_handles:
+                                logger.log(f"    Skip @{screen_name} - Already queued this run")
+                                discovery_filter_stats["run_skip_already_queued"] = discovery_filter_stats.get("run_skip_already_queued", 0) + 1
+                                continue
+
                             batch_seen.add(handle_key)
+                            # Claimed when queued (released again if collection fails)
+                            seen_handles.add(handle_key)
                             followings_to_collect.append(user)
 
                         if followings_to_collect:
-                            await collect_tweets_for_new_followers(followings_to_collect, profile['screen_name'])
-
+                            logger.log(
+                                f"\n🔍 Queued {len(followings_to_collect)} new followings from @{profile['screen_name']} "
+                                f"for tweet collection ({collection_pool.pending()} waiting)"
+                            )
                             for user in followings_to_collect:
-                                screen_name = user.get('screen_name')
-                                if not screen_name:
-                                    continue
-
-                                tweets_file = os.path.join(TWEETS_DIR, f"{screen_name}_tweets.json")
-                                if os.path.exists(tweets_file):
-                                    seen_handles.add(screen_name.lower())
+                                await collection_pool.submit(user, profile['screen_name'])
                 except Exception as error:
                     logger.error(f" │ Error processing profile @{profile['screen_name']}: {error}")
                     continue
             except Exception as error:
                 logger.error(f" │ Unexpected error during profile iteration for @{profile['screen_name']}: {error}")
 
+        # Drain the stages in order: once a stage's queue is empty, everything it produced has been
+        # handed to the next one
+        _log_collection_summary(await collection_pool.join(), collection_status_counts)
+
         # 4) Save the new counts
         await save_follower_counts(following_counts)
 
-        # 5) Analyze newly created tweet files with AI
-        tweet_files = [f for f in os.listdir(TWEETS_DIR) if f.endswith('_tweets.json')]
-
-        if tweet_files:
-            file_complexity = await asyncio.gather(*[
-                get_file_complexity(os.path.join(TWEETS_DIR, file)) for file in tweet_files
-            ])
-            
-            sorted_files = [item['file'] for item in sorted(file_complexity, key=lambda x: x['complexity'])]
-            
-            logger.log(f"Files sorted by complexity (smallest first) to optimize token usage")
-            
-            concurrent_processes = CONCURRENT_PROCESSES
-            
-            if concurrent_processes <= 1:
-                logger.log(f"\nAnalyzing {len(sorted_files)} files sequentially (concurrent processing disabled)")
-                
-                for file in sorted_files:
-                    if resume_mode and file in processed_files:
-                        logger.log(f"Skipping already processed file: {file}")
-                        continue
-                    
-                    total_processed += 1
-                    file_path = os.path.join(TWEETS_DIR, file)
-                    
-                    file_throttler = create_throttler()
-                    
-                    try:
-                        logger.log(f"[{total_processed}/{len(sorted_files)}] Processing: {file}")
-                        start_time = time.time()
-                        
-                        result = await analyze_tweets_with_ai(file_path, file_throttler)
-                        
-                        processing_time = (time.time() - start_time)
-                        
-                        if result is None:
-                            total_skipped += 1
-                            logger.log(f"[{total_processed}/{len(sorted_files)}] ⏩ Skipped: {file} ({processing_time:.1f}s)")
-                        else:
-                            total_uploaded += 1
-                            logger.log(f"[{total_processed}/{len(sorted_files)}] ✅ Uploaded: {file} ({processing_time:.1f}s)")
-                    except Exception as error:
-                        logger.error(f"Error analyzing tweets: {error}")
-                        total_skipped += 1
-                        analysis_errors.append({
-                            "username": file.replace("_tweets.json", ""),
-                            "sourceUsername": "unknown",
-                            "file": file,
-                            "reason": "analysis_task_exception",
-                            "error": str(error),
-                        })
-                        logger.log(f"[{total_processed}/{len(sorted_files)}] ⏩ Skipped: {file} (error)")
-            else:
-                logger.log(f"\nAnalyzing {len(sorted_files)} files concurrently (concurrent processing enabled)")
-                
-                async def process_single_tweet_file(file, file_index):
-                    if resume_mode and file in processed_files:
-                        logger.log(f"Skipping already processed file: {file}")
-                        return { "file": file, "status": 'skipped', "reason": 'already_processed' }
-                    
-                    file_path = os.path.join(TWEETS_DIR, file)
-                    
-                    file_throttler = create_throttler()
-                    
-                    try:
-                        logger.log(f"[{file_index + 1}/{len(sorted_files)}] Processing: {file}")
-                        start_time = time.time()
-                        
-                        result = await analyze_tweets_with_ai(file_path, file_throttler)
-                        
-                        processing_time = (time.time() - start_time)
-                        
-                        if result is None:
-                            logger.log(f"[{file_index + 1}/{len(sorted_files)}] ⏩ Skipped: {file} ({processing_time:.1f}s)")
-                            return { "file": file, "status": 'skipped', "reason": 'analysis_skipped' }
-                        else:
-                            logger.log(f"[{file_index + 1}/{len(sorted_files)}] ✅ Uploaded: {file} ({processing_time:.1f}s)")
-                            return { "file": file, "status": 'success' }
-                    except Exception as error:
-                        logger.error(f"Error analyzing tweets: {error}")
-                        analysis_errors.append({
-                            "username": file.replace("_tweets.json", ""),
-                            "sourceUsername": "unknown",
-                            "file": file,
-                            "reason": "analysis_task_exception",
-                            "error": str(error),
-                        })
-                        logger.log(f"[{file_index + 1}/{len(sorted_files)}] ⏩ Skipped: {file} (error)")
-                        return { "file": file, "status": 'error', "reason": 'analysis_error', "error": str(error) }
-
-                # Create tasks for concurrent processing
-                tasks = [process_single_tweet_file(file, idx) for idx, file in enumerate(sorted_files)]
-                
-                # Log that we're starting concurrent processing
-                logger.log(f"Starting concurrent processing of {len(tasks)} files...")
-                
-                # Process all files concurrently like JavaScript does
-                # JavaScript uses Promise.all() which is equivalent to asyncio.gather()
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                normalized_results = []
-                for r in results:
-                    if isinstance(r, Exception):
-                        analysis_errors.append({
-                            "username": "Unknown",
-                            "sourceUsername": "unknown",
-                            "file": "unknown",
-                            "reason": "analysis_task_exception",
-                            "error": str(r),
-                        })
-                        normalized_results.append({
-                            "file": "unknown",
-                            "status": "error",
-                            "reason": "task_exception",
-                            "error": str(r),
-                        })
-                    else:
-                        normalized_results.append(r)
-
-                successful_uploads = sum(1 for r in normalized_results if r.get("status") == "success")
-                skipped_uploads = sum(1 for r in normalized_results if r.get("status") == "skipped")
-                failed_uploads = sum(1 for r in normalized_results if r.get("status") == "error")
-                
-                # Update totals based on results
-                total_processed = len(normalized_results)
-                total_uploaded = successful_uploads
-                total_skipped = skipped_uploads + failed_uploads
-                
-                logger.log(f"\nConcurrent processing complete:")
-                logger.log(f"   Total processed: {total_processed}")
-                logger.log(f"   Successful uploads: {successful_uploads}")
-                logger.log(f"   Skipped uploads: {skipped_uploads}")
-                logger.log(f"   Failed uploads: {failed_uploads}")
+        # 5) Let AI analysis and Notion uploads finish
+        analysis_pool_stats = await analysis_pool.join()
+        upload_pool_stats = await upload_pool.join()
+        if tweet_file_writes:
+            await asyncio.gather(*tweet_file_writes)
+
+        analyzed = sum(count for status, count in analysis_status_counts.items() if status != 'already_processed')
+        uploaded = upload_status_counts.get('success', 0)
+        total_processed += analyzed
+        total_uploaded += uploaded
+        total_skipped += analyzed - uploaded
+
+        logger.log(f"\nAnalysis pipeline complete:")
+        logger.log(f"   Total processed: {analyzed}")
+        logger.log(f"   Successful uploads: {uploaded}")
+        logger.log(f"   Skipped uploads: {analyzed - uploaded}")
+        logger.log(
+            f"   AI analysis: {analysis_pool.workers} workers (peak busy {analysis_pool_stats['peak_busy']}), "
+            f"Notion upload: {upload_pool.workers} workers (peak busy {upload_pool_stats['peak_busy']}), "
+            f"{analysis_pool_stats['seconds']:.1f}s since the pipeline started"
+        )
 
     except Exception as error:
         logger.error(f"Error in main function: {error}")
+
+    if classification_stats["classified"] or classification_stats["reused"]:
+        logger.log(
+            f"\nAI classifications: {classification_stats['classified']} via OpenAI, "
+            f"{classification_stats['reused']} reused from stored results (unchanged profiles)"
+        )
     
     if skipped_profiles:
         logger.log(f"\n📊 CLASSIFICATION SUMMARY - Profiles Skipped:")
@@ -1551,6 +1710,12 @@ async def main():
         f"under_1_year={dedup_under_one_year}, "
         f"db_profile={dedup_db_profile}"
     )
+    logger.log(
+        "Source Health Skips: "
+        f"backoff={discovery_filter_stats.get('source_health_skip', 0)}, "
+        f"not_authorized={discovery_filter_stats.get('source_not_authorized', 0)}, "
+        f"not_found={discovery_filter_stats.get('source_not_found', 0)}"
+    )
     logger.log(f"Profiles Flagged for Pivot Recheck (>=90d and age>=365d): {len(stale_updates_sorted)}")
     for update in stale_updates_sorted:
         days_since_last_update = update.get("daysSinceLastUpdate")
@@ -1567,7 +1732,18 @@ async def main():
         logger.log(f"Skip Rate: {skip_rate:.1f}%")
     logger.log(f"───────────────────────────────────────\n")
     
+    # Optional post-run maintenance: archive old relationships, vacuum and ANALYZE so the upload is smaller
+    if DB_MAINTENANCE_AFTER_RUN:
+        await async_repository.run_maintenance()
+
+    # Flush the raw response archive (the writer thread finishes whatever is still queued)
+    await asyncio.get_running_loop().run_in_executor(None, raw_archive.close)
+
     # Upload updated database and follower counts to S3 if enabled (best-effort)
+    # Drain pending writes, then fold the WAL into the main DB file so the file on disk (and in S3) is complete
+    await async_repository.checkpoint()
+    await async_repository.close()
+
     if USE_S3_SYNC and s3_sync:
         try:
             logger.log("🔄 Uploading updated database to S3...")
@@ -1633,41 +1809,6 @@ async def main():
         "errors": analysis_errors,
     }
 
-async def get_file_complexity(file_path):
-    """
-    Calculates a complexity score for a tweet file based on size and text content length.
-    """
-    try:
-        stats = os.stat(file_path)
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        data = json.loads(content)
-        
-        text_length = 0
-        if data.get('profile') and data['profile'].get('description'):
-            text_length += len(data['profile']['description'])
-        
-        if data.get('tweets') and isinstance(data['tweets'], list):
-            for tweet in data['tweets']:
-                if isinstance(tweet, dict):
-                    if tweet.get('text'):
-                        text_length += len(tweet['text'])
-                    elif tweet.get('full_text'):
-                        text_length += len(tweet['full_text'])
-                elif isinstance(tweet, str):
-                    text_length += len(tweet)
-        
-        return {
-            "file": os.path.basename(file_path),
-            "size": stats.st_size,
-            "textLength": text_length,
-            "complexity": stats.st_size + (text_length * 2) # Weigh text length more heavily
-        }
-    except Exception as e:
-        logger.error(f"Error analyzing complexity of {file_path}: {e}")
-        return { "file": os.path.basename(file_path), "size": float('inf'), "textLength": 0, "complexity": float('inf') }
-
 async def run_with_email_notification():
     """
     Runs the main bot without email notifications.
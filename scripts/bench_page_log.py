@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Allow running from repo root or the scripts/ directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from api.twitter_posts import _write_partial_results
+from bench_timeline_parsing import synthetic_timeline
+from utils.page_log import PageLog, convert_page_log
+
+HEADER = {"username": "synthetic", "userId": "1000", "fetchedAt": "2024-01-01T00:00:00", "user": {"rest_id": "1000"}}
+
+
+def rewrite_per_page(path, pages):
+    """What run_full_flow did before: rewrite the whole combined raw file after every page"""
+    written = 0
+    saved = []
+    for page in pages:
+        saved.append(page)
+        _write_partial_results(path, HEADER["username"], HEADER["userId"], HEADER["user"], saved, HEADER["fetchedAt"])
+        written += os.path.getsize(path)
+    return written
+
+
+def append_per_page(path, pages, fsync_pages):
+    with PageLog(path, fsync_pages=fsync_pages) as log:
+        log.open(HEADER)
+        for page in pages:
+            log.append(page)
+    return log.bytes_written
+
+
+def measure(fn, *args):
+    start = time.perf_counter()
+    written = fn(*args)
+    return {"written_mb": written / 1e6, "seconds": time.perf_counter() - start}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Disk I/O of saving pages during pagination: full raw-file rewrite per page vs append-only page log."
+    )
+    parser.add_argument("--pages", type=int, default=100, help="Pages to save (default: 100)")
+    parser.add_argument("--tweets-per-page", type=int, default=20, help="Tweets per synthetic page (default: 20)")
+    parser.add_argument("--fsync-pages", type=int, default=10, help="Page log fsync batch (default: 10)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = [
+        {"pageNumber": n + 1, "requestedCursor": None, "data": synthetic_timeline(rng, 1_000, tweets=args.tweets_per_page)}
+        for n in range(args.pages)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "synthetic.json")
+        log_path = os.path.join(tmp, "synthetic_log.pages.jsonl")
+        results = {
+            "pages": args.pages,
+            "rewrite": measure(rewrite_per_page, legacy_path, pages),
+            "append": measure(append_per_page, log_path, pages, args.fsync_pages),
+            "convert": measure(lambda: os.path.getsize(convert_page_log(log_path))),
+        }
+        # The converter reproduces the legacy combined file byte for byte
+        with open(legacy_path, 'rb') as a, open(os.path.join(tmp, "synthetic_log.json"), 'rb') as b:
+            assert a.read() == b.read()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['pages']} pages")
+    for name in ("rewrite", "append", "convert"):
+        r = results[name]
+        print(f"{name:<8} wrote {r['written_mb']:9.1f} MB  {r['seconds']:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Allow running from repo root or the scripts/ directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from api.twitter_posts import (
+    _assemble_ai_ready_output,
+    _derive_missing_tweet_ids,
+    _stream_raw_file,
+    _write_partial_results,
+)
+from bench_timeline_parsing import synthetic_timeline
+
+
+def load_whole(raw_path):
+    """What --backfill-only / --process-only did before: json.load the whole raw file"""
+    with open(raw_path, 'r', encoding='utf-8') as f:
+        payload = json.load(f)
+    pages = payload.get('tweetsAndReplies', {}).get('pages', [])
+    return payload.get('username'), payload.get('userId'), payload.get('fetchedAt'), pages
+
+
+def load_streaming(raw_path):
+    username, user_id, fetched_at, pages, _ = _stream_raw_file(raw_path)
+    return username, user_id, fetched_at, pages
+
+
+def process(loader, raw_path):
+    username, user_id, fetched_at, pages = loader(raw_path)
+    hydrated, missing_ids = _derive_missing_tweet_ids(user_id, pages)
+    clean = _assemble_ai_ready_output(username, user_id, fetched_at, raw_path, pages, hydrated, {})
+    return clean, sorted(missing_ids)
+
+
+def measure(loader, raw_path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = process(loader, raw_path)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"peak_mb": peak / 1e6, "seconds": seconds}
+
+
+def write_synthetic_raw_file(directory, pages, tweets_per_page, seed):
+    rng = random.Random(seed)
+    raw_path = os.path.join(directory, "synthetic_raw.json")
+    page_list = [
+        {"pageNumber": n + 1, "cursor": None, "data": synthetic_timeline(rng, 1_000, tweets=tweets_per_page)}
+        for n in range(pages)
+    ]
+    _write_partial_results(raw_path, "synthetic", "1000", {"rest_id": "1000"}, page_list, "2024-01-01T00:00:00")
+    return raw_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Peak memory of --backfill-only / --process-only input handling: json.load vs streamed pages."
+    )
+    parser.add_argument("--raw-file", help="Raw twitter_posts file to process (default: a synthetic one)")
+    parser.add_argument("--pages", type=int, default=200, help="Pages in the synthetic raw file (default: 200)")
+    parser.add_argument("--tweets-per-page", type=int, default=20, help="Tweets per synthetic page (default: 20)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = args.raw_file or write_synthetic_raw_file(tmp, args.pages, args.tweets_per_page, args.seed)
+        whole_result, whole = measure(load_whole, raw_path)
+        streamed_result, streamed = measure(load_streaming, raw_path)
+        assert json.dumps(streamed_result) == json.dumps(whole_result)
+        results = {
+            "raw_file_mb": os.path.getsize(raw_path) / 1e6,
+            "tweets": whole_result[0]["summary"]["totalTweets"],
+            "json_load": whole,
+            "streamed": streamed,
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Raw file {results['raw_file_mb']:.1f} MB, {results['tweets']} tweets")
+    for name in ("json_load", "streamed"):
+        r = results[name]
+        print(f"{name:<10} peak {r['peak_mb']:8.1f} MB  {r['seconds']:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
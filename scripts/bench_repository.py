@@ -0,0 +1,174 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Allow running from repo root or the scripts/ directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db.repository import Repository
+from db.dedup_index import DedupIndex
+from db.migrations import eligible_after
+
+FIND_BY_HANDLE_SQL = """
+SELECT *
+FROM processed_profiles
+WHERE twitter_handle = ? COLLATE NOCASE
+ORDER BY
+    (notion_page_id IS NOT NULL) DESC,
+    first_discovered_date ASC,
+    last_updated_date DESC,
+    rowid DESC
+LIMIT 1
+"""
+
+
+def _handle(i: int) -> str:
+    return f"user{i:08d}"
+
+
+def populate(repo: Repository, rows: int, batch_size: int = 50_000, extra_source_ratio: float = 0.0) -> None:
+    """
+    Fills processed_profiles with `rows` synthetic profiles (and one source relationship each).
+    With extra_source_ratio, that share of profiles gets 1-3 additional discovering sources.
+    """
+    conn = repo._get_connection()
+    base = datetime(2024, 1, 1)
+    rng = random.Random(42)
+    for start in range(0, rows, batch_size):
+        end = min(start + batch_size, rows)
+        profiles = []
+        relationships = []
+        for i in range(start, end):
+            first_dt = base + timedelta(minutes=i)
+            last_dt = base + timedelta(days=rng.randint(0, 700))
+            first, last = first_dt.isoformat(), last_dt.isoformat()
+            last_epoch = int(last_dt.timestamp())
+            category = "Profile" if i % 3 == 0 else "Project"
+            page_id = f"page-{i}" if category == "Project" and i % 2 == 0 else None
+            profiles.append((
+                _handle(i), first, last, page_id, category,
+                int(first_dt.timestamp()), last_epoch, eligible_after(last_epoch, category),
+            ))
+            relationships.append((_handle(i), f"source{i % 75:03d}", first))
+            if extra_source_ratio and rng.random() < extra_source_ratio:
+                for extra in range(1, rng.randint(1, 3) + 1):
+                    relationships.append((_handle(i), f"source{(i + extra * 11) % 75:03d}", first))
+        with repo._transaction() as tx:
+            tx.executemany(
+                "INSERT INTO processed_profiles "
+                "(twitter_handle, first_discovered_date, last_updated_date, notion_page_id, category, "
+                "first_discovered_epoch, last_updated_epoch, eligible_after) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                profiles,
+            )
+            tx.executemany(
+                "INSERT OR IGNORE INTO source_relationships "
+                "(twitter_handle, discovered_by_handle, discovery_date) VALUES (?, ?, ?)",
+                relationships,
+            )
+    conn.execute("ANALYZE")
+
+
+def _lookup_keys(rows: int, lookups: int, hit_ratio: float) -> list:
+    rng = random.Random(7)
+    keys = []
+    for _ in range(lookups):
+        if rng.random() < hit_ratio:
+            keys.append(_handle(rng.randrange(rows)).upper())  # exercise COLLATE NOCASE
+        else:
+            keys.append(f"missing{rng.randrange(10 ** 9)}")
+    return keys
+
+
+def bench_connection_per_query(db_path: str, keys: list) -> float:
+    """
+    The previous access pattern: connect, execute, commit, fetch, close for every lookup.
+    """
+    start = time.perf_counter()
+    for key in keys:
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(FIND_BY_HANDLE_SQL, (key.lower(),))
+            conn.commit()
+            cursor.fetchone()
+        finally:
+            conn.close()
+    return time.perf_counter() - start
+
+
+def bench_persistent(repo: Repository, keys: list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        repo.find_by_handle(key)
+    return time.perf_counter() - start
+
+
+def bench_index(index: DedupIndex, keys: list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        index.get(key)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dedup lookups (find_by_handle) before/after the persistent connection.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic processed_profiles rows (default: 1,000,000)")
+    parser.add_argument("--lookups", type=int, default=20_000, help="Lookups per mode (default: 20,000)")
+    parser.add_argument("--hit-ratio", type=float, default=0.8, help="Share of lookups that hit an existing handle (default: 0.8)")
+    parser.add_argument("--db", help="Reuse/create the benchmark DB at this path instead of a temp file")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    if args.db:
+        db_path = str(Path(args.db).resolve())
+    else:
+        tmp_dir = tempfile.TemporaryDirectory(prefix="bench_repository_")
+        db_path = os.path.join(tmp_dir.name, "bench.db")
+
+    try:
+        repo = Repository(db_name=db_path)
+        existing = repo._execute_query("SELECT COUNT(*) FROM processed_profiles", fetch_one=True)[0]
+        if existing == 0:
+            print(f"Generating {args.rows:,} synthetic profiles in {db_path} ...")
+            gen_start = time.perf_counter()
+            populate(repo, args.rows)
+            print(f"Generated in {time.perf_counter() - gen_start:.1f}s")
+        else:
+            print(f"Reusing {existing:,} existing profiles in {db_path}")
+        rows = repo._execute_query("SELECT COUNT(*) FROM processed_profiles", fetch_one=True)[0]
+        keys = _lookup_keys(rows, args.lookups, args.hit_ratio)
+
+        # Warm the OS cache once so both modes start from the same state
+        bench_persistent(repo, keys[: min(1000, len(keys))])
+
+        legacy_s = bench_connection_per_query(db_path, keys)
+        persistent_s = bench_persistent(repo, keys)
+        index = DedupIndex()
+        _, index_load_s, index_bytes = index.load(repo)
+        index_s = bench_index(index, keys)
+        repo.close()
+
+        size_mb = os.path.getsize(db_path) / 1024 / 1024
+        print(f"\nprocessed_profiles rows: {rows:,} (DB size {size_mb:.1f} MB), lookups: {len(keys):,}, hit ratio: {args.hit_ratio:.0%}")
+        print(f"{'mode':<28}{'total s':>10}{'lookups/s':>14}")
+        print(f"{'connection per query':<28}{legacy_s:>10.2f}{len(keys) / legacy_s:>14,.0f}")
+        print(f"{'persistent WAL connection':<28}{persistent_s:>10.2f}{len(keys) / persistent_s:>14,.0f}")
+        print(f"{'in-memory dedup index':<28}{index_s:>10.2f}{len(keys) / index_s:>14,.0f}")
+        print(f"speedup (persistent vs per-query): {legacy_s / persistent_s:.1f}x")
+        print(f"dedup index: loaded in {index_load_s:.2f}s, ~{index_bytes / 1024 / 1024:.1f} MB")
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
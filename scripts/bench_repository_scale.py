@@ -0,0 +1,251 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Allow running from repo root or the scripts/ directory
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPTS_DIR)
+for path in (ROOT_DIR, SCRIPTS_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from bench_repository import _handle, _lookup_keys, populate
+from db.async_repository import AsyncRepository
+from db.repository import Repository
+from db.s3_sync import S3DatabaseSync
+import services.deduplication_service as deduplication_service
+from services.deduplication_service import DeduplicationService
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+# 10M rows take several minutes to generate and ~2 GB of disk; only run when asked for explicitly
+LARGE_SIZES = [10_000_000]
+
+# Old enough to pass the account-age gate, so process_profile takes its full path
+OLD_ACCOUNT = "Mon Jan 01 00:00:00 +0000 2018"
+
+# The individual queries behind S3DatabaseSync._get_database_stats (timed separately to show which one scales badly)
+STATS_QUERIES = {
+    "count profiles": "SELECT COUNT(*) FROM processed_profiles",
+    "count relationships": "SELECT COUNT(*) FROM source_relationships",
+    "distinct sources": "SELECT COUNT(DISTINCT discovered_by_handle) FROM source_relationships",
+    "max last_updated": "SELECT MAX(last_updated_date) FROM processed_profiles",
+}
+
+
+def _parse_size(value: str) -> int:
+    value = value.strip().lower()
+    multiplier = 1
+    if value.endswith("k"):
+        multiplier, value = 1_000, value[:-1]
+    elif value.endswith("m"):
+        multiplier, value = 1_000_000, value[:-1]
+    return int(float(value) * multiplier)
+
+
+def _summarize(name: str, latencies: list) -> dict:
+    """Throughput and latency percentiles (ms) for one operation"""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    count = len(ordered)
+
+    def percentile(p):
+        return ordered[min(count - 1, int(p * count))] * 1000
+
+    return {
+        "operation": name,
+        "ops": count,
+        "ops_per_s": count / total if total else 0.0,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _timed(func, args_list: list) -> list:
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def _timed_async(func, args_list: list) -> list:
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        await func(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _db_size_mb(db_path: str) -> float:
+    return sum(
+        os.path.getsize(db_path + suffix)
+        for suffix in ("", "-wal")
+        if os.path.exists(db_path + suffix)
+    ) / 1024 / 1024
+
+
+def bench_size(db_path: str, rows: int, ops: int, stats_runs: int, hit_ratio: float, extra_source_ratio: float) -> dict:
+    repo = Repository(db_name=db_path)
+    existing = repo._execute_query("SELECT COUNT(*) FROM processed_profiles", fetch_one=True)[0]
+    if existing == 0:
+        print(f"Generating {rows:,} synthetic profiles in {db_path} ...", flush=True)
+        gen_start = time.perf_counter()
+        populate(repo, rows, extra_source_ratio=extra_source_ratio)
+        repo.checkpoint()
+        print(f"Generated in {time.perf_counter() - gen_start:.1f}s", flush=True)
+    elif existing != rows:
+        print(f"Note: {db_path} already holds {existing:,} profiles (requested {rows:,}); benchmarking it as is")
+        rows = existing
+    relationships = repo._execute_query("SELECT COUNT(*) FROM source_relationships", fetch_one=True)[0]
+    size_before_mb = _db_size_mb(db_path)
+
+    rng = random.Random(rows)
+    keys = _lookup_keys(rows, ops, hit_ratio)
+    hit_keys = [_handle(rng.randrange(rows)) for _ in range(ops)]
+
+    # Warm the page cache so the first operation is not paying for cold reads
+    _timed(repo.find_by_handle, [(key,) for key in keys[: min(1000, len(keys))]])
+
+    results = [
+        _summarize("find_by_handle", _timed(repo.find_by_handle, [(key,) for key in keys])),
+        _summarize("get_sources_for_profile", _timed(repo.get_sources_for_profile, [(key,) for key in hit_keys])),
+    ]
+
+    # process_profile goes through the async facade like it does in a run (lookup + relationship write)
+    async def run_process_profile():
+        async_repo = AsyncRepository(repo)
+        previous_async_repo = deduplication_service.async_repository
+        deduplication_service.async_repository = async_repo
+        try:
+            process_args = [(key, f"benchsource{i % 5}", OLD_ACCOUNT) for i, key in enumerate(keys)]
+            return await _timed_async(DeduplicationService.process_profile, process_args)
+        finally:
+            deduplication_service.async_repository = previous_async_repo
+            await async_repo.close()
+
+    results.append(_summarize("process_profile", asyncio.run(run_process_profile())))
+
+    # Writes last: half updates of existing profiles, half new handles
+    record_args = []
+    for i in range(ops):
+        handle = hit_keys[i] if i % 2 == 0 else f"benchnew{rows}_{i:08d}"
+        record_args.append((handle, None, f"benchsource{i % 5}", "Project"))
+    results.append(_summarize("record_new_profile", _timed(repo.record_new_profile, record_args)))
+    repo.checkpoint()
+    repo.close()
+
+    # S3DatabaseSync._get_database_stats opens its own connection per call, as it does before an upload
+    results.append(_summarize(
+        "_get_database_stats (total)",
+        _timed(S3DatabaseSync._get_database_stats, [(db_path,)] * stats_runs),
+    ))
+    conn = sqlite3.connect(db_path)
+    try:
+        for name, query in STATS_QUERIES.items():
+            results.append(_summarize(
+                f"  stats: {name}",
+                _timed(lambda q: conn.execute(q).fetchone(), [(query,)] * stats_runs),
+            ))
+    finally:
+        conn.close()
+
+    return {
+        "rows": rows,
+        "relationships": relationships,
+        "db_size_mb": size_before_mb,
+        "db_size_after_writes_mb": _db_size_mb(db_path),
+        "operations": results,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\n== {report['rows']:,} profiles / {report['relationships']:,} relationships, "
+        f"DB {report['db_size_mb']:.1f} MB ({report['db_size_after_writes_mb']:.1f} MB after writes) =="
+    )
+    print(f"{'operation':<34}{'ops':>8}{'ops/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op in report["operations"]:
+        print(
+            f"{op['operation']:<34}{op['ops']:>8,}{op['ops_per_s']:>12,.0f}"
+            f"{op['p50_ms']:>10.3f}{op['p99_ms']:>10.3f}{op['max_ms']:>10.3f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Scale benchmark for db/repository.py on synthetic processed_profiles/source_relationships data."
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated profile counts, k/m suffixes allowed (default: 10k,100k,1m)",
+    )
+    parser.add_argument(
+        "--include-10m",
+        action="store_true",
+        help="Also run 10M profiles (slow to generate, ~2 GB on disk)",
+    )
+    parser.add_argument("--ops", type=int, default=5_000, help="Operations per timed call (default: 5,000)")
+    parser.add_argument("--stats-runs", type=int, default=5, help="Runs of the stats queries (default: 5)")
+    parser.add_argument("--hit-ratio", type=float, default=0.8, help="Share of lookups that hit an existing handle (default: 0.8)")
+    parser.add_argument(
+        "--extra-source-ratio",
+        type=float,
+        default=0.2,
+        help="Share of profiles discovered by more than one source (default: 0.2)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        help="Keep generated DBs here (bench_<rows>.db) and reuse them on later runs; "
+             "note that each run adds the benchmark's own writes",
+    )
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    sizes = [_parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    if args.include_10m:
+        sizes += [size for size in LARGE_SIZES if size not in sizes]
+
+    tmp_dir = None
+    if args.data_dir:
+        data_dir = Path(args.data_dir).resolve()
+        data_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        tmp_dir = tempfile.TemporaryDirectory(prefix="bench_repository_scale_")
+        data_dir = Path(tmp_dir.name)
+
+    reports = []
+    try:
+        for rows in sizes:
+            report = bench_size(
+                str(data_dir / f"bench_{rows}.db"),
+                rows,
+                args.ops,
+                args.stats_runs,
+                args.hit_ratio,
+                args.extra_source_ratio,
+            )
+            print_report(report)
+            reports.append(report)
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"ops": args.ops, "hit_ratio": args.hit_ratio, "results": reports}, f, indent=2)
+        print(f"\nWrote {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+# Allow running from repo root or the scripts/ directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from api.timeline_visitor import scan_timeline, timeline_decoder
+from api.twitter_parser import tweet_author_id
+from api.twitter_posts import _extract_user_id
+from utils.raw_archive import iter_records
+
+
+# Reference implementations the single-pass scan replaced; only the parity checks and timings use them
+
+def legacy_tweet_records(data):
+    """
+    The original text extractor (twitter_parser.extract_tweets_from_response), keyed by the enclosing
+    tweet's id / created_at / author id: note tweet text preferred over full_text, a dict that yielded
+    a text is not searched further
+    """
+    results = []
+
+    def walk(node, tweet_id=None, created_at=None, author_id=None):
+        if not node:
+            return
+        if isinstance(node, list):
+            for item in node:
+                walk(item, tweet_id, created_at, author_id)
+        elif isinstance(node, dict):
+            legacy = node.get('legacy')
+            if node.get('rest_id') and isinstance(legacy, dict):
+                tweet_id = str(node['rest_id'])
+                created_at = legacy.get('created_at')
+                author_id = tweet_author_id(node, legacy)
+            note_tweet = node.get('note_tweet')
+            if isinstance(note_tweet, dict) and isinstance(note_tweet.get('note_tweet_results'), dict):
+                note_result = note_tweet['note_tweet_results'].get('result')
+                if note_result and isinstance(note_result, dict) and note_result.get('text'):
+                    results.append({"tweet_id": tweet_id, "text": note_result['text'], "created_at": created_at, "author_id": author_id})
+                    return
+            if isinstance(node.get('full_text'), str) and node['full_text'].strip() != '':
+                results.append({
+                    "tweet_id": tweet_id or node.get('id_str'),
+                    "text": node['full_text'],
+                    "created_at": created_at or node.get('created_at'),
+                    "author_id": author_id or (str(node['user_id_str']) if node.get('user_id_str') else None),
+                })
+                return
+            for value in node.values():
+                walk(value, tweet_id, created_at, author_id)
+
+    walk(data)
+    return results
+
+
+def legacy_bottom_cursor(payload):
+    """The original main.find_bottom_cursor: first TimelineTimelineCursor with cursor_type Bottom"""
+    if isinstance(payload, dict):
+        if payload.get('__typename') == 'TimelineTimelineCursor' and payload.get('cursor_type') == 'Bottom':
+            return payload.get('value')
+        for value in payload.values():
+            cursor = legacy_bottom_cursor(value)
+            if cursor:
+                return cursor
+    elif isinstance(payload, list):
+        for item in payload:
+            cursor = legacy_bottom_cursor(item)
+            if cursor:
+                return cursor
+    return None
+
+
+def legacy_next_cursor(payload):
+    """The original twitter_posts._extract_next_cursor: first Bottom cursor, else any typed or *cursor*-named value"""
+    cursors = {"bottom": [], "any": []}
+
+    def walk(node):
+        if isinstance(node, dict):
+            cursor_type = node.get('cursorType', node.get('cursor_type'))
+            value = node.get('value')
+            if cursor_type is not None and isinstance(value, (str, int)):
+                cursor_type = str(cursor_type).lower()
+                if cursor_type == 'bottom':
+                    cursors['bottom'].append(str(value))
+                elif cursor_type:
+                    cursors['any'].append(str(value))
+            for key, val in node.items():
+                key_lower = key.lower()
+                if key_lower not in ('cursortype', 'cursor_type') and 'cursor' in key_lower and isinstance(val, (str, int)):
+                    cursors['any'].append(str(val))
+                if isinstance(val, (dict, list)):
+                    walk(val)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(payload)
+    if cursors['bottom']:
+        return cursors['bottom'][0]
+    if cursors['any']:
+        return cursors['any'][0]
+    return None
+
+
+def legacy_iter_tweets(payload):
+    """The original twitter_posts._iter_tweets: every __typename Tweet object with legacy"""
+    tweets = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get('__typename') == 'Tweet' and 'legacy' in node:
+                tweets.append(node)
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(payload)
+    return tweets
+
+
+def legacy_conversation_ids(payload):
+    """The original twitter_posts._collect_conversation_ids: conversation_metadata.all_tweet_ids"""
+    ids = set()
+
+    def walk(node):
+        if isinstance(node, dict):
+            convo_meta = node.get('conversation_metadata')
+            if isinstance(convo_meta, dict):
+                ids.update(str(tid) for tid in convo_meta.get('all_tweet_ids', []) if tid)
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(payload)
+    return ids
+
+
+def legacy_collect_tweet_ids(payload):
+    """The original twitter_posts._collect_tweet_ids: a new list per level, extended into the parent"""
+    ids = []
+    if isinstance(payload, dict):
+        tweet_result = payload.get('tweet_results')
+        if isinstance(tweet_result, dict):
+            rid = _extract_user_id(tweet_result)
+            if rid:
+                ids.append(rid)
+        if payload.get('__typename') == 'Tweet':
+            rid = _extract_user_id(payload)
+            if rid:
+                ids.append(rid)
+        for val in payload.values():
+            ids.extend(legacy_collect_tweet_ids(val))
+    elif isinstance(payload, list):
+        for item in payload:
+            ids.extend(legacy_collect_tweet_ids(item))
+    return ids
+
+
+def legacy_page_signature(data):
+    """The original twitter_posts._compute_page_signature (collects the ids again)"""
+    tweet_ids = sorted(set(legacy_collect_tweet_ids(data)))
+    basis = {"tweets": tweet_ids} if tweet_ids else data
+    serialized = json.dumps(basis, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def _user_result(rng, user_id):
+    return {
+        "__typename": "User",
+        "rest_id": str(user_id),
+        "core": {"created_at": "Mon Jan 01 00:00:00 +0000 2018", "name": f"User {user_id}", "screen_name": f"user{user_id}"},
+        "legacy": {
+            "description": "Building onchain infra. Opinions my own. " * rng.randint(1, 3),
+            "entities": {"description": {"urls": []}, "url": {"urls": [{"display_url": "example.com", "expanded_url": "https://example.com", "url": "https://t.co/x", "indices": [0, 23]}]}},
+            "followers_count": rng.randint(10, 50_000),
+            "friends_count": rng.randint(10, 5_000),
+            "profile_image_url_https": "https://pbs.twimg.com/profile_images/1/x_normal.jpg",
+            "pinned_tweet_ids_str": [],
+            "withheld_in_countries": [],
+        },
+        "relationship_counts": {"followers": rng.randint(10, 50_000), "following": rng.randint(10, 5_000)},
+        "verification": {"is_blue_verified": rng.random() < 0.3},
+        "affiliates_highlighted_label": {},
+        "professional": {"category": [{"id": 713, "name": "Science & Technology"}]},
+    }
+
+
+def _tweet_result(rng, tweet_id, user_id, depth=0):
+    text = " ".join(rng.choice(["gm", "shipping", "onchain", "launch", "thread", "1/", "builders", "testnet", "airdrop"]) for _ in range(rng.randint(8, 40)))
+    legacy = {
+        "bookmark_count": rng.randint(0, 50),
+        "conversation_id_str": str(tweet_id),
+        "created_at": "Tue Mar 05 17:21:10 +0000 2024",
+        "entities": {
+            "hashtags": [{"indices": [0, 5], "text": "web3"}],
+            "symbols": [],
+            "urls": [{"display_url": "example.com/post", "expanded_url": "https://example.com/post", "url": "https://t.co/y", "indices": [10, 33]}],
+            "user_mentions": [{"id_str": str(user_id + 1), "name": "Friend", "screen_name": "friend", "indices": [40, 47]}],
+        },
+        "favorite_count": rng.randint(0, 500),
+        "full_text": text,
+        "id_str": str(tweet_id),
+        "is_quote_status": False,
+        "lang": "en",
+        "quote_count": rng.randint(0, 10),
+        "reply_count": rng.randint(0, 20),
+        "retweet_count": rng.randint(0, 100),
+        "user_id_str": str(user_id),
+    }
+    result = {
+        "__typename": "Tweet",
+        "rest_id": str(tweet_id),
+        "core": {"user_results": {"result": _user_result(rng, user_id)}},
+        "edit_control": {"edit_tweet_ids": [str(tweet_id)], "editable_until_msecs": "1709661670000", "is_edit_eligible": True, "edits_remaining": "5"},
+        "is_translatable": False,
+        "views": {"count": str(rng.randint(100, 100_000)), "state": "EnabledWithCount"},
+        "source": "<a href=\"https://mobile.twitter.com\" rel=\"nofollow\">Twitter Web App</a>",
+        "legacy": legacy,
+    }
+    if rng.random() < 0.15:
+        result["note_tweet"] = {"is_expandable": True, "note_tweet_results": {"result": {"id": "x", "text": text * 4, "entity_set": {"hashtags": [], "urls": [], "user_mentions": []}}}}
+    if depth == 0 and rng.random() < 0.2:
+        quoted_id = tweet_id - rng.randint(1000, 100_000)
+        legacy["is_quote_status"] = True
+        legacy["quoted_status_id_str"] = str(quoted_id)
+        result["quoted_status_result"] = {"result": _tweet_result(rng, quoted_id, user_id + 7, depth=1)}
+    return result
+
+
+def _tweet_entry(rng, tweet_id, user_id):
+    return {
+        "entryId": f"tweet-{tweet_id}",
+        "sortIndex": str(tweet_id),
+        "content": {
+            "entryType": "TimelineTimelineItem",
+            "__typename": "TimelineTimelineItem",
+            "itemContent": {
+                "itemType": "TimelineTweet",
+                "__typename": "TimelineTweet",
+                "tweet_results": {"result": _tweet_result(rng, tweet_id, user_id)},
+                "tweetDisplayType": "Tweet",
+            },
+        },
+    }
+
+
+def synthetic_timeline(rng, user_id, tweets=20):
+    """A UserTweets-shaped page: pinned tweet, tweets, a reply thread module, Top/Bottom cursors"""
+    tweet_id = rng.randint(1_700_000_000_000_000_000, 1_800_000_000_000_000_000)
+    entries = []
+    for _ in range(tweets):
+        tweet_id -= rng.randint(10_000, 10_000_000)
+        entries.append(_tweet_entry(rng, tweet_id, user_id))
+    thread_ids = [str(tweet_id - i) for i in range(1, 4)]
+    entries.append({
+        "entryId": f"profile-conversation-{tweet_id}",
+        "content": {
+            "entryType": "TimelineTimelineModule",
+            "__typename": "TimelineTimelineModule",
+            "items": [
+                {"entryId": f"profile-conversation-{tweet_id}-tweet-{tid}", "item": {"itemContent": {"tweet_results": {"result": _tweet_result(rng, int(tid), user_id)}}}}
+                for tid in thread_ids
+            ],
+            "metadata": {"conversationMetadata": {"allTweetIds": thread_ids}},
+            "conversation_metadata": {"all_tweet_ids": thread_ids, "enable_deduplication": True},
+        },
+    })
+    entries.append({"entryId": "cursor-top", "content": {"__typename": "TimelineTimelineCursor", "cursor_type": "Top", "value": "DAABCgABTOP"}})
+    entries.append({"entryId": "cursor-bottom", "content": {"__typename": "TimelineTimelineCursor", "cursor_type": "Bottom", "value": "DAABCgABBOTTOM"}})
+    return {
+        "data": {"user_result": {"result": {"timeline_response": {"timeline": {"instructions": [
+            {"__typename": "TimelineClearCache"},
+            {"__typename": "TimelinePinEntry", "entry": _tweet_entry(rng, tweet_id - 50_000_000, user_id)},
+            {"__typename": "TimelineAddEntries", "entries": entries},
+        ]}}}}}
+    }
+
+
+def load_payloads(args):
+    payloads = []
+    if args.raw_dir:
+        payloads.extend(record["payload"] for record in iter_records(args.raw_dir, args.run) if record.get("payload"))
+    for pattern in args.payload_files or []:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, encoding="utf-8") as f:
+                payloads.append(json.load(f))
+    if not payloads:
+        rng = random.Random(args.seed)
+        payloads = [synthetic_timeline(rng, 1_000 + i, tweets=args.tweets_per_page) for i in range(args.synthetic)]
+    return payloads
+
+
+def _time(fn, payloads, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for payload in payloads:
+            fn(payload)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# main.collect_tweets_for_user: tweet texts + Bottom cursor of each page
+def legacy_collect(payload):
+    return legacy_tweet_records(payload), legacy_bottom_cursor(payload)
+
+
+def single_pass_collect(payload, direct=True):
+    scan = scan_timeline(payload, bottom_cursor=True, direct=direct)
+    return scan.tweet_records, scan.bottom_cursor
+
+
+def single_pass_collect_target(payload, direct=True, target=5):
+    scan = scan_timeline(payload, bottom_cursor=True, max_tweets=target, direct=direct)
+    return scan.tweet_records, scan.bottom_cursor
+
+
+# api/twitter_posts: page bookkeeping + hydration of every page
+def legacy_posts(payload):
+    tweet_ids = sorted(set(legacy_collect_tweet_ids(payload)))
+    return tweet_ids, legacy_next_cursor(payload), legacy_page_signature(payload), legacy_iter_tweets(payload), legacy_conversation_ids(payload)
+
+
+def single_pass_posts(payload, direct=True):
+    scan = scan_timeline(
+        payload, texts=False, next_cursor=True, tweet_ids=True, tweets=True, conversation_ids=True, direct=direct
+    )
+    tweet_ids = sorted(set(scan.tweet_ids))
+    return tweet_ids, scan.next_cursor, scan.page_signature(tweet_ids), scan.tweets, scan.conversation_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="CPU time of the legacy multi-walk timeline helpers vs the single-pass visitor scan "
+                    "(generic walk and direct-path decoding)."
+    )
+    parser.add_argument("--raw-dir", help="Use payloads recorded in a raw response archive (e.g. raw_api_responses)")
+    parser.add_argument("--run", help="Archive run id (default: newest)")
+    parser.add_argument("--payload-files", nargs="*", help="Glob(s) of JSON payload files to use")
+    parser.add_argument("--synthetic", type=int, default=200, help="Synthetic pages when no recorded payloads are given (default: 200)")
+    parser.add_argument("--tweets-per-page", type=int, default=20, help="Tweets per synthetic page (default: 20)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5, help="Best of N runs (default: 5)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args)
+
+    # Both single-pass variants must return exactly what the legacy helpers return
+    timeline_decoder.reset()
+    for payload in payloads:
+        for direct in (False, True):
+            assert single_pass_collect(payload, direct) == legacy_collect(payload)
+            assert single_pass_posts(payload, direct) == legacy_posts(payload)
+    decoder_stats = timeline_decoder.stats()
+
+    pairs = [
+        ("collect: texts + bottom cursor", legacy_collect, single_pass_collect),
+        ("collect: texts + cursor, stop at 5 tweets", legacy_collect, single_pass_collect_target),
+        ("twitter_posts: ids, cursor, signature, tweets, conversations", legacy_posts, single_pass_posts),
+    ]
+    results = []
+    for name, legacy_fn, single_fn in pairs:
+        legacy_s = _time(legacy_fn, payloads, args.repeat)
+        generic_s = _time(lambda payload: single_fn(payload, False), payloads, args.repeat)
+        direct_s = _time(single_fn, payloads, args.repeat)
+        results.append({
+            "benchmark": name,
+            "payloads": len(payloads),
+            "legacy_ms_per_page": legacy_s / len(payloads) * 1000,
+            "single_pass_ms_per_page": generic_s / len(payloads) * 1000,
+            "direct_path_ms_per_page": direct_s / len(payloads) * 1000,
+            "cpu_reduction_pct": (1 - direct_s / legacy_s) * 100 if legacy_s else 0.0,
+        })
+
+    if args.json:
+        print(json.dumps({"results": results, "decoder": decoder_stats}, indent=2))
+        return
+    print(f"{len(payloads)} payloads, best of {args.repeat}")
+    for r in results:
+        print(
+            f"{r['benchmark']:<62} legacy {r['legacy_ms_per_page']:7.3f}  "
+            f"single pass {r['single_pass_ms_per_page']:7.3f}  direct path {r['direct_path_ms_per_page']:7.3f} ms/page  "
+            f"(-{r['cpu_reduction_pct']:.0f}% CPU)"
+        )
+    print(
+        f"Direct-path decoding: {decoder_stats['direct_pages']}/{decoder_stats['pages']} pages without fallback, "
+        f"fallbacks {decoder_stats['fallbacks'] or 'none'}"
+    )
+
+
+if __name__ == "__main__":
+    main()
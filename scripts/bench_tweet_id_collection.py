@@ -0,0 +1,143 @@
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+# Allow running from repo root or the scripts/ directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from api.timeline_visitor import scan_timeline
+from api.twitter_posts import ANALYSIS_DIR
+from bench_timeline_parsing import legacy_collect_tweet_ids, legacy_page_signature, synthetic_timeline
+
+
+def legacy_page_bookkeeping(data):
+    # fetch_all_tweets_and_replies used to collect the ids, then collect them again for the signature
+    tweet_ids = sorted(set(legacy_collect_tweet_ids(data)))
+    return tweet_ids, legacy_page_signature(data)
+
+
+def page_bookkeeping(data):
+    # What fetch_all_tweets_and_replies does now: one scan, the signature reuses its ids
+    scan = scan_timeline(data, texts=False, tweet_ids=True)
+    tweet_ids = sorted(set(scan.tweet_ids))
+    return tweet_ids, scan.page_signature(tweet_ids)
+
+
+def scan_tweet_ids(payload):
+    # Generic walk: a nested raw file or a bare quote chain has no timeline instructions to decode
+    return scan_timeline(payload, texts=False, tweet_ids=True, direct=False).tweet_ids
+
+
+def load_raw_files(args):
+    """Multi-page raw files written by api/twitter_posts.py ({..., "tweetsAndReplies": {"pages": [...]}})"""
+    raw_files = []
+    for path in sorted(glob.glob(args.raw_files)):
+        if path.endswith(('_clean.json', '_clean_slim.json')):
+            continue
+        with open(path, encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('tweetsAndReplies', {}).get('pages'):
+            raw_files.append(payload)
+    if not raw_files:
+        rng = random.Random(args.seed)
+        for index in range(args.synthetic_files):
+            pages = [{"pageNumber": n + 1, "data": synthetic_timeline(rng, 1_000 + index)} for n in range(args.pages)]
+            raw_files.append({"username": f"user{index}", "tweetsAndReplies": {"pageCount": len(pages), "pages": pages}})
+    return raw_files
+
+
+def nest(payload, depth):
+    """Wraps payload `depth` levels deep (dict / list alternating), as deeply nested responses are"""
+    for level in range(depth):
+        payload = {"wrapper": payload} if level % 2 else [payload]
+    return payload
+
+
+def quote_chain(length):
+    """A tweet quoting a tweet quoting ... `length` deep: ids at every level of a deep payload"""
+    tweet = {"__typename": "Tweet", "rest_id": "1", "legacy": {"full_text": "root"}}
+    for tweet_id in range(2, length + 1):
+        tweet = {
+            "__typename": "Tweet",
+            "rest_id": str(tweet_id),
+            "legacy": {"full_text": f"quote {tweet_id}"},
+            "quoted_status_result": {"result": tweet},
+        }
+    return {"tweet_results": {"result": tweet}}
+
+
+def _time(fn, payloads, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for payload in payloads:
+            fn(payload)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Tweet-id collection + page signature: the original recursive list copying vs the "
+                    "single-pass scan fetch_all_tweets_and_replies uses."
+    )
+    parser.add_argument("--raw-files", default=os.path.join(ANALYSIS_DIR, "*.json"),
+                        help="Glob of raw twitter_posts files (default: twitter_post_analysis/*.json)")
+    parser.add_argument("--synthetic-files", type=int, default=5, help="Synthetic raw files when none are found (default: 5)")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per synthetic raw file (default: 20)")
+    parser.add_argument("--depths", default="0,50,200", help="Extra nesting levels to test (default: 0,50,200)")
+    parser.add_argument("--chain-length", type=int, default=300, help="Depth of the synthetic quote chain (default: 300)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5, help="Best of N runs (default: 5)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    raw_files = load_raw_files(args)
+    pages = [page.get('data', {}) for raw in raw_files for page in raw['tweetsAndReplies']['pages']]
+
+    for data in pages:
+        assert page_bookkeeping(data) == legacy_page_bookkeeping(data)
+
+    results = []
+    cases = [("per page: ids + signature", pages, legacy_page_bookkeeping, page_bookkeeping)]
+    for depth in (int(d) for d in args.depths.split(",") if d.strip()):
+        nested = [nest(raw, depth) for raw in raw_files]
+        for payload in nested:
+            assert scan_tweet_ids(payload) == legacy_collect_tweet_ids(payload)
+        cases.append((f"whole raw file, +{depth} levels: ids", nested, legacy_collect_tweet_ids, scan_tweet_ids))
+
+    chains = [quote_chain(args.chain_length) for _ in range(20)]
+    assert scan_tweet_ids(chains[0]) == legacy_collect_tweet_ids(chains[0])
+    cases.append((f"quote chain, {args.chain_length} deep: ids", chains, legacy_collect_tweet_ids, scan_tweet_ids))
+
+    for name, payloads, before_fn, after_fn in cases:
+        before_s = _time(before_fn, payloads, args.repeat)
+        after_s = _time(after_fn, payloads, args.repeat)
+        results.append({
+            "benchmark": name,
+            "payloads": len(payloads),
+            "recursive_ms": before_s * 1000,
+            "scan_ms": after_s * 1000,
+            "speedup": before_s / after_s if after_s else 0.0,
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{len(raw_files)} raw files, {len(pages)} pages, best of {args.repeat}")
+    for r in results:
+        print(
+            f"{r['benchmark']:<40} recursive {r['recursive_ms']:9.2f} ms  "
+            f"scan {r['scan_ms']:9.2f} ms  ({r['speedup']:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Allow running from repo root or the scripts/ directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from api.twitter_posts import (
+    _assemble_ai_ready_output,
+    _derive_missing_tweet_ids,
+    _load_raw_file,
+    _sanitize_tweet,
+)
+from api.timeline_visitor import scan_timeline
+from bench_timeline_parsing import synthetic_timeline
+
+
+# The previous dict pipeline: one nested dict per sanitized tweet, copied into minimal / by_id / children dicts
+
+def dict_sort_key(tweet):
+    tid = tweet.get('id')
+    if tid:
+        try:
+            return int(tid)
+        except (TypeError, ValueError):
+            pass
+    return 0
+
+
+def dict_minimal(sanitized):
+    return {
+        "id": sanitized.get("id"),
+        "createdAt": sanitized.get("createdAt"),
+        "text": sanitized.get("text"),
+        "conversationId": sanitized.get("conversationId"),
+        "inReplyToStatusId": sanitized.get("inReplyToStatusId"),
+        "inReplyToUserId": sanitized.get("inReplyToUserId"),
+        "quotedStatusId": sanitized.get("quotedStatusId"),
+        "isQuoteStatus": sanitized.get("isQuoteStatus"),
+        "author": {
+            "id": sanitized.get("author", {}).get("id"),
+            "screenName": sanitized.get("author", {}).get("screenName"),
+            "name": sanitized.get("author", {}).get("name"),
+        },
+        "engagement": sanitized.get("engagement"),
+        "urls": sanitized.get("urls"),
+    }
+
+
+def dict_threads(minimal_tweets):
+    by_id = {t["id"]: dict(t) for t in minimal_tweets if t.get("id")}
+    children = {}
+    for t in minimal_tweets:
+        pid = t.get("inReplyToStatusId")
+        if pid and t.get("id") and pid in by_id:
+            children.setdefault(pid, []).append(dict(t))
+
+    def attach_replies(parent_id):
+        replies = children.get(parent_id, [])
+        replies.sort(key=dict_sort_key)
+        for r in replies:
+            r["replies"] = attach_replies(r.get("id")) if r.get("id") else []
+        return replies
+
+    roots = []
+    orphan_replies = []
+    for tid, tweet in by_id.items():
+        if tweet.get("inReplyToStatusId") and tweet.get("inReplyToStatusId") in by_id:
+            continue
+        if tweet.get("inReplyToStatusId"):
+            tweet["orphanReply"] = True
+            orphan_replies.append(tid)
+        tweet["replies"] = attach_replies(tid)
+        roots.append(tweet)
+    roots.sort(key=dict_sort_key, reverse=True)
+    return roots, orphan_replies
+
+
+def dict_pipeline(pages):
+    hydrated = {}
+    for page in pages:
+        for tweet in scan_timeline(page.get('data', {}), texts=False, tweets=True).tweets:
+            sanitized = _sanitize_tweet(tweet).to_dict()
+            if sanitized.get('id'):
+                hydrated[sanitized['id']] = sanitized
+    tweets = sorted(hydrated.values(), key=dict_sort_key, reverse=True)
+    minimal_tweets = [dict_minimal(t) for t in tweets]
+    threads, orphan_replies = dict_threads(minimal_tweets)
+    # The caller keeps the hydrated tweets next to the clean payload until it is saved
+    return hydrated, {"tweetsFlat": minimal_tweets, "threads": threads, "orphanReplies": orphan_replies}
+
+
+def record_pipeline(pages):
+    hydrated, _ = _derive_missing_tweet_ids("0", pages)
+    payload = _assemble_ai_ready_output("user", "0", None, None, pages, hydrated, {})
+    return hydrated, {"tweetsFlat": payload["tweetsFlat"], "threads": payload["threads"],
+                      "orphanReplies": payload["summary"]["orphanReplies"]}
+
+
+def hydrated_dicts(pages):
+    return {t['id']: t for t in (
+        _sanitize_tweet(tweet).to_dict()
+        for page in pages for tweet in scan_timeline(page.get('data', {}), texts=False, tweets=True).tweets
+    ) if t['id']}
+
+
+def hydrated_records(pages):
+    return _derive_missing_tweet_ids("0", pages)[0]
+
+
+def measure(fn, pages):
+    """Peak traced memory (MB) and seconds of fn(pages); the result is kept alive until measured"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(pages)
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"retained_mb": current / 1e6, "peak_mb": peak / 1e6, "seconds": seconds}
+
+
+def synthetic_pages(args):
+    """A large account: pages of tweets where a share of them reply to earlier tweets (threads)"""
+    rng = random.Random(args.seed)
+    pages = []
+    known_ids = []
+    for page_number in range(args.pages):
+        data = synthetic_timeline(rng, 1_000, tweets=args.tweets_per_page)
+        for tweet in scan_timeline(data, texts=False, tweets=True).tweets:
+            if known_ids and rng.random() < 0.4:
+                tweet["legacy"]["in_reply_to_status_id_str"] = rng.choice(known_ids)
+            known_ids.append(tweet["rest_id"])
+        pages.append({"pageNumber": page_number + 1, "data": data})
+    return pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Peak memory of hydrated tweets + clean output: nested dicts vs __slots__ TweetRecords."
+    )
+    parser.add_argument("--raw-file", help="Raw twitter_posts file of a large account (default: synthetic)")
+    parser.add_argument("--pages", type=int, default=150, help="Synthetic pages (default: 150)")
+    parser.add_argument("--tweets-per-page", type=int, default=20, help="Tweets per synthetic page (default: 20)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    pages = _load_raw_file(args.raw_file)[3] if args.raw_file else synthetic_pages(args)
+
+    # Same clean output either way
+    assert json.dumps(record_pipeline(pages)[1]) == json.dumps(dict_pipeline(pages)[1])
+
+    results = {
+        "pages": len(pages),
+        "tweets": len(hydrated_records(pages)),
+        "hydrated_dicts": measure(hydrated_dicts, pages),
+        "hydrated_records": measure(hydrated_records, pages),
+        "clean_output_dicts": measure(dict_pipeline, pages),
+        "clean_output_records": measure(record_pipeline, pages),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['pages']} pages, {results['tweets']} hydrated tweets")
+    for name in ("hydrated_dicts", "hydrated_records", "clean_output_dicts", "clean_output_records"):
+        r = results[name]
+        print(f"{name:<22} retained {r['retained_mb']:7.1f} MB  peak {r['peak_mb']:7.1f} MB  {r['seconds']:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
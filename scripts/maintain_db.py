@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Allow running from repo root or the scripts/ directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from config import RELATIONSHIP_ARCHIVE_DAYS
+from db.maintenance import iter_archived_relationships
+from db.repository import Repository
+
+
+def export_archive(repo: Repository, output_path: Path) -> int:
+    """Writes every archived relationship as JSON lines (e.g. to inspect or restore them)"""
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as f:
+        for relationship in iter_archived_relationships(repo._get_connection()):
+            f.write(json.dumps(relationship) + "\n")
+            count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="SQLite maintenance: archive old source relationships, incremental VACUUM and ANALYZE."
+    )
+    parser.add_argument(
+        "--db",
+        default=str(Path("db") / "twitter_profiles.db"),
+        help="Path to SQLite DB (default: db/twitter_profiles.db)",
+    )
+    parser.add_argument(
+        "--archive-days",
+        type=int,
+        default=RELATIONSHIP_ARCHIVE_DAYS,
+        help=f"Archive source relationships discovered more than this many days ago, 0 to keep all "
+             f"(default: {RELATIONSHIP_ARCHIVE_DAYS})",
+    )
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip the incremental vacuum")
+    parser.add_argument("--no-analyze", action="store_true", help="Skip ANALYZE")
+    parser.add_argument(
+        "--export-archive",
+        help="Only write all archived relationships to this JSONL file and exit",
+    )
+    args = parser.parse_args()
+
+    db_path = Path(args.db).resolve()
+    if not db_path.exists():
+        raise FileNotFoundError(f"Database not found: {db_path}")
+
+    # Repository joins DB_DIR with db_name; an absolute path wins in os.path.join
+    repo = Repository(db_name=str(db_path))
+    try:
+        if args.export_archive:
+            count = export_archive(repo, Path(args.export_archive))
+            print(f"Exported {count:,} archived relationships to {args.export_archive}")
+            return
+
+        report = repo.run_maintenance(
+            archive_days=args.archive_days,
+            vacuum=not args.no_vacuum,
+            analyze=not args.no_analyze,
+        )
+        if report.get("error"):
+            raise SystemExit(f"Maintenance failed: {report['error']}")
+        print(
+            f"Archived relationships: {report['archived_relationships']:,} ({report['archive_batches']} batches)\n"
+            f"Converted to incremental vacuum: {report['converted_to_incremental_vacuum']}\n"
+            f"Freed pages: {report['freed_pages']:,}\n"
+            f"Size: {report['size_before_mb']:.1f} MB -> {report['size_after_mb']:.1f} MB "
+            f"({report['seconds']:.1f}s)"
+        )
+    finally:
+        repo.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+# Allow running from repo root or the scripts/ directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from config import DEDUP_SEEN_WITHIN_DAYS
+from db.migrations import migrate_epoch_timestamps, needs_epoch_migration
+
+
+def migrate(db_path: Path, seen_within_days: int, recompute: bool) -> None:
+    if not db_path.exists():
+        raise FileNotFoundError(f"Database not found: {db_path}")
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        if recompute:
+            # Clearing the epoch columns makes the backfill recompute every row (e.g. after changing the window)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(processed_profiles)")}
+            if "last_updated_epoch" in columns:
+                conn.execute("UPDATE processed_profiles SET last_updated_epoch = NULL")
+                conn.commit()
+        elif not needs_epoch_migration(conn):
+            print(f"Already migrated: {db_path}")
+            return
+
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM processed_profiles")
+        profile_count = cur.fetchone()[0]
+
+        print(f"Adding epoch timestamps and eligible_after (window: {seen_within_days} days): {db_path}")
+        backfilled = migrate_epoch_timestamps(conn, seen_within_days=seen_within_days)
+
+        cur.execute(
+            "SELECT COUNT(*) FROM processed_profiles WHERE last_updated_epoch = 0"
+        )
+        unparseable = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM processed_profiles WHERE eligible_after IS NULL")
+        never_eligible = cur.fetchone()[0]
+
+        print(
+            "Migration complete. "
+            f"profiles: {profile_count}, backfilled: {backfilled}, "
+            f"unparseable last_updated_date: {unparseable}, permanently skipped (Profile): {never_eligible}"
+        )
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Add integer epoch timestamps and the eligible_after column to processed_profiles."
+    )
+    parser.add_argument(
+        "--db",
+        default=str(Path("db") / "twitter_profiles.db"),
+        help="Path to SQLite DB (default: db/twitter_profiles.db)",
+    )
+    parser.add_argument(
+        "--seen-within-days",
+        type=int,
+        default=DEDUP_SEEN_WITHIN_DAYS,
+        help=f"Recency window used for eligible_after (default: {DEDUP_SEEN_WITHIN_DAYS})",
+    )
+    parser.add_argument(
+        "--recompute",
+        action="store_true",
+        help="Recompute every row, not only rows missing epoch values",
+    )
+    args = parser.parse_args()
+    migrate(Path(args.db), args.seen_within_days, args.recompute)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import json
+import os
+import sys
+
+# Allow running from repo root or the scripts/ directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from config import RAW_RESPONSES_DIR
+from utils.raw_archive import iter_records, read_index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Inspect the compressed raw API response archive (raw_api_responses/raw_<run>_*.jsonl.gz)."
+    )
+    parser.add_argument("--dir", default=RAW_RESPONSES_DIR, help=f"Archive directory (default: {RAW_RESPONSES_DIR})")
+    parser.add_argument("--run", help="Run id (default: newest run in the directory)")
+    parser.add_argument("--handle", help="Only responses for this handle")
+    parser.add_argument("--endpoint", help="Only responses from this endpoint (e.g. UserTweets)")
+    parser.add_argument("--errors", action="store_true", help="Only responses flagged as errors / empty")
+    parser.add_argument("--list", action="store_true", help="List index entries instead of printing payloads")
+    parser.add_argument("--out", help="Write matching responses (pretty-printed JSON array) to this file")
+    args = parser.parse_args()
+
+    if args.list:
+        for entry in read_index(args.dir, args.run):
+            if args.handle and (entry.get("handle") or "").lower() != args.handle.lower():
+                continue
+            if args.endpoint and entry.get("endpoint") != args.endpoint:
+                continue
+            if args.errors and not entry.get("error"):
+                continue
+            print(
+                f"{entry['timestamp']}  @{entry.get('handle')}  {entry['endpoint']}"
+                f"{' (cursor)' if entry.get('cursor') else ''}{'  ERROR' if entry.get('error') else ''}  "
+                f"{entry['raw_bytes']:,} B -> {entry['length']:,} B  [{entry['segment']}@{entry['offset']}]"
+            )
+        return
+
+    records = list(iter_records(args.dir, args.run, handle=args.handle, endpoint=args.endpoint, errors_only=args.errors))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2)
+        print(f"Wrote {len(records)} responses to {args.out}")
+    else:
+        print(json.dumps(records, indent=2))
+
+
+if __name__ == "__main__":
+    main()
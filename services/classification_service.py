@@ -0,0 +1,69 @@
+import hashlib
+import json
+from db.async_repository import async_repository
+from utils.logger import logger
+from config import CLASSIFICATION_CACHE_ENABLED
+
+# Profile fields that describe what an account is. Follower/following counts change on every run
+# and would make the hash useless, so they are left out.
+CONTENT_PROFILE_FIELDS = ("screen_name", "name", "description", "verified")
+
+
+class ClassificationService:
+    """
+    Stores the parsed AI classification per handle so a re-check of an unchanged profile
+    (same bio, same tweets, same model and prompt) reuses the previous answer instead of calling OpenAI.
+    """
+
+    @staticmethod
+    def _sha256(value):
+        return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def content_hash(simplified_data):
+        """
+        Hash of the classification-relevant input: profile text fields + tweet texts (in order)
+        """
+        profile = simplified_data.get("profile") or {}
+        content = {
+            "profile": {field: profile.get(field) for field in CONTENT_PROFILE_FIELDS},
+            "tweets": list(simplified_data.get("tweets") or []),
+        }
+        return ClassificationService._sha256(json.dumps(content, sort_keys=True, ensure_ascii=False))
+
+    @staticmethod
+    def prompt_hash(prompt):
+        return ClassificationService._sha256(prompt or "")
+
+    @staticmethod
+    async def get_reusable(twitter_handle, content_hash, model, prompt_hash):
+        """
+        Returns the stored result JSON if it was produced from identical content, model and prompt, else None.
+        """
+        if not CLASSIFICATION_CACHE_ENABLED or not twitter_handle:
+            return None
+        stored = await async_repository.get_classification(twitter_handle)
+        if not stored:
+            return None
+        if (
+            stored["content_hash"] != content_hash
+            or stored["model"] != model
+            or stored["prompt_hash"] != prompt_hash
+        ):
+            logger.debug(f"Stored classification for @{twitter_handle} is outdated (content, model or prompt changed)")
+            return None
+        await async_repository.mark_classification_reused(twitter_handle)
+        return stored["result_json"]
+
+    @staticmethod
+    async def store(twitter_handle, content_hash, model, prompt_hash, parsed_result, twitter_user_id=None):
+        if not CLASSIFICATION_CACHE_ENABLED or not twitter_handle or parsed_result is None:
+            return
+        await async_repository.save_classification(
+            twitter_handle,
+            content_hash,
+            model,
+            prompt_hash,
+            json.dumps(parsed_result, ensure_ascii=False),
+            twitter_user_id,
+        )
@@ -1,6 +1,10 @@
-from db.repository import repository
+from db.repository import Repository
+from db.async_repository import async_repository
+from db.dedup_index import dedup_index
 from utils.logger import logger
-from datetime import datetime, timedelta
+from datetime import datetime
+import time
+from config import DEDUP_SEEN_WITHIN_DAYS
 
 class DeduplicationService:
     @staticmethod
@@ -22,122 +26,264 @@ class DeduplicationService:
             return None
 
     @staticmethod
-    async def process_profile(twitter_handle, source_username, profile_created_at=None):
+    def _account_age_days(profile_created_at):
+        created_dt = DeduplicationService._parse_twitter_created_at(profile_created_at)
+        if not created_dt:
+            return None
+        now_dt = datetime.now(created_dt.tzinfo) if created_dt.tzinfo else datetime.now()
+        return (now_dt - created_dt).days
+
+    @staticmethod
+    def days_since_last_update(profile, twitter_handle=None):
+        """
+        Whole days since the profile's last update: from last_updated_epoch when present,
+        otherwise parsed from the legacy ISO last_updated_date. None if unknown.
+        """
+        last_updated_epoch = profile.get("last_updated_epoch")
+        # 0 is the migration's marker for an unparseable date; fall through to the ISO value
+        if last_updated_epoch:
+            return int((time.time() - last_updated_epoch) // 86400)
+
+        last_updated_raw = profile.get("last_updated_date")
+        if not last_updated_raw:
+            return None
+        try:
+            normalized_last_updated = last_updated_raw
+            if isinstance(normalized_last_updated, str) and normalized_last_updated.endswith("Z"):
+                normalized_last_updated = normalized_last_updated[:-1] + "+00:00"
+
+            last_updated_dt = datetime.fromisoformat(normalized_last_updated)
+            now_dt = datetime.now(last_updated_dt.tzinfo) if last_updated_dt.tzinfo else datetime.now()
+            return (now_dt - last_updated_dt).days
+        except ValueError:
+            logger.warn(f"Could not parse last_updated_date for @{twitter_handle}: {last_updated_raw}")
+            return None
+
+    @staticmethod
+    def _decide(twitter_handle, existing_profile, sources, account_age_days):
+        """
+        Dedup decision for a profile that already exists in the database.
+        Shared by process_profile and process_profiles so both return identical results.
+        """
+        category = existing_profile.get("category")
+        if category and category.lower() == "profile":
+            return {
+                "isNew": False,
+                "profile": existing_profile,
+                "sources": sources,
+                "daysSinceLastSeen": 0,
+                "seenWithinDays": DEDUP_SEEN_WITHIN_DAYS,
+                "skipReason": "category_profile",
+                "accountAgeDays": account_age_days,
+            }
+
+        seen_within_days = DEDUP_SEEN_WITHIN_DAYS
+        min_account_age_days_for_recheck = 365
+        days_since_last_seen = None
+
+        if account_age_days is not None and account_age_days < min_account_age_days_for_recheck:
+            return {
+                "isNew": False,
+                "profile": existing_profile,
+                "sources": sources,
+                "daysSinceLastSeen": days_since_last_seen,
+                "seenWithinDays": seen_within_days,
+                "skipReason": "account_too_new_for_recheck",
+                "accountAgeDays": account_age_days,
+                "minAccountAgeDaysForRecheck": min_account_age_days_for_recheck,
+            }
+
+        days_since_last_seen = DeduplicationService.days_since_last_update(existing_profile, twitter_handle)
+        # Whole days < window is equivalent to the elapsed time being inside the window
+        seen_recently = days_since_last_seen is not None and days_since_last_seen < seen_within_days
+
+        # If we've seen it recently, skip (do not bump last_updated_date so it can age out).
+        if seen_recently:
+            return {
+                "isNew": False,
+                "profile": existing_profile,
+                "sources": sources,
+                "daysSinceLastSeen": days_since_last_seen,
+                "seenWithinDays": seen_within_days,
+                "skipReason": "seen_recently",
+                "accountAgeDays": account_age_days,
+                "minAccountAgeDaysForRecheck": min_account_age_days_for_recheck,
+            }
+
+        # Older than the recency window: allow it through for re-processing.
+        return {
+            "isNew": True,
+            "profile": existing_profile,
+            "sources": sources,
+            "daysSinceLastSeen": days_since_last_seen,
+            "seenWithinDays": seen_within_days,
+            "skipReason": "eligible_for_reprocess",
+            "accountAgeDays": account_age_days,
+            "minAccountAgeDaysForRecheck": min_account_age_days_for_recheck,
+        }
+
+    @staticmethod
+    async def process_profile(twitter_handle, source_username, profile_created_at=None, twitter_user_id=None):
         """
         Processes a profile discovery, handling both new and existing profiles.
         Matches JavaScript logic exactly - checks globally, not per source.
+        With twitter_user_id the lookup keys on the stable id first; a renamed account is moved to its
+        new handle and treated as the existing profile ("renamedFrom" holds the old handle).
         """
         if not twitter_handle:
             return {"isNew": True}
 
-        account_age_days = None
-        created_dt = DeduplicationService._parse_twitter_created_at(profile_created_at)
-        if created_dt:
-            now_dt = datetime.now(created_dt.tzinfo) if created_dt.tzinfo else datetime.now()
-            account_age_days = (now_dt - created_dt).days
+        account_age_days = DeduplicationService._account_age_days(profile_created_at)
+
+        if dedup_index.loaded:
+            # Answer from the in-memory index; only the relationship write touches SQLite, so "sources" is []
+            existing_profile = dedup_index.get(twitter_handle, twitter_user_id)
+            if existing_profile:
+                renamed_from = await DeduplicationService._apply_rename(existing_profile, twitter_handle, twitter_user_id)
+                await async_repository.add_source_relationship(twitter_handle, source_username)
+                return DeduplicationService._with_rename(
+                    DeduplicationService._decide(twitter_handle, existing_profile, [], account_age_days),
+                    renamed_from,
+                )
+            return {"isNew": True}
 
-        # Check if profile exists globally (like JavaScript)
-        existing_profile = repository.find_by_handle(twitter_handle)
+        # Check if profile exists globally (like JavaScript), by user id first so renames are recognised
+        existing_profile = await async_repository.find_profile(twitter_handle, twitter_user_id)
         
         if existing_profile:
-            category = existing_profile.get("category")
-            if category and category.lower() == "profile":
-                repository.add_source_relationship(twitter_handle, source_username)
-                sources = repository.get_sources_for_profile(twitter_handle)
-                return {
-                    "isNew": False,
-                    "profile": existing_profile,
-                    "sources": sources,
-                    "daysSinceLastSeen": 0,
-                    "seenWithinDays": 90,
-                    "skipReason": "category_profile",
-                    "accountAgeDays": account_age_days,
-                }
+            renamed_from = await DeduplicationService._apply_rename(existing_profile, twitter_handle, twitter_user_id)
 
             # Add new source relationship
-            repository.add_source_relationship(twitter_handle, source_username)
+            await async_repository.add_source_relationship(twitter_handle, source_username)
             
             # Get all sources that discovered this profile
-            sources = repository.get_sources_for_profile(twitter_handle)
-
-            seen_within_days = 90
-            min_account_age_days_for_recheck = 365
-            now = datetime.now()
-            days_since_last_seen = None
-            seen_recently = False
-
-            if account_age_days is not None and account_age_days < min_account_age_days_for_recheck:
-                return {
-                    "isNew": False,
-                    "profile": existing_profile,
-                    "sources": sources,
-                    "daysSinceLastSeen": days_since_last_seen,
-                    "seenWithinDays": seen_within_days,
-                    "skipReason": "account_too_new_for_recheck",
-                    "accountAgeDays": account_age_days,
-                    "minAccountAgeDaysForRecheck": min_account_age_days_for_recheck,
-                }
-
-            last_updated_raw = existing_profile.get("last_updated_date")
-            if last_updated_raw:
-                try:
-                    normalized_last_updated = last_updated_raw
-                    if isinstance(normalized_last_updated, str) and normalized_last_updated.endswith("Z"):
-                        normalized_last_updated = normalized_last_updated[:-1] + "+00:00"
-
-                    last_updated_dt = datetime.fromisoformat(normalized_last_updated)
-                    now_dt = datetime.now(last_updated_dt.tzinfo) if last_updated_dt.tzinfo else now
-                    delta = now_dt - last_updated_dt
-                    days_since_last_seen = delta.days
-                    seen_recently = delta < timedelta(days=seen_within_days)
-                except ValueError:
-                    logger.warn(f"Could not parse last_updated_date for @{twitter_handle}: {last_updated_raw}")
-
-            # If we've seen it recently, skip (do not bump last_updated_date so it can age out).
-            if seen_recently:
-                return {
-                    "isNew": False,
-                    "profile": existing_profile,
-                    "sources": sources,
-                    "daysSinceLastSeen": days_since_last_seen,
-                    "seenWithinDays": seen_within_days,
-                    "skipReason": "seen_recently",
-                    "accountAgeDays": account_age_days,
-                    "minAccountAgeDaysForRecheck": min_account_age_days_for_recheck,
-                }
-
-            # Older than the recency window: allow it through for re-processing.
-            return {
-                "isNew": True,
-                "profile": existing_profile,
-                "sources": sources,
-                "daysSinceLastSeen": days_since_last_seen,
-                "seenWithinDays": seen_within_days,
-                "skipReason": "eligible_for_reprocess",
-                "accountAgeDays": account_age_days,
-                "minAccountAgeDaysForRecheck": min_account_age_days_for_recheck,
-            }
+            sources = await async_repository.get_sources_for_profile(twitter_handle)
+
+            return DeduplicationService._with_rename(
+                DeduplicationService._decide(twitter_handle, existing_profile, sources, account_age_days),
+                renamed_from,
+            )
         
         return {
             "isNew": True
         }
 
+    @staticmethod
+    async def _apply_rename(existing_profile, twitter_handle, twitter_user_id):
+        """
+        If the profile was found by user id under another handle, moves it to the new handle (DB and index)
+        and returns the previous handle.
+        """
+        old_handle = existing_profile.get("twitter_handle")
+        if not twitter_user_id or not old_handle or old_handle.lower() == Repository._normalize_handle(twitter_handle):
+            return None
+        renamed_from = await async_repository.rename_profile(twitter_user_id, twitter_handle)
+        if renamed_from:
+            dedup_index.rename(twitter_user_id, twitter_handle)
+            existing_profile["twitter_handle"] = Repository._normalize_handle(twitter_handle)
+        return renamed_from
+
+    @staticmethod
+    def _with_rename(decision, renamed_from):
+        if renamed_from:
+            decision["renamedFrom"] = renamed_from
+        return decision
+
+    @staticmethod
+    async def process_profiles(candidates):
+        """
+        Batch version of process_profile for a whole set of candidates (one source or a whole run).
+        `candidates` is a list of (twitter_handle, source_username, profile_created_at[, twitter_user_id]) tuples.
+        Existence is resolved with one set-based lookup (by user id, then by handle), all source relationships
+        of existing profiles are written in one transaction and their sources are read back in one query.
+        Returns one decision per candidate, in input order, identical to calling process_profile for each
+        (except that "sources" already include every relationship written by the batch).
+        When the dedup index is loaded, existence comes from memory and "sources" is [] (not read back).
+        """
+        candidates = [tuple(candidate) + (None,) * (4 - len(candidate)) for candidate in candidates]
+
+        # Existing profile per candidate position
+        existing_profiles = {}
+        if dedup_index.loaded:
+            for position, (handle, _, _, user_id) in enumerate(candidates):
+                profile = dedup_index.get(handle, user_id)
+                if profile:
+                    existing_profiles[position] = profile
+        else:
+            user_ids = [user_id for handle, _, _, user_id in candidates if handle and user_id]
+            by_user_id = await async_repository.find_by_user_ids(user_ids) if user_ids else {}
+            for position, (handle, _, _, user_id) in enumerate(candidates):
+                if handle and user_id and str(user_id) in by_user_id:
+                    existing_profiles[position] = dict(by_user_id[str(user_id)])
+            remaining = [handle for position, (handle, _, _, _) in enumerate(candidates)
+                         if handle and position not in existing_profiles]
+            by_handle = await async_repository.find_by_handles(remaining) if remaining else {}
+            for position, (handle, _, _, _) in enumerate(candidates):
+                if handle and position not in existing_profiles:
+                    profile = by_handle.get(Repository._normalize_handle(handle))
+                    if profile:
+                        existing_profiles[position] = profile
+
+        renamed = {}
+        for position, profile in existing_profiles.items():
+            handle, _, _, user_id = candidates[position]
+            renamed_from = await DeduplicationService._apply_rename(profile, handle, user_id)
+            if renamed_from:
+                renamed[position] = renamed_from
+
+        relationships = [
+            (candidates[position][0], candidates[position][1])
+            for position in sorted(existing_profiles)
+        ]
+        sources_by_handle = {}
+        if relationships:
+            await async_repository.add_source_relationships(relationships)
+            if not dedup_index.loaded:
+                sources_by_handle = await async_repository.get_sources_for_profiles([handle for handle, _ in relationships])
+
+        decisions = []
+        for position, (twitter_handle, _, profile_created_at, _) in enumerate(candidates):
+            existing_profile = existing_profiles.get(position)
+            if not existing_profile:
+                decisions.append({"isNew": True})
+                continue
+            key = Repository._normalize_handle(twitter_handle)
+            account_age_days = DeduplicationService._account_age_days(profile_created_at)
+            decisions.append(DeduplicationService._with_rename(
+                DeduplicationService._decide(
+                    twitter_handle,
+                    existing_profile,
+                    sources_by_handle.get(key, []),
+                    account_age_days,
+                ),
+                renamed.get(position),
+            ))
+        return decisions
+
     @staticmethod
     async def record_new_profile(profile_data, source_username):
         """
         Records a new profile as processed, updating its Notion page ID if available.
-        `profile_data` should be a dict with 'twitter_handle' and 'notion_page_id'.
+        `profile_data` should be a dict with 'twitter_handle' and 'notion_page_id' (and ideally 'twitter_user_id').
         """
         twitter_handle = profile_data.get('twitter_handle')
         notion_page_id = profile_data.get('notion_page_id')
         category = profile_data.get('category')
+        twitter_user_id = profile_data.get('twitter_user_id')
         
         if not twitter_handle:
             logger.error("Cannot record new profile: 'twitter_handle' is missing.")
             return
 
         try:
-            repository.record_new_profile(twitter_handle, notion_page_id, source_username, category=category)
+            # Joins the next batched commit; the index is only updated once the record is in SQLite
+            await async_repository.record_new_profile(
+                twitter_handle, notion_page_id, source_username, category=category,
+                twitter_user_id=twitter_user_id
+            )
+            dedup_index.record(
+                twitter_handle, category=category, notion_page_id=notion_page_id, twitter_user_id=twitter_user_id
+            )
             logger.debug(f"Deduplication service recorded @{twitter_handle} (source: {source_username}) with Notion ID: {notion_page_id}")
         except Exception as e:
             logger.error(f"Error recording profile @{twitter_handle} in deduplication service: {e}")
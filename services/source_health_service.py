@@ -0,0 +1,99 @@
+from db.async_repository import async_repository
+from utils.logger import logger
+from datetime import datetime, timedelta
+from config import SOURCE_HEALTH_RECHECK_BASE_DAYS, SOURCE_HEALTH_RECHECK_MAX_DAYS
+
+class SourceHealthService:
+    """
+    Tracks source accounts that cannot produce work (protected, suspended, renamed, not found)
+    so runs stop paying FollowingLight calls and retry sleeps on them until a re-check is due.
+    """
+
+    # Statuses detected by the batch count lookup; a successful lookup clears only these.
+    LOOKUP_STATUSES = ('suspended', 'renamed', 'not_found')
+
+    @staticmethod
+    def recheck_interval_days(failure_count):
+        """
+        Exponential re-check interval: base, 2x base, 4x base, ... capped at the max.
+        """
+        exponent = max(int(failure_count or 1), 1) - 1
+        interval = SOURCE_HEALTH_RECHECK_BASE_DAYS * (2 ** min(exponent, 30))
+        return min(interval, SOURCE_HEALTH_RECHECK_MAX_DAYS)
+
+    @staticmethod
+    def _is_due(health, now=None):
+        next_check_raw = health.get("next_check_date")
+        if not next_check_raw:
+            return True
+        try:
+            next_check_dt = datetime.fromisoformat(next_check_raw)
+        except ValueError:
+            return True
+        return (now or datetime.now()) >= next_check_dt
+
+    @staticmethod
+    async def get_all():
+        """
+        Returns all recorded unhealthy sources keyed by lowercase handle.
+        """
+        return await async_repository.get_all_source_health()
+
+    @staticmethod
+    async def should_skip(source_handle):
+        """
+        Returns the health record if the source is unhealthy and not yet due for a re-check, else None.
+        """
+        if not source_handle:
+            return None
+        health = await async_repository.get_source_health(source_handle)
+        if health and not SourceHealthService._is_due(health):
+            return health
+        return None
+
+    @staticmethod
+    async def record_failure(source_handle, status, source_user_id=None, detail=None, only_if_due=False):
+        """
+        Records an unhealthy source and schedules its next re-check.
+        Repeated failures with the same status double the interval.
+        only_if_due: callers that see the source on every run (the batch count lookup) leave an entry
+        with the same status untouched until its re-check is due, so failure_count counts re-checks, not runs.
+        """
+        if not source_handle:
+            return None
+
+        existing = await async_repository.get_source_health(source_handle)
+        if only_if_due and existing and existing.get("status") == status and not SourceHealthService._is_due(existing):
+            return existing
+        failure_count = 1
+        if existing and existing.get("status") == status:
+            failure_count = (existing.get("failure_count") or 0) + 1
+
+        interval_days = SourceHealthService.recheck_interval_days(failure_count)
+        next_check_date = (datetime.now() + timedelta(days=interval_days)).isoformat()
+        await async_repository.upsert_source_health(
+            source_handle,
+            status,
+            failure_count,
+            next_check_date,
+            source_user_id=source_user_id,
+            detail=detail,
+        )
+        logger.log(
+            f"Source @{source_handle} marked {status} (failure #{failure_count}); "
+            f"next re-check in {interval_days:g} day(s)"
+        )
+        return {
+            "status": status,
+            "failure_count": failure_count,
+            "next_check_date": next_check_date,
+        }
+
+    @staticmethod
+    async def record_healthy(source_handle, statuses=None):
+        """
+        Clears a source's health entry once it works again.
+        """
+        if not source_handle:
+            return
+        await async_repository.clear_source_health(source_handle, statuses=statuses)
@@ -0,0 +1,62 @@
+from db.async_repository import async_repository
+from utils.logger import logger
+from config import TWEET_STORE_ENABLED, MAX_TWEETS_PER_PROFILE, TWEET_STORE_KEEP_PER_USER
+
+
+class TweetStoreService:
+    """
+    Remembers the tweets already fetched per user id. Re-checking a known profile (e.g. after the
+    90-day recency window) pages the timeline only until it reaches a stored tweet, and the AI input
+    is assembled from the fetched + stored tweets, newest first.
+    """
+
+    @staticmethod
+    async def get_stored(twitter_user_id):
+        if not TWEET_STORE_ENABLED or not twitter_user_id:
+            return []
+        return await async_repository.get_user_tweets(twitter_user_id, TWEET_STORE_KEEP_PER_USER)
+
+    @staticmethod
+    def own_tweets(records, twitter_user_id):
+        """
+        The profile's own tweets among fetched records: quoted / retweeted tweets by other authors are
+        dropped so they are neither stored under this user nor mistaken for its known tweets.
+        Records whose author the response does not carry are kept.
+        """
+        twitter_user_id = str(twitter_user_id)
+        return [record for record in records if record.get("author_id") in (None, twitter_user_id)]
+
+    @staticmethod
+    def reached_known(records, known_ids):
+        """True if a fetched page contains a tweet that is already stored (older pages are known too)"""
+        return any(record.get("tweet_id") in known_ids for record in records)
+
+    @staticmethod
+    def merge(fetched_records, stored_tweets, limit=MAX_TWEETS_PER_PROFILE):
+        """
+        Tweet texts for the AI: fetched and stored tweets deduplicated by tweet id, newest first, at most
+        `limit`. With the store disabled the fetched texts are returned unchanged (API order).
+        """
+        if not TWEET_STORE_ENABLED:
+            return [record["text"] for record in fetched_records]
+
+        by_id = {tweet["tweet_id"]: tweet for tweet in stored_tweets}
+        without_id = []
+        for record in fetched_records:
+            if str(record.get("tweet_id") or "").isdigit():
+                by_id[record["tweet_id"]] = record
+            else:
+                without_id.append(record)
+        newest_first = sorted(by_id.values(), key=lambda tweet: int(tweet["tweet_id"]), reverse=True)
+        texts = [tweet["text"] for tweet in newest_first + without_id]
+        return texts[:limit] if limit else texts
+
+    @staticmethod
+    async def save(twitter_user_id, fetched_records):
+        if not TWEET_STORE_ENABLED or not twitter_user_id or not fetched_records:
+            return 0
+        try:
+            return await async_repository.save_user_tweets(twitter_user_id, fetched_records, TWEET_STORE_KEEP_PER_USER)
+        except Exception as e:
+            logger.error(f"Failed to store tweets for user {twitter_user_id}: {e}")
+            return 0
@@ -0,0 +1,40 @@
+"""Shared payload builders for the timeline / tweet tests (import with `from conftest import ...`)"""
+
+
+def tweet_result(tweet_id, text=None, author_id="42", screen_name="alice", name="Alice",
+                 note=None, quoted=None, reply_to=None, likes=1):
+    """A hydrated tweet result (__typename Tweet) as UserTweets / TweetResultsByRestIds return it"""
+    legacy = {
+        "id_str": str(tweet_id),
+        "created_at": "Tue Mar 05 17:21:10 +0000 2024",
+        "full_text": f"tweet {tweet_id}" if text is None else text,
+        "favorite_count": likes,
+        "entities": {
+            "urls": [{"display_url": "example.com", "expanded_url": "https://example.com", "url": "https://t.co/x"}],
+            "user_mentions": [{"screen_name": "bob", "id_str": "7"}],
+            "hashtags": [{"text": "web3"}],
+        },
+    }
+    if reply_to:
+        legacy["in_reply_to_status_id_str"] = str(reply_to)
+    result = {
+        "__typename": "Tweet",
+        "rest_id": str(tweet_id),
+        "core": {"user_results": {"result": {
+            "__typename": "User", "rest_id": author_id, "legacy": {"screen_name": screen_name, "name": name},
+        }}},
+        "legacy": legacy,
+    }
+    if note:
+        result["note_tweet"] = {"note_tweet_results": {"result": {"text": note}}}
+    if quoted:
+        result["quoted_status_result"] = {"result": quoted}
+    return result
+
+
+def tweet_entry(result):
+    """Timeline entry holding one tweet result"""
+    return {
+        "entryId": f"tweet-{result['rest_id']}",
+        "content": {"itemContent": {"tweet_results": {"result": result}}},
+    }
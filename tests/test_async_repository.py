@@ -0,0 +1,116 @@
+import asyncio
+import sys
+import threading
+import pytest
+
+from db.async_repository import AsyncRepository
+from db.repository import Repository
+
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repository = Repository(db_name=str(tmp_path / "async.db"))
+    yield repository
+    repository.close()
+
+
+async def test_writes_use_writer_thread_and_reads_see_them(repo, monkeypatch):
+    facade = AsyncRepository(repo, reader_threads=2)
+    threads = {}
+    original_record = repo.record_new_profiles
+    original_find = repo.find_by_handle
+
+    def record(*args, **kwargs):
+        threads["write"] = threading.current_thread().name
+        return original_record(*args, **kwargs)
+
+    def find(*args, **kwargs):
+        threads["read"] = threading.current_thread().name
+        return original_find(*args, **kwargs)
+
+    monkeypatch.setattr(repo, "record_new_profiles", record)
+    monkeypatch.setattr(repo, "find_by_handle", find)
+
+    await facade.record_new_profile("SomeProject", "page-1", "source", category="Project")
+    profile = await facade.find_by_handle("someproject")
+    await facade.close()
+
+    assert profile["notion_page_id"] == "page-1"
+    assert threads["write"] == "db-writer"
+    assert threads["read"].startswith("db-reader")
+    assert threading.current_thread().name not in threads.values()
+
+
+async def test_close_drains_queued_writes(repo):
+    facade = AsyncRepository(repo)
+    await asyncio.gather(*[
+        facade.record_new_profile(f"handle{i}", None, "source", category="Project") for i in range(50)
+    ])
+    await facade.close()
+
+    # The facade restarts lazily after close()
+    sources = await facade.get_sources_for_profiles([f"handle{i}" for i in range(50)])
+    await facade.close()
+    assert len(sources) == 50
+
+
+async def test_buffered_records_commit_in_batches(repo, monkeypatch):
+    facade = AsyncRepository(repo, batch_size=10, batch_ms=10_000)
+    batches = []
+    original = repo.record_new_profiles
+
+    def record_batch(records):
+        batches.append(len(records))
+        return original(records)
+
+    monkeypatch.setattr(repo, "record_new_profiles", record_batch)
+
+    for i in range(25):
+        await facade.record_new_profile(f"buffered{i}", None, "source", category="Project", wait=False)
+    # Two full batches commit on size; the remaining five wait for the flush
+    await facade.flush()
+    assert batches == [10, 10, 5]
+    assert repo.find_by_handle("buffered24") is not None
+
+    await facade.record_new_profile("late", None, "source", wait=False)
+    await facade.close()
+    assert batches[-1] == 1
+    assert repo.find_by_handle("late") is not None
+
+
+async def test_buffered_records_flush_after_batch_window(repo):
+    facade = AsyncRepository(repo, batch_size=1000, batch_ms=20)
+    await facade.record_new_profile("timed", None, "source", wait=True)
+    assert repo.find_by_handle("timed") is not None
+    await facade.close()
+
+
+async def test_writes_racing_a_stop_are_committed(repo):
+    # Switch threads as often as possible so the stopper lands between start-up and queueing
+    previous_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    facade = AsyncRepository(repo, batch_size=5, batch_ms=1)
+    handles = [f"race{i}" for i in range(300)]
+    stopping = threading.Event()
+
+    def stop_repeatedly():
+        while not stopping.is_set():
+            facade._stop_writer()
+
+    stopper = threading.Thread(target=stop_repeatedly)
+    stopper.start()
+    try:
+        for handle in handles:
+            # Each write lands ahead of a concurrent _STOP or on the writer restarted after it: never lost
+            await asyncio.wait_for(facade.record_new_profile(handle, None, "source"), timeout=10)
+            await asyncio.wait_for(facade.find_by_handle(handle), timeout=10)
+    finally:
+        stopping.set()
+        stopper.join()
+        sys.setswitchinterval(previous_interval)
+    await facade.close()
+
+    assert len(repo.find_by_handles(handles)) == len(handles)
@@ -0,0 +1,84 @@
+import json
+import pytest
+
+from db.async_repository import AsyncRepository
+from db.repository import Repository
+from services.classification_service import ClassificationService
+
+
+DATA = {
+    "profile": {
+        "screen_name": "someproject",
+        "user_id": "42",
+        "name": "Some Project",
+        "description": "Building a thing",
+        "followers_count": 120,
+        "friends_count": 80,
+        "verified": False,
+    },
+    "tweets": ["gm", "shipping v2 today"],
+    "sourceUsername": "sourcea",
+}
+RESULT = {"name": "Some Project", "categories": ["Infrastructure"], "summary": "Builds a thing"}
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    repository = Repository(db_name=str(tmp_path / "classifications.db"))
+    monkeypatch.setattr('services.classification_service.async_repository', AsyncRepository(repository))
+    yield repository
+    repository.close()
+
+
+def _with(**changes):
+    data = json.loads(json.dumps(DATA))
+    for key, value in changes.items():
+        if key == "tweets":
+            data["tweets"] = value
+        else:
+            data["profile"][key] = value
+    return data
+
+
+def test_content_hash_ignores_counts_and_source():
+    base = ClassificationService.content_hash(DATA)
+    drifted = _with(followers_count=5000, friends_count=1)
+    drifted["sourceUsername"] = "sourceb"
+
+    assert ClassificationService.content_hash(drifted) == base
+    assert ClassificationService.content_hash(_with(description="Now a memecoin")) != base
+    assert ClassificationService.content_hash(_with(tweets=["gm", "new tweet"])) != base
+
+
+@pytest.mark.asyncio
+async def test_stored_result_is_reused_only_for_identical_inputs(repo):
+    content_hash = ClassificationService.content_hash(DATA)
+    prompt_hash = ClassificationService.prompt_hash("prompt v1")
+    await ClassificationService.store("SomeProject", content_hash, "model-a", prompt_hash, RESULT, "42")
+
+    reused = await ClassificationService.get_reusable("someproject", content_hash, "model-a", prompt_hash)
+    assert json.loads(reused) == RESULT
+    assert repo.get_classification("someproject")["reuse_count"] == 1
+
+    assert await ClassificationService.get_reusable("someproject", "other", "model-a", prompt_hash) is None
+    assert await ClassificationService.get_reusable("someproject", content_hash, "model-b", prompt_hash) is None
+    assert await ClassificationService.get_reusable(
+        "someproject", content_hash, "model-a", ClassificationService.prompt_hash("prompt v2")
+    ) is None
+    assert await ClassificationService.get_reusable("unknown", content_hash, "model-a", prompt_hash) is None
+
+    # A fresh classification replaces the stored one and resets the reuse counter
+    await ClassificationService.store("someproject", "new-hash", "model-b", prompt_hash, {"categories": ["Profile"]})
+    stored = repo.get_classification("someproject")
+    assert (stored["content_hash"], stored["model"], stored["reuse_count"]) == ("new-hash", "model-b", 0)
+    assert stored["twitter_user_id"] == "42"
+
+
+@pytest.mark.asyncio
+async def test_classification_follows_a_rename(repo):
+    repo.record_new_profile("someproject", "page-1", "sourcea", category="Project", twitter_user_id="42")
+    await ClassificationService.store("someproject", "hash", "model-a", "prompt", RESULT, "42")
+
+    assert repo.rename_profile("42", "renamedproject") == "someproject"
+    assert repo.get_classification("someproject") is None
+    assert json.loads(repo.get_classification("renamedproject")["result_json"]) == RESULT
@@ -0,0 +1,97 @@
+import pytest
+from datetime import datetime, timedelta
+
+from db.dedup_index import DedupIndex
+from db.async_repository import AsyncRepository
+from db.repository import Repository
+from services.deduplication_service import DeduplicationService
+
+
+pytestmark = pytest.mark.asyncio
+
+NOW = datetime.now()
+OLD_ACCOUNT = "Mon Jan 01 00:00:00 +0000 2018"
+NEW_ACCOUNT = (NOW - timedelta(days=30)).strftime('%a %b %d %H:%M:%S +0000 %Y')
+
+
+@pytest.fixture
+def seeded(tmp_path, monkeypatch):
+    repo = Repository(db_name=str(tmp_path / "index.db"))
+    rows = [
+        ("profileacct", "Profile", 10, None),
+        ("recentproject", "Project", 5, "page-1"),
+        ("staleproject", "Project", 200, None),
+        ("youngproject", "Project", 200, None),
+        ("zulutime", "Project", 100, None),
+    ]
+    with repo._transaction() as conn:
+        for handle, category, days_ago, page_id in rows:
+            ts = (NOW - timedelta(days=days_ago)).isoformat()
+            if handle == "zulutime":
+                ts = (datetime.utcnow() - timedelta(days=days_ago)).isoformat() + "Z"
+            conn.execute(
+                "INSERT INTO processed_profiles "
+                "(twitter_handle, first_discovered_date, last_updated_date, notion_page_id, category) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (handle, ts, ts, page_id, category),
+            )
+    index = DedupIndex()
+    facade = AsyncRepository(repo)
+    monkeypatch.setattr('services.deduplication_service.async_repository', facade)
+    monkeypatch.setattr('services.deduplication_service.dedup_index', index)
+    return repo, index, facade
+
+
+CANDIDATES = [
+    ("ProfileAcct", "sourcea", OLD_ACCOUNT),
+    ("recentproject", "sourcea", OLD_ACCOUNT),
+    ("StaleProject", "sourceb", OLD_ACCOUNT),
+    ("youngproject", "sourcea", NEW_ACCOUNT),
+    ("zulutime", "sourcea", OLD_ACCOUNT),
+    ("brandnew", "sourcea", OLD_ACCOUNT),
+]
+
+
+def _decision_fields(decision):
+    return (decision["isNew"], decision.get("skipReason"), decision.get("daysSinceLastSeen"))
+
+
+async def test_index_decisions_match_sqlite(seeded):
+    repo, index, _ = seeded
+    from_sqlite = [await DeduplicationService.process_profile(*c) for c in CANDIDATES]
+
+    rows, _, size = index.load(repo)
+    assert rows == 5 and size > 0
+    from_index = [await DeduplicationService.process_profile(*c) for c in CANDIDATES]
+    batched = await DeduplicationService.process_profiles(CANDIDATES)
+
+    expected = [_decision_fields(d) for d in from_sqlite]
+    assert [_decision_fields(d) for d in from_index] == expected
+    assert [_decision_fields(d) for d in batched] == expected
+    # Same decision shape on both paths; the index path does not read sources back
+    assert [sorted(d) for d in from_index] == [sorted(d) for d in from_sqlite]
+    assert all(d["sources"] == [] for d in from_index + batched if "sources" in d)
+    # Relationships are still written through to SQLite
+    assert {s["discovered_by"] for s in repo.get_sources_for_profile("staleproject")} == {"sourceb"}
+
+
+async def test_record_new_profile_writes_through(seeded):
+    repo, index, facade = seeded
+    index.load(repo)
+
+    await DeduplicationService.record_new_profile(
+        {"twitter_handle": "FreshOne", "notion_page_id": "page-9", "category": "Project"}, "sourcea"
+    )
+    await DeduplicationService.record_new_profile({"twitter_handle": "staleproject", "notion_page_id": None}, "sourcea")
+
+    # The index is updated as soon as the record is queued; SQLite once the batch is flushed
+    fresh = index.get("freshone")
+    assert fresh["category"] == "Project" and fresh["has_notion_page"]
+    await facade.flush()
+    assert repo.find_by_handle("freshone")["notion_page_id"] == "page-9"
+
+    # category is kept when the update does not provide one, and last_updated moves to now
+    stale = index.get("StaleProject")
+    assert stale["category"] == "Project"
+    decision = await DeduplicationService.process_profile("staleproject", "sourcec", OLD_ACCOUNT)
+    assert decision["skipReason"] == "seen_recently"
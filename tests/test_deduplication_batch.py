@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime, timedelta
+
+from db.async_repository import AsyncRepository
+from db.repository import Repository
+from services.deduplication_service import DeduplicationService
+
+
+pytestmark = pytest.mark.asyncio
+
+OLD_ACCOUNT = "Mon Jan 01 00:00:00 +0000 2018"
+NOW = datetime.now()
+NEW_ACCOUNT = (NOW - timedelta(days=30)).strftime('%a %b %d %H:%M:%S +0000 %Y')
+
+
+def _seed_profile(repo, handle, category, days_ago):
+    ts = (NOW - timedelta(days=days_ago)).isoformat()
+    with repo._transaction() as conn:
+        conn.execute(
+            "INSERT INTO processed_profiles "
+            "(twitter_handle, first_discovered_date, last_updated_date, notion_page_id, category, created_at) "
+            "VALUES (?, ?, ?, NULL, ?, ?)",
+            (handle, ts, ts, category, ts),
+        )
+        conn.execute(
+            "INSERT INTO source_relationships (twitter_handle, discovered_by_handle, discovery_date) VALUES (?, ?, ?)",
+            (handle, "firstsource", ts),
+        )
+
+
+def _make_repository(path, monkeypatch):
+    repo = Repository(db_name=str(path))
+    monkeypatch.setattr('services.deduplication_service.async_repository', AsyncRepository(repo))
+    _seed_profile(repo, "profileacct", "Profile", 10)
+    _seed_profile(repo, "recentproject", "Project", 5)
+    _seed_profile(repo, "staleproject", "Project", 200)
+    _seed_profile(repo, "youngproject", "Project", 200)
+    return repo
+
+
+CANDIDATES = [
+    ("ProfileAcct", "sourcea", OLD_ACCOUNT),
+    ("recentproject", "sourcea", OLD_ACCOUNT),
+    ("StaleProject", "sourceb", OLD_ACCOUNT),
+    ("youngproject", "sourcea", NEW_ACCOUNT),
+    ("brandnew", "sourcea", OLD_ACCOUNT),
+    (None, "sourcea", None),
+]
+
+
+def _comparable(decision):
+    # discovery_date of the relationship added during the call differs between the two runs
+    decision = dict(decision)
+    if "sources" in decision:
+        decision["sources"] = sorted(s["discovered_by"] for s in decision["sources"])
+    return decision
+
+
+async def test_process_profiles_matches_process_profile(tmp_path, monkeypatch):
+    _make_repository(tmp_path / "single.db", monkeypatch)
+    single = []
+    for handle, source, created_at in CANDIDATES:
+        single.append(await DeduplicationService.process_profile(handle, source, created_at))
+
+    batch_repo = _make_repository(tmp_path / "batch.db", monkeypatch)
+    batch = await DeduplicationService.process_profiles(CANDIDATES)
+
+    assert [_comparable(d) for d in batch] == [_comparable(d) for d in single]
+    assert [d.get("skipReason") for d in batch] == [
+        "category_profile",
+        "seen_recently",
+        "eligible_for_reprocess",
+        "account_too_new_for_recheck",
+        None,
+        None,
+    ]
+    # Relationships are only written for profiles that already exist
+    assert batch_repo.get_sources_for_profile("brandnew") == []
+
+
+async def test_process_profiles_duplicate_handle_across_sources(tmp_path, monkeypatch):
+    _make_repository(tmp_path / "dupes.db", monkeypatch)
+    batch = await DeduplicationService.process_profiles([
+        ("staleproject", "sourcea", OLD_ACCOUNT),
+        ("StaleProject", "sourceb", OLD_ACCOUNT),
+    ])
+
+    assert [d["skipReason"] for d in batch] == ["eligible_for_reprocess", "eligible_for_reprocess"]
+    assert sorted(s["discovered_by"] for s in batch[0]["sources"]) == ["firstsource", "sourcea", "sourceb"]
+
+
+async def test_process_profiles_empty_batch(tmp_path, monkeypatch):
+    _make_repository(tmp_path / "empty.db", monkeypatch)
+    assert await DeduplicationService.process_profiles([]) == []
@@ -97,3 +97,14 @@ async def test_process_username_no_users_raises(mock_throttled, _mock_prev):
     with pytest.raises(ValueError):
         await process_username('empty', is_new_username=False, following_counts={'empty': 2})
 
+
+
+@patch('main.SourceHealthService.should_skip', new_callable=AsyncMock, return_value={"status": "protected", "next_check_date": "2099-01-01T00:00:00"})
+@patch('main.get_previous_follower_count', new_callable=AsyncMock, return_value=0)
+@patch('main.throttled_rapid_api_request')
+async def test_process_username_skips_unhealthy_source(mock_throttled, _mock_prev, _mock_health):
+    from main import process_username
+    result = await process_username('privateacct', is_new_username=False, following_counts={'privateacct': 10})
+
+    assert result['followings'] == []
+    mock_throttled.assert_not_called()
@@ -0,0 +1,45 @@
+import io
+import json
+
+import pytest
+
+from utils.json_stream import JsonStream
+
+
+DOCUMENT = {
+    "username": "alice",
+    "count": 12345678901234567890,
+    "nested": {"list": [1, 2.5, None, True, "x" * 50], "empty": {}},
+    "pages": [{"pageNumber": n, "data": {"text": "é ✓ \"quoted\"", "ids": list(range(n))}} for n in range(5)],
+    "after": [],
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_stream_reads_values_and_array_items(chunk_size):
+    stream = JsonStream(io.StringIO(json.dumps(DOCUMENT, indent=2)), chunk_size=chunk_size)
+
+    header = {}
+    pages = []
+    for key in stream.object_keys():
+        if key == "pages":
+            for _ in stream.array_items():
+                pages.append(stream.value())
+        else:
+            header[key] = stream.value()
+
+    assert pages == DOCUMENT["pages"]
+    assert header == {k: v for k, v in DOCUMENT.items() if k != "pages"}
+
+
+def test_stream_handles_empty_containers_and_reports_bad_input():
+    stream = JsonStream(io.StringIO('{"a": [], "b": {}}'), chunk_size=2)
+    contents = {}
+    for key in stream.object_keys():
+        contents[key] = list(stream.array_items()) if key == "a" else list(stream.object_keys())
+    assert contents == {"a": [], "b": []}
+
+    stream = JsonStream(io.StringIO('["a" "b"]'))
+    with pytest.raises(ValueError):
+        for _ in stream.array_items():
+            stream.value()
@@ -0,0 +1,88 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from db.maintenance import iter_archived_relationships
+from db.repository import Repository
+from db.s3_sync import S3DatabaseSync
+
+
+def _age_relationships(repo, handles, days):
+    old = (datetime.now() - timedelta(days=days)).isoformat()
+    conn = repo._get_connection()
+    conn.executemany(
+        "UPDATE source_relationships SET discovery_date = ? WHERE twitter_handle = ?",
+        [(old, handle) for handle in handles],
+    )
+
+
+def test_maintenance_archives_old_relationships(tmp_path):
+    repo = Repository(db_name=str(tmp_path / "maintenance.db"))
+    for i in range(30):
+        repo.record_new_profile(f"user{i}", None, f"source{i % 4}", category="Project", twitter_user_id=str(i))
+    _age_relationships(repo, [f"user{i}" for i in range(20)], days=400)
+
+    report = repo.run_maintenance(archive_days=365)
+
+    assert report["archived_relationships"] == 20
+    assert report["archive_batches"] == 1
+    # New databases are created with incremental auto-vacuum, so no conversion is needed
+    assert report["converted_to_incremental_vacuum"] is False
+    assert "error" not in report
+
+    conn = repo._get_connection()
+    remaining = [row[0] for row in conn.execute("SELECT twitter_handle FROM source_relationships ORDER BY rowid")]
+    assert remaining == [f"user{i}" for i in range(20, 30)]
+    archived = list(iter_archived_relationships(conn))
+    assert [row["twitter_handle"] for row in archived] == [f"user{i}" for i in range(20)]
+    assert archived[3]["discovered_by_handle"] == "source3"
+    assert archived[3]["twitter_user_id"] == "3"
+
+    # Profiles stay, and the maintained counters follow the deletes
+    stats = S3DatabaseSync._get_database_stats(repo.db_path)
+    assert (stats["total_profiles"], stats["total_relationships"], stats["unique_sources"]) == (30, 10, 4)
+    assert repo.run_maintenance(archive_days=365)["archived_relationships"] == 0
+    repo.close()
+
+
+def test_maintenance_converts_legacy_db_to_incremental_vacuum(tmp_path):
+    path = tmp_path / "legacy.db"
+    # Databases created before auto_vacuum was set at creation time
+    conn = sqlite3.connect(str(path))
+    Repository._apply_schema(conn)
+    conn.close()
+
+    repo = Repository(db_name=str(path))
+    assert repo._get_connection().execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+    report = repo.run_maintenance(archive_days=0)
+
+    assert report["converted_to_incremental_vacuum"] is True
+    assert report["archived_relationships"] == 0
+    assert repo._get_connection().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    repo.close()
+
+
+def test_rediscovered_relationship_after_archiving(tmp_path):
+    repo = Repository(db_name=str(tmp_path / "rediscovery.db"))
+    repo.record_new_profile("user0", None, "source0", category="Project")
+    _age_relationships(repo, ["user0"], days=400)
+    assert repo.run_maintenance(archive_days=365)["archived_relationships"] == 1
+
+    # Archived pairs drop out of source lookups and counters ...
+    assert repo.get_sources_for_profile("user0") == []
+    assert S3DatabaseSync._get_database_stats(repo.db_path)["total_relationships"] == 0
+
+    # ... and a rediscovery starts a new hot row with its own discovery date
+    repo.add_source_relationship("user0", "source0")
+    sources = repo.get_sources_for_profile("user0")
+    assert [s["discovered_by"] for s in sources] == ["source0"]
+    stats = S3DatabaseSync._get_database_stats(repo.db_path)
+    assert (stats["total_relationships"], stats["unique_sources"]) == (1, 1)
+
+    # Once it ages out it is archived again: one archive entry per archived discovery
+    _age_relationships(repo, ["user0"], days=380)
+    assert repo.run_maintenance(archive_days=365)["archived_relationships"] == 1
+    archived = list(iter_archived_relationships(repo._get_connection()))
+    assert [(row["twitter_handle"], row["discovered_by_handle"]) for row in archived] == [("user0", "source0")] * 2
+    assert archived[0]["discovery_date"] < archived[1]["discovery_date"]
+    repo.close()
@@ -0,0 +1,98 @@
+import sqlite3
+import pytest
+from datetime import datetime, timedelta
+
+from db.migrations import migrate_epoch_timestamps, needs_epoch_migration
+from db.repository import Repository
+
+LEGACY_SCHEMA = """
+CREATE TABLE processed_profiles (
+    twitter_handle TEXT PRIMARY KEY COLLATE NOCASE,
+    first_discovered_date TEXT NOT NULL,
+    last_updated_date TEXT NOT NULL,
+    notion_page_id TEXT,
+    category TEXT CHECK(category IN ('Project', 'Profile')),
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE source_relationships (
+    twitter_handle TEXT COLLATE NOCASE,
+    discovered_by_handle TEXT COLLATE NOCASE,
+    discovery_date TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (twitter_handle, discovered_by_handle)
+);
+"""
+
+NOW = datetime.now()
+DAY = 86400
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(str(path))
+    conn.executescript(LEGACY_SCHEMA)
+    rows = [
+        ("recent", (NOW - timedelta(days=10)).isoformat(), "Project"),
+        ("stale", (NOW - timedelta(days=200)).isoformat(), "Project"),
+        ("zulu", "2024-01-01T00:00:00Z", "Project"),
+        ("personal", (NOW - timedelta(days=200)).isoformat(), "Profile"),
+        ("garbled", "not-a-date", None),
+    ]
+    conn.executemany(
+        "INSERT INTO processed_profiles (twitter_handle, first_discovered_date, last_updated_date, category) "
+        "VALUES (?, ?, ?, ?)",
+        [(handle, ts, ts, category) for handle, ts, category in rows],
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_migration_backfills_epochs_and_is_idempotent(legacy_db):
+    conn = sqlite3.connect(str(legacy_db))
+    assert needs_epoch_migration(conn)
+    assert migrate_epoch_timestamps(conn, seen_within_days=90) == 5
+    assert not needs_epoch_migration(conn)
+    assert migrate_epoch_timestamps(conn, seen_within_days=90) == 0
+
+    values = {
+        row[0]: row[1:]
+        for row in conn.execute("SELECT twitter_handle, last_updated_epoch, eligible_after FROM processed_profiles")
+    }
+    conn.close()
+
+    assert values["zulu"][0] == 1704067200  # 'Z' suffix is read as UTC
+    assert values["zulu"][1] == values["zulu"][0] + 90 * DAY
+    assert values["personal"][1] is None
+    assert values["garbled"] == (0, 0)
+
+
+def test_repository_applies_migration_and_answers_eligibility(legacy_db):
+    repo = Repository(db_name=str(legacy_db))
+    now_epoch = int(NOW.timestamp())
+
+    assert repo.is_eligible("recent", now_epoch) is False
+    assert repo.is_eligible("STALE", now_epoch) is True
+    assert repo.is_eligible("personal", now_epoch) is False
+    assert repo.is_eligible("unknown", now_epoch) is None
+
+    # "recent" leaves the window 80 days from now
+    aging = repo.list_aging_out(now_epoch + 79 * DAY, now_epoch + 81 * DAY)
+    assert [handle for handle, _ in aging] == ["recent"]
+
+    plan = " ".join(
+        row[3] for row in repo._get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT twitter_handle, eligible_after FROM processed_profiles "
+            "WHERE eligible_after >= ? AND eligible_after < ? ORDER BY eligible_after",
+            (0, 1),
+        )
+    )
+    assert "COVERING INDEX idx_profiles_eligible_after" in plan
+
+    # Writes keep the epoch columns in sync
+    repo.record_new_profile("stale", None, "source", category="Project")
+    profile = repo.find_by_handle("stale")
+    assert abs(profile["last_updated_epoch"] - now_epoch) < 60
+    assert profile["eligible_after"] == profile["last_updated_epoch"] + 90 * DAY
+    repo.close()
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from api.twitter_posts import _raw_file_timestamp, _stream_raw_file, _write_partial_results
+from utils.page_log import PageLog, PageLogReader, convert_page_log
+
+
+HEADER = {"username": "alice", "userId": "42", "fetchedAt": "2024-01-01T00:00:00", "user": {"rest_id": "42"}}
+
+
+def _pages(count):
+    return [
+        {"pageNumber": n + 1, "requestedCursor": None if n == 0 else f"c{n}", "data": {"text": "é ✓", "ids": list(range(n))}}
+        for n in range(count)
+    ]
+
+
+def _write_log(path, pages, fsync_pages=10):
+    with PageLog(str(path), fsync_pages=fsync_pages) as log:
+        log.open(HEADER)
+        for page in pages:
+            log.append(page)
+    return log
+
+
+def test_page_log_round_trip(tmp_path):
+    path = tmp_path / "alice_2024.pages.jsonl"
+    pages = _pages(3)
+    _write_log(path, pages)
+
+    reader = PageLogReader(str(path))
+    assert reader.header == HEADER
+    assert len(reader) == 3
+    assert list(reader) == pages
+    assert list(reader) == pages  # re-iterable
+
+
+def test_page_log_fsyncs_in_batches(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, "fsync", synced.append)
+
+    _write_log(tmp_path / "a.pages.jsonl", _pages(7), fsync_pages=3)
+
+    # header, pages 3 and 6, close
+    assert len(synced) == 4
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / "a.pages.jsonl"
+    _write_log(path, _pages(2))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type":"page","page":{"pageNum')
+
+    reader = PageLogReader(str(path))
+    assert len(reader) == 2
+    assert [p["pageNumber"] for p in reader] == [1, 2]
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_convert_matches_legacy_combined_file(tmp_path, count):
+    pages = _pages(count)
+    log_path = tmp_path / "alice_2024.pages.jsonl"
+    _write_log(log_path, pages)
+    legacy = tmp_path / "legacy.json"
+    _write_partial_results(str(legacy), "alice", "42", {"rest_id": "42"}, pages, "2024-01-01T00:00:00")
+
+    output = convert_page_log(str(log_path))
+
+    assert output == str(tmp_path / "alice_2024.json")
+    assert open(output, encoding="utf-8").read() == legacy.read_text(encoding="utf-8")
+
+
+def test_stream_raw_file_reads_page_logs(tmp_path):
+    path = tmp_path / "alice_2024-01-01_10-00-00.pages.jsonl"
+    pages = _pages(2)
+    _write_log(path, pages)
+
+    username, user_id, fetched_at, streamed, user_payload = _stream_raw_file(str(path))
+
+    assert (username, user_id, fetched_at, user_payload) == ("alice", "42", "2024-01-01T00:00:00", {"rest_id": "42"})
+    assert list(streamed) == pages
+    assert _raw_file_timestamp(str(path)) == "2024-01-01_10-00-00"
+    assert _raw_file_timestamp("alice_2024-01-01_10-00-00.json") == "2024-01-01_10-00-00"
+
+
+def test_reopen_drops_torn_line_and_appends(tmp_path):
+    path = tmp_path / "a.pages.jsonl"
+    pages = _pages(3)
+    _write_log(path, pages[:2])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type":"page","page":{"pageNum')
+
+    with PageLog(str(path)) as log:
+        log.reopen()
+        assert log.pages == 2
+        log.append(pages[2])
+
+    reader = PageLogReader(str(path))
+    assert reader.header == HEADER
+    assert list(reader) == pages
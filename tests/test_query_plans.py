@@ -0,0 +1,121 @@
+import sqlite3
+import pytest
+
+from db.migrations import STATS_TRIGGERS, apply_migrations
+from db.repository import Repository
+from db.s3_sync import S3DatabaseSync
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repository = Repository(db_name=str(tmp_path / "plans.db"))
+    for i in range(200):
+        repository.record_new_profile(f"user{i}", None, f"source{i % 7}", category="Project", twitter_user_id=str(i))
+    repository.add_source_relationships([(f"user{i}", "extra") for i in range(0, 200, 3)])
+    repository._get_connection().execute("ANALYZE")
+    yield repository
+    repository.close()
+
+
+def _plans(repo, call):
+    """
+    Runs a repository call, captures the SELECTs it executes (with bound values inlined) and
+    returns their EXPLAIN QUERY PLAN details, so the test checks the SQL the code really runs.
+    """
+    conn = repo._get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert selects, "call did not run a SELECT"
+    return [
+        " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + statement))
+        for statement in selects
+    ]
+
+
+def _assert_no_full_scan(plan, *tables):
+    for table in tables:
+        assert f"SCAN {table}" not in plan, plan
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan, plan
+
+
+@pytest.mark.parametrize("name, call, expected", [
+    ("find_by_handle", lambda r: r.find_by_handle("USER5"),
+     "SEARCH processed_profiles USING INDEX sqlite_autoindex_processed_profiles_1 (twitter_handle=?)"),
+    ("find_by_user_id", lambda r: r.find_by_user_id("5"),
+     "SEARCH processed_profiles USING INDEX idx_profiles_user_id (twitter_user_id=?)"),
+    ("get_sources_for_profile", lambda r: r.get_sources_for_profile("user3"),
+     "SEARCH source_relationships USING COVERING INDEX idx_relationships_handle_date (twitter_handle=?)"),
+    ("is_eligible", lambda r: r.is_eligible("user5"),
+     "SEARCH processed_profiles USING INDEX sqlite_autoindex_processed_profiles_1 (twitter_handle=?)"),
+])
+def test_single_profile_lookups_use_indexes(repo, name, call, expected):
+    (plan,) = _plans(repo, lambda: call(repo))
+    assert expected in plan, f"{name}: {plan}"
+    _assert_no_full_scan(plan, "processed_profiles", "source_relationships")
+
+
+def test_get_processed_profile_joins_through_primary_keys(repo):
+    (plan,) = _plans(repo, lambda: repo.get_processed_profile("USER3", "Source3"))
+    assert "SEARCH sr USING COVERING INDEX" in plan
+    assert "SEARCH p USING INDEX sqlite_autoindex_processed_profiles_1 (twitter_handle=?)" in plan
+    _assert_no_full_scan(plan, "p", "sr")
+
+
+def test_batch_lookups_drive_from_the_batch_table(repo):
+    handles = [f"user{i}" for i in range(20)]
+    (profiles_plan,) = _plans(repo, lambda: repo.find_by_handles(handles))
+    (sources_plan,) = _plans(repo, lambda: repo.get_sources_for_profiles(handles))
+    (ids_plan,) = _plans(repo, lambda: repo.find_by_user_ids([str(i) for i in range(20)]))
+
+    assert "SEARCH p USING INDEX sqlite_autoindex_processed_profiles_1 (twitter_handle=?)" in profiles_plan
+    assert "SEARCH sr USING COVERING INDEX idx_relationships_handle_date (twitter_handle=?)" in sources_plan
+    assert "SEARCH processed_profiles USING INDEX idx_profiles_user_id (twitter_user_id=?)" in ids_plan
+    for plan in (profiles_plan, sources_plan):
+        _assert_no_full_scan(plan, "p", "sr")
+
+
+def test_stats_come_from_maintained_counters(repo):
+    db_path = repo.db_path
+    repo.rename_profile("3", "renamed3")
+    conn = repo._get_connection()
+    conn.execute("DELETE FROM source_relationships WHERE discovered_by_handle = 'extra' AND twitter_handle = 'user0'")
+
+    expected = (
+        conn.execute("SELECT COUNT(*) FROM processed_profiles").fetchone()[0],
+        conn.execute("SELECT COUNT(*) FROM source_relationships").fetchone()[0],
+        conn.execute("SELECT COUNT(DISTINCT discovered_by_handle) FROM source_relationships").fetchone()[0],
+    )
+    assert S3DatabaseSync._read_maintained_counters(conn.cursor()) == expected
+
+    stats = S3DatabaseSync._get_database_stats(db_path)
+    assert (stats["total_profiles"], stats["total_relationships"], stats["unique_sources"]) == expected == (200, 266, 8)
+
+    plan = " | ".join(
+        row[3] for row in conn.execute("EXPLAIN QUERY PLAN SELECT MAX(last_updated_date) FROM processed_profiles")
+    )
+    assert "SEARCH processed_profiles USING COVERING INDEX idx_profiles_last_updated" in plan
+
+
+def test_missing_triggers_fall_back_and_are_rebuilt(repo):
+    conn = sqlite3.connect(repo.db_path)
+    conn.execute("DROP TRIGGER trg_stats_profiles_insert")
+    conn.execute(
+        "INSERT INTO processed_profiles (twitter_handle, first_discovered_date, last_updated_date) "
+        "VALUES ('untracked', '2024-01-01', '2024-01-01')"
+    )
+    conn.commit()
+
+    # Counters are stale now; the stats fall back to counting instead of trusting them
+    assert S3DatabaseSync._read_maintained_counters(conn.cursor()) is None
+    assert S3DatabaseSync._get_database_stats(repo.db_path)["total_profiles"] == 201
+
+    apply_migrations(conn)
+    installed = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert set(STATS_TRIGGERS) <= installed
+    assert S3DatabaseSync._read_maintained_counters(conn.cursor())[0] == 201
+    conn.close()
@@ -0,0 +1,85 @@
+import gzip
+import os
+import threading
+
+from utils.raw_archive import ARCHIVE_ERRORS, ARCHIVE_OFF, RawResponseArchive, iter_records, read_index, read_record
+
+
+def _payload(i):
+    return {"data": {"user": {"result": {"timeline": {"instructions": [{"entries": [f"tweet {i}"] * 50}]}}}}}
+
+
+def test_archive_round_trip_with_index_and_rolling_segments(tmp_path):
+    archive = RawResponseArchive(str(tmp_path), max_segment_bytes=600)
+    archive.start(run_id="run1")
+    for i in range(10):
+        archive.record(f"user{i % 3}", "UserTweets", _payload(i), error=(i == 4), cursor="c" if i == 7 else None)
+    archive.close()
+
+    index = read_index(str(tmp_path))
+    assert len(index) == archive.records == 10
+    # Small segment limit: the run rolled over to several compressed segments
+    segments = {entry["segment"] for entry in index}
+    assert len(segments) > 1
+    assert all(os.path.exists(tmp_path / segment) for segment in segments)
+    assert all(entry["length"] < entry["raw_bytes"] for entry in index)
+
+    assert read_record(str(tmp_path), index[7])["payload"] == _payload(7)
+    assert read_record(str(tmp_path), index[7])["cursor"] == "c"
+    assert [r["payload"] for r in iter_records(str(tmp_path), handle="USER1")] == [_payload(1), _payload(4), _payload(7)]
+    assert [r["handle"] for r in iter_records(str(tmp_path), "run1", errors_only=True)] == ["user1"]
+
+
+def test_sampling_modes(tmp_path):
+    errors_only = RawResponseArchive(str(tmp_path / "errors"), mode=ARCHIVE_ERRORS)
+    assert errors_only.record("a", "UserTweets", {"ok": 1}) is False
+    assert errors_only.record("b", "UserTweets", {"error": "x"}, error=True) is True
+    errors_only.close()
+    assert [entry["handle"] for entry in read_index(str(tmp_path / "errors"))] == ["b"]
+
+    off = RawResponseArchive(str(tmp_path / "off"), mode=ARCHIVE_OFF)
+    assert off.record("c", "UserTweets", {"error": "x"}, error=True) is False
+    off.close()
+    assert not (tmp_path / "off").exists()
+
+    assert RawResponseArchive(str(tmp_path / "errors"), mode=" Errors ").mode == ARCHIVE_ERRORS
+    # An unrecognised value turns archiving off instead of meaning "all"
+    for value in ("none", "false"):
+        unknown = RawResponseArchive(str(tmp_path / "unknown"), mode=value)
+        assert unknown.mode == ARCHIVE_OFF
+        assert unknown.record("d", "UserTweets", {"error": "x"}, error=True) is False
+    assert not (tmp_path / "unknown").exists()
+
+
+def test_dead_writer_drops_instead_of_queueing(tmp_path):
+    blocked = tmp_path / "not_a_dir"
+    blocked.write_text("")  # makedirs fails: the writer thread dies on start
+    archive = RawResponseArchive(str(blocked / "raw"))
+    archive.start(run_id="run1")
+    archive._thread.join(timeout=5)
+
+    assert [archive.record("a", "UserTweets", _payload(i)) for i in range(3)] == [False] * 3
+    assert archive.dropped == 3
+    assert archive._queue.qsize() == 0
+    archive.close()
+
+
+def test_full_queue_drops_and_counts(tmp_path, monkeypatch):
+    release = threading.Event()
+    compress = gzip.compress
+
+    def slow_compress(data, compresslevel=9):
+        release.wait(timeout=5)
+        return compress(data, compresslevel=compresslevel)
+
+    monkeypatch.setattr("utils.raw_archive.gzip.compress", slow_compress)
+    archive = RawResponseArchive(str(tmp_path), max_queue=2)
+    archive.start(run_id="run1")
+
+    results = [archive.record("a", "UserTweets", _payload(i)) for i in range(6)]
+    release.set()
+    archive.close()
+
+    # The writer holds one entry, the queue two more; the rest are dropped
+    assert results.count(False) == archive.dropped >= 3
+    assert archive.records == results.count(True) == len(read_index(str(tmp_path)))
@@ -2,10 +2,13 @@
 Tests for the repository module.
 """
 
+import os
+import tempfile
 import unittest
 import sqlite3
 from unittest.mock import patch
 from db import repository
+from db.repository import Repository
 
 class TestRepository(unittest.TestCase):
     """Tests for the repository module."""
@@ -43,5 +46,55 @@ class TestRepository(unittest.TestCase):
 
     # Add more tests for other repository functions...
 
+
+class TestRepositoryConnection(unittest.TestCase):
+    """Tests for the persistent, WAL-mode connection handling."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.repo = Repository(db_name=os.path.join(self.tmp_dir.name, "test.db"))
+
+    def tearDown(self):
+        self.repo.close()
+        self.tmp_dir.cleanup()
+
+    def test_connection_is_reused_and_in_wal_mode(self):
+        """The same connection serves every query on a thread and runs in WAL mode."""
+        first = self.repo._get_connection()
+        self.repo.find_by_handle("nobody")
+        self.assertIs(first, self.repo._get_connection())
+        journal_mode = first.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(journal_mode.lower(), "wal")
+        self.assertEqual(first.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+
+    def test_record_and_find_profile_round_trip(self):
+        """Profiles written in a transaction are visible to later lookups."""
+        self.repo.record_new_profile("@Alice", "page-1", "Source", category="Project")
+        profile = self.repo.find_by_handle("alice")
+        self.assertEqual(profile["twitter_handle"], "alice")
+        self.assertEqual(profile["notion_page_id"], "page-1")
+        self.assertEqual(profile["category"], "Project")
+        sources = self.repo.get_sources_for_profile("ALICE")
+        self.assertEqual([s["discovered_by"] for s in sources], ["source"])
+
+    def test_failed_transaction_rolls_back(self):
+        """An exception inside a transaction leaves no partial writes behind."""
+        with self.assertRaises(RuntimeError):
+            with self.repo._transaction() as conn:
+                conn.execute(
+                    "INSERT INTO processed_profiles (twitter_handle, first_discovered_date, last_updated_date) "
+                    "VALUES ('bob', 'x', 'x')"
+                )
+                raise RuntimeError("boom")
+        self.assertIsNone(self.repo.find_by_handle("bob"))
+
+    def test_close_reconnects_lazily(self):
+        """close() releases connections and the next query opens a fresh one."""
+        first = self.repo._get_connection()
+        self.repo.close()
+        self.repo.record_new_profile("carol", None, "source")
+        self.assertIsNot(first, self.repo._get_connection())
+        self.assertIsNotNone(self.repo.find_by_handle("carol"))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime, timedelta
+
+from db.async_repository import AsyncRepository
+from db.repository import Repository
+from services.source_health_service import SourceHealthService
+
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def temp_repository(tmp_path, monkeypatch):
+    repo = Repository(db_name=str(tmp_path / "health.db"))
+    monkeypatch.setattr('services.source_health_service.async_repository', AsyncRepository(repo))
+    monkeypatch.setattr('services.source_health_service.SOURCE_HEALTH_RECHECK_BASE_DAYS', 1)
+    monkeypatch.setattr('services.source_health_service.SOURCE_HEALTH_RECHECK_MAX_DAYS', 8)
+    return repo
+
+
+async def test_recheck_interval_doubles_and_caps(monkeypatch):
+    monkeypatch.setattr('services.source_health_service.SOURCE_HEALTH_RECHECK_BASE_DAYS', 1)
+    monkeypatch.setattr('services.source_health_service.SOURCE_HEALTH_RECHECK_MAX_DAYS', 8)
+
+    assert [SourceHealthService.recheck_interval_days(n) for n in range(1, 7)] == [1, 2, 4, 8, 8, 8]
+
+
+async def test_protected_source_is_skipped_until_recheck(temp_repository):
+    await SourceHealthService.record_failure('PrivateAcct', 'protected', detail="Not authorized.")
+
+    health = await SourceHealthService.should_skip('privateacct')
+    assert health is not None
+    assert health['status'] == 'protected'
+    assert health['failure_count'] == 1
+
+    second = await SourceHealthService.record_failure('privateacct', 'protected')
+    assert second['failure_count'] == 2
+
+    # Once the re-check date has passed the source is tried again
+    past = (datetime.now() - timedelta(minutes=1)).isoformat()
+    temp_repository.upsert_source_health('privateacct', 'protected', 2, past)
+    assert await SourceHealthService.should_skip('privateacct') is None
+
+
+async def test_status_change_resets_failure_count(temp_repository):
+    await SourceHealthService.record_failure('gone', 'protected')
+    await SourceHealthService.record_failure('gone', 'protected')
+    result = await SourceHealthService.record_failure('gone', 'suspended')
+
+    assert result['failure_count'] == 1
+    assert temp_repository.get_source_health('gone')['status'] == 'suspended'
+
+
+async def test_record_healthy_respects_status_filter(temp_repository):
+    await SourceHealthService.record_failure('private', 'protected')
+    await SourceHealthService.record_failure('missing', 'not_found')
+
+    await SourceHealthService.record_healthy('private', statuses=SourceHealthService.LOOKUP_STATUSES)
+    await SourceHealthService.record_healthy('missing', statuses=SourceHealthService.LOOKUP_STATUSES)
+
+    remaining = await SourceHealthService.get_all()
+    assert set(remaining) == {'private'}
+
+
+async def test_lookup_failures_before_the_due_date_do_not_count(temp_repository):
+    """The count lookup sees an unavailable source on every run; only due re-checks add a failure"""
+    for _ in range(2):
+        await SourceHealthService.record_failure('gone', 'suspended', only_if_due=True)
+
+    health = temp_repository.get_source_health('gone')
+    assert health['failure_count'] == 1
+
+    past = (datetime.now() - timedelta(minutes=1)).isoformat()
+    temp_repository.upsert_source_health('gone', 'suspended', 1, past)
+    result = await SourceHealthService.record_failure('gone', 'suspended', only_if_due=True)
+    assert result['failure_count'] == 2
+
+    # A different status is recorded at once
+    result = await SourceHealthService.record_failure('gone', 'not_found', only_if_due=True)
+    assert result['failure_count'] == 1
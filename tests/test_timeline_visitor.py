@@ -0,0 +1,141 @@
+from api.timeline_visitor import (
+    BottomCursorVisitor,
+    NextCursorVisitor,
+    TimelineDecoder,
+    TweetIdVisitor,
+    TweetTextVisitor,
+    scan_timeline,
+    walk_timeline,
+)
+from conftest import tweet_entry, tweet_result
+
+
+def _timeline():
+    entries = [
+        tweet_entry(tweet_result(105, "newest")),
+        tweet_entry(tweet_result(104, "short", note="long note text")),
+        tweet_entry(tweet_result(103, "quoting", quoted=tweet_result(90, "quoted text"))),
+        {
+            "entryId": "profile-conversation-102",
+            "content": {
+                "items": [{"item": {"itemContent": {"tweet_results": {"result": tweet_result(102, "reply")}}}}],
+                "conversation_metadata": {"all_tweet_ids": ["100", "101", "102"]},
+            },
+        },
+        {"entryId": "cursor-top", "content": {"__typename": "TimelineTimelineCursor", "cursor_type": "Top", "value": "TOP"}},
+        {"entryId": "cursor-bottom", "content": {"__typename": "TimelineTimelineCursor", "cursor_type": "Bottom", "value": "BOTTOM"}},
+    ]
+    return {"data": {"timeline": {"instructions": [
+        {"__typename": "TimelinePinEntry", "entry": tweet_entry(tweet_result(80, "pinned"))},
+        {"__typename": "TimelineAddEntries", "entries": entries},
+    ]}}}
+
+
+def test_scan_collects_every_part_in_one_pass():
+    payload = _timeline()
+
+    scan = scan_timeline(
+        payload, bottom_cursor=True, next_cursor=True, tweet_ids=True, tweets=True, conversation_ids=True
+    )
+
+    assert scan.tweet_texts == ["pinned", "newest", "long note text", "quoting", "quoted text", "reply"]
+    assert [record["tweet_id"] for record in scan.tweet_records] == ["80", "105", "104", "103", "90", "102"]
+    assert scan.tweet_records[0] == {
+        "tweet_id": "80", "text": "pinned", "created_at": "Tue Mar 05 17:21:10 +0000 2024", "author_id": "42",
+    }
+    assert scan.bottom_cursor == scan.next_cursor == "BOTTOM"
+    # tweet_results hit, then the Tweet node itself (repeats kept; the quoted tweet only as a Tweet node)
+    assert scan.tweet_ids == ["80", "80", "105", "105", "104", "104", "103", "103", "90", "102", "102"]
+    assert [tweet["rest_id"] for tweet in scan.tweets] == ["80", "105", "104", "103", "90", "102"]
+    assert scan.conversation_ids == {"100", "101", "102"}
+    assert scan.page_signature() == scan_timeline(payload, texts=False, tweet_ids=True, direct=False).page_signature()
+
+
+def test_scan_stops_at_tweet_target():
+    scan = scan_timeline(_timeline(), bottom_cursor=True, max_tweets=2)
+
+    assert scan.tweet_texts == ["pinned", "newest"]
+    # The walk ended before the cursor entries: the caller already has enough tweets
+    assert scan.bottom_cursor is None
+
+
+def test_next_cursor_falls_back_to_cursor_named_fields():
+    payload = {"data": {"timeline": {"entries": [], "next_cursor": "NEXT"}}}
+
+    scan = scan_timeline(payload, texts=False, next_cursor=True, tweet_ids=True)
+
+    assert scan.next_cursor == "NEXT"
+    assert scan.tweet_ids == []
+    # No tweet ids: the signature hashes the whole payload
+    assert scan.page_signature() != scan_timeline({"data": {}}, texts=False, tweet_ids=True).page_signature()
+
+
+def test_direct_path_matches_generic_walk_and_counts_fallbacks():
+    payload = _timeline()
+    # An entry shape the decoder does not know (tweet under another key) goes to the generic walker
+    payload["data"]["timeline"]["instructions"][1]["entries"].insert(
+        0, {"entryId": "tweet-106", "content": {"tweetResult": {"result": tweet_result(106, "unknown shape")}}}
+    )
+    decoder = TimelineDecoder()
+
+    visitors = decoder.decode(payload, [TweetTextVisitor(), TweetIdVisitor(), BottomCursorVisitor()])
+    generic = walk_timeline(payload, [TweetTextVisitor(), TweetIdVisitor(), BottomCursorVisitor()])
+
+    assert visitors[0].records == generic[0].records
+    assert visitors[0].records[1]["text"] == "unknown shape"
+    assert visitors[1].ids == generic[1].ids
+    assert visitors[2].cursor == generic[2].cursor == "BOTTOM"
+    assert decoder.stats() == {"pages": 1, "direct_pages": 0, "fallback_pages": 1, "fallbacks": {"entry": 1}}
+
+
+def test_direct_path_without_instructions_falls_back():
+    decoder = TimelineDecoder()
+    payload = {"data": {"tweets": [tweet_result(1, "hello")]}}
+
+    visitors = decoder.decode(payload, [TweetTextVisitor()])
+
+    assert [record["text"] for record in visitors[0].records] == ["hello"]
+    assert decoder.stats()["fallbacks"] == {"no_instructions": 1}
+
+
+def test_direct_path_reads_snake_case_entries():
+    decoder = TimelineDecoder()
+    payload = {"data": {"timeline": {"instructions": [{"entries": [
+        {"entry_id": "tweet-1", "content": {"content": {"tweet_results": {"result": tweet_result(1, "snake")}}}},
+        {"content": {"__typename": "TimelineTimelineCursor", "cursor_type": "Bottom", "value": "CUR"}},
+    ]}]}}}
+
+    visitors = decoder.decode(payload, [TweetTextVisitor(), BottomCursorVisitor()])
+
+    assert [record["text"] for record in visitors[0].records] == ["snake"]
+    assert visitors[1].cursor == "CUR"
+    assert decoder.stats()["fallback_pages"] == 0
+
+
+def test_last_page_without_cursor_is_a_direct_decode():
+    decoder = TimelineDecoder()
+    payload = {"data": {"timeline": {"instructions": [{"entries": [
+        {"entryId": "tweet-1", "content": {"itemContent": {"tweet_results": {"result": tweet_result(1, "last")}}}},
+    ]}]}}}
+
+    visitors = decoder.decode(payload, [TweetTextVisitor(), BottomCursorVisitor(), NextCursorVisitor()])
+
+    assert [record["text"] for record in visitors[0].records] == ["last"]
+    assert visitors[1].cursor is None and visitors[2].cursor is None
+    assert decoder.stats() == {"pages": 1, "direct_pages": 1, "fallback_pages": 0, "fallbacks": {}}
+
+
+def test_cursor_beside_the_instructions_is_found_on_the_direct_path():
+    decoder = TimelineDecoder()
+    payload = {
+        "data": {"timeline": {"instructions": [{"entries": [
+            {"entryId": "tweet-1", "content": {"itemContent": {"tweet_results": {"result": tweet_result(1, "first")}}}},
+        ]}], "metadata": {"scribeConfig": {"page": "profile"}}}},
+        "next_cursor": "NC",
+    }
+
+    visitors = decoder.decode(payload, [TweetTextVisitor(), NextCursorVisitor()])
+
+    assert [record["text"] for record in visitors[0].records] == ["first"]
+    assert visitors[1].cursor == walk_timeline(payload, [NextCursorVisitor()])[0].cursor == "NC"
+    assert decoder.stats()["fallback_pages"] == 0
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+import api.twitter_posts as twitter_posts
+from api.twitter_posts import _fetch_and_filter_missing, _sanitize_tweet
+from db.tweet_cache import TweetCache
+from utils.tweet_record import TweetRecord
+from conftest import tweet_result
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TweetCache(db_name=str(tmp_path / "tweet_cache.db"))
+    yield cache
+    cache.close()
+
+
+def test_round_trip_and_hit_rate(cache):
+    record = _sanitize_tweet(tweet_result(10))
+    cache.put_many([record])
+
+    found = cache.get_many(["10", "11"])
+
+    assert list(found) == ["10"]
+    assert isinstance(found["10"], TweetRecord)
+    assert found["10"] == record
+    assert (cache.hits, cache.misses, cache.stored) == (1, 1, 1)
+    assert cache.hit_rate() == 0.5
+
+
+def test_stale_entries_are_misses(tmp_path):
+    cache = TweetCache(db_name=str(tmp_path / "tweet_cache.db"), max_age_days=1)
+    cache.put_many([_sanitize_tweet(tweet_result(10))])
+    cache._connection().execute("UPDATE tweets SET fetched_at = ?", (time.time() - 2 * 86400,))
+
+    assert cache.get_many(["10"]) == {}
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_backfill_serves_cached_tweets_and_fills_the_rest(cache, monkeypatch):
+    cache.put_many([_sanitize_tweet(tweet_result(1))])
+    requested = []
+
+    async def fake_fetch(tweet_ids):
+        requested.append(sorted(tweet_ids))
+        return {"data": {"tweetResult": [{"result": tweet_result(tid)} for tid in tweet_ids]}}
+
+    monkeypatch.setattr(twitter_posts, "fetch_tweets_by_ids", fake_fetch)
+
+    fetched = await _fetch_and_filter_missing("42", ["1", "2", "3"], cache=cache)
+
+    assert sorted(fetched) == ["1", "2", "3"]
+    assert requested == [["2", "3"]]
+
+    # A later run (any account) finds all three in the cache
+    requested.clear()
+    again = await _fetch_and_filter_missing("99", ["3", "2", "1"], cache=cache)
+    assert requested == []
+    assert again == fetched
+    assert (cache.hits, cache.misses, cache.stored) == (4, 2, 3)
+
+
+@pytest.mark.asyncio
+async def test_no_missing_ids_does_not_open_the_cache(monkeypatch):
+    def fail():
+        raise AssertionError("tweet cache opened without missing ids")
+
+    monkeypatch.setattr(twitter_posts, "_get_tweet_cache", fail)
+
+    assert await _fetch_and_filter_missing("42", []) == {}
@@ -0,0 +1,35 @@
+from api.twitter_posts import _assemble_ai_ready_output, _sanitize_tweet
+from utils.tweet_record import TweetRecord
+from conftest import tweet_result
+
+
+def test_sanitize_tweet_returns_compact_record():
+    record = _sanitize_tweet(tweet_result(10))
+
+    assert isinstance(record, TweetRecord)
+    assert not hasattr(record, "__dict__")
+    assert record.urls == (("example.com", "https://example.com", "https://t.co/x"),)
+    assert record.to_dict()["mentions"] == [{"screenName": "bob", "id": "7"}]
+    assert record.to_minimal_dict()["author"] == {"id": "42", "screenName": "alice", "name": "Alice"}
+    assert record.to_minimal_dict()["urls"] == [
+        {"displayUrl": "example.com", "expandedUrl": "https://example.com", "url": "https://t.co/x"}
+    ]
+
+
+def test_clean_output_threads_records():
+    hydrated = {
+        str(tweet_id): _sanitize_tweet(tweet_result(tweet_id, reply_to=reply_to, likes=tweet_id))
+        for tweet_id, reply_to in ((10, None), (11, 10), (12, 11), (13, 10), (20, 5))
+    }
+
+    payload = _assemble_ai_ready_output("alice", "42", None, "raw.json", [], hydrated, {})
+
+    assert [t["id"] for t in payload["tweetsFlat"]] == ["20", "13", "12", "11", "10"]
+    roots = payload["threads"]
+    assert [t["id"] for t in roots] == ["20", "10"]
+    assert roots[0]["orphanReply"] is True and roots[0]["replies"] == []
+    assert [r["id"] for r in roots[1]["replies"]] == ["11", "13"]
+    assert [r["id"] for r in roots[1]["replies"][0]["replies"]] == ["12"]
+    assert payload["summary"]["orphanReplies"] == ["20"]
+    assert payload["summary"]["engagementTotals"]["likeCountTotal"] == 66
+    assert payload["summary"]["tweetBreakdown"] == {"originals": 1, "replies": 4, "quotes": 0}
@@ -0,0 +1,93 @@
+from api.timeline_visitor import scan_timeline
+from db.repository import Repository
+import services.tweet_store_service as tweet_store_service
+from services.tweet_store_service import TweetStoreService
+from conftest import tweet_entry, tweet_result
+
+
+def _timeline(*results):
+    entries = [tweet_entry(r) for r in results]
+    return {"data": {"user": {"result": {"timeline": {"instructions": [{"entries": entries}]}}}}}
+
+
+def test_records_key_each_text_by_its_tweet():
+    data = _timeline(
+        tweet_result(30, "plain"),
+        tweet_result(20, "short", note="long note text"),
+        tweet_result(10, "quoting", quoted=tweet_result(5, "quoted")),
+    )
+    records = scan_timeline(data).tweet_records
+
+    assert [r["text"] for r in records] == ["plain", "long note text", "quoting", "quoted"]
+    assert [r["tweet_id"] for r in records] == ["30", "20", "10", "5"]
+    assert records[1]["created_at"] == "Tue Mar 05 17:21:10 +0000 2024"
+
+
+def test_store_upserts_and_keeps_newest(tmp_path):
+    repo = Repository(db_name=str(tmp_path / "tweets.db"))
+    tweets = [{"tweet_id": str(i), "text": f"t{i}", "created_at": None} for i in range(1, 8)]
+    assert repo.save_user_tweets("42", tweets + [{"tweet_id": None, "text": "no id"}], keep=5) == 7
+
+    stored = repo.get_user_tweets("42")
+    assert [t["tweet_id"] for t in stored] == ["7", "6", "5", "4", "3"]
+
+    repo.save_user_tweets("42", [{"tweet_id": "7", "text": "edited", "created_at": "now"}], keep=5)
+    assert repo.get_user_tweets("42", limit=1) == [{"tweet_id": "7", "text": "edited", "created_at": "now"}]
+    assert repo.get_user_tweets("other") == []
+    repo.close()
+
+
+def test_merge_and_known_tweet_detection():
+    stored = [{"tweet_id": "9", "text": "old 9"}, {"tweet_id": "8", "text": "old 8"}]
+    fetched = [
+        {"tweet_id": "3", "text": "pinned"},
+        {"tweet_id": "12", "text": "new 12"},
+        {"tweet_id": "9", "text": "old 9 again"},
+        {"tweet_id": None, "text": "no id"},
+    ]
+
+    assert TweetStoreService.reached_known(fetched, {"9", "8"})
+    assert not TweetStoreService.reached_known(fetched[:2], {"9", "8"})
+    assert TweetStoreService.merge(fetched, stored) == ["new 12", "old 9 again", "old 8", "pinned", "no id"]
+    assert TweetStoreService.merge(fetched, stored, limit=2) == ["new 12", "old 9 again"]
+
+
+def test_retweet_of_a_stored_tweet_is_not_the_profiles_own():
+    original = tweet_result(9, "someone else's tweet", author_id="7")
+    retweet = tweet_result(15, "RT @bob: someone else's tweet")
+    retweet["legacy"]["user_id_str"] = "42"
+    retweet["retweeted_status_result"] = {"result": original}
+    own = tweet_result(12, "own tweet")
+    own["legacy"]["user_id_str"] = "42"
+    records = scan_timeline(_timeline(retweet, own)["data"]).tweet_records
+    assert {r["tweet_id"]: r["author_id"] for r in records} == {"15": "42", "9": "7", "12": "42"}
+
+    own_records = TweetStoreService.own_tweets(records, 42)
+
+    # Tweet 9 was stored for another profile; it must not stop pagination or be merged / stored here
+    assert TweetStoreService.reached_known(records, {"9"})
+    assert not TweetStoreService.reached_known(own_records, {"9"})
+    assert [r["tweet_id"] for r in own_records] == ["15", "12"]
+    assert TweetStoreService.merge(own_records, []) == ["RT @bob: someone else's tweet", "own tweet"]
+
+
+def test_ai_input_keeps_quoted_tweets_by_other_authors(monkeypatch):
+    quoted = tweet_result(5, "the quoted take", author_id="7")
+    records = scan_timeline(_timeline(tweet_result(30, "plain"), tweet_result(20, "so true ->", quoted=quoted))).tweet_records
+
+    # Only the profile's own tweets are stored / matched against stored ones ...
+    assert [r["tweet_id"] for r in TweetStoreService.own_tweets(records, 42)] == ["30", "20"]
+    # ... but the AI sees every fetched text
+    assert TweetStoreService.merge(records, [{"tweet_id": "3", "text": "stored"}]) == [
+        "plain", "so true ->", "the quoted take", "stored",
+    ]
+    monkeypatch.setattr(tweet_store_service, "TWEET_STORE_ENABLED", False)
+    assert TweetStoreService.merge(records, []) == ["plain", "so true ->", "the quoted take"]
+
+
+def test_cap_only_applies_with_the_store_enabled(monkeypatch):
+    records = scan_timeline(_timeline(*[tweet_result(i) for i in range(50, 0, -1)])).tweet_records
+
+    assert len(TweetStoreService.merge(records, [], limit=40)) == 40
+    monkeypatch.setattr(tweet_store_service, "TWEET_STORE_ENABLED", False)
+    assert len(TweetStoreService.merge(records, [], limit=40)) == 50
@@ -1,12 +1,18 @@
 import json
 
+from api.timeline_visitor import scan_timeline
 from api.twitter_posts import (
-    _extract_next_cursor,
-    _compute_page_signature,
+    _load_raw_file,
+    _stream_raw_file,
     _write_partial_results,
 )
 
 
+def _next_cursor(payload):
+    # What fetch_all_tweets_and_replies pages with
+    return scan_timeline(payload, texts=False, next_cursor=True).next_cursor
+
+
 def test_extract_next_cursor_prefers_bottom_snake_case():
     payload = {
         "data": {
@@ -36,7 +42,7 @@ def test_extract_next_cursor_prefers_bottom_snake_case():
         }
     }
 
-    assert _extract_next_cursor(payload) == "BOTTOM_CURSOR_VALUE"
+    assert _next_cursor(payload) == "BOTTOM_CURSOR_VALUE"
 
 
 def test_extract_next_cursor_supports_camel_case():
@@ -50,7 +56,7 @@ def test_extract_next_cursor_supports_camel_case():
         },
     }
 
-    assert _extract_next_cursor(payload) == "CAMEL_BOTTOM_VALUE"
+    assert _next_cursor(payload) == "CAMEL_BOTTOM_VALUE"
 
 
 def test_extract_next_cursor_fallbacks_to_other_cursor_fields():
@@ -67,7 +73,7 @@ def test_extract_next_cursor_fallbacks_to_other_cursor_fields():
         }
     }
 
-    assert _extract_next_cursor(payload) == "FALLBACK_CURSOR"
+    assert _next_cursor(payload) == "FALLBACK_CURSOR"
 
 
 def test_write_partial_results_includes_page_number(tmp_path):
@@ -98,12 +104,18 @@ def test_write_partial_results_includes_page_number(tmp_path):
     assert payload["tweetsAndReplies"]["pages"][0]["pageNumber"] == 1
 
 
+def _page_signature(data):
+    # What fetch_all_tweets_and_replies stores as pageSignature
+    scan = scan_timeline(data, texts=False, tweet_ids=True)
+    return scan.page_signature(sorted(set(scan.tweet_ids)))
+
+
 def test_compute_page_signature_stable_and_order_insensitive():
     data_a = {"b": 2, "a": 1, "nested": {"x": 10, "y": [1, 2, 3]}}
     data_b = {"nested": {"y": [1, 2, 3], "x": 10}, "a": 1, "b": 2}
 
-    sig_a = _compute_page_signature(data_a)
-    sig_b = _compute_page_signature(data_b)
+    sig_a = _page_signature(data_a)
+    sig_b = _page_signature(data_b)
 
     assert sig_a == sig_b
 
@@ -155,7 +167,35 @@ def test_compute_page_signature_prefers_tweet_ids_over_cursor_changes():
         }
     }
 
-    sig1 = _compute_page_signature(page1)
-    sig2 = _compute_page_signature(page2)
+    sig1 = _page_signature(page1)
+    sig2 = _page_signature(page2)
 
     assert sig1 == sig2
+
+
+def test_scan_tweet_ids_keep_document_order_in_deep_payloads():
+    tweet = {"__typename": "Tweet", "rest_id": "1", "legacy": {"full_text": "root"}}
+    for tweet_id in range(2, 101):
+        tweet = {"__typename": "Tweet", "rest_id": str(tweet_id), "quoted_status_result": {"result": tweet}}
+    payload = {"entries": [{"tweet_results": {"result": tweet}}, {"tweet_results": {"result": {"tweet": {"rest_id": "7"}}}}]}
+
+    scan = scan_timeline(payload, texts=False, tweet_ids=True)
+
+    # tweet_results hit, then the Tweet node itself, then every quoted tweet down the chain
+    assert scan.tweet_ids == ["100"] + [str(tweet_id) for tweet_id in range(100, 0, -1)] + ["7"]
+    assert scan.page_signature(sorted(set(scan.tweet_ids))) == scan.page_signature()
+
+
+def test_stream_raw_file_reads_header_and_streams_pages(tmp_path):
+    filename = tmp_path / "alice_raw.json"
+    pages = [{"pageNumber": n, "data": {"timeline": {"instructions": []}}} for n in range(1, 4)]
+    _write_partial_results(str(filename), "alice", "42", {"rest_id": "42"}, pages, "2024-01-01T00:00:00")
+
+    username, user_id, fetched_at, streamed, user_payload = _stream_raw_file(str(filename))
+
+    assert (username, user_id, fetched_at, user_payload) == ("alice", "42", "2024-01-01T00:00:00", {"rest_id": "42"})
+    assert len(streamed) == 3
+    assert list(streamed) == pages
+    # Each iteration re-reads the file
+    assert list(streamed) == pages
+    assert _load_raw_file(str(filename))[3] == pages
@@ -0,0 +1,196 @@
+import json
+import os
+
+import pytest
+import requests
+
+import api.twitter_posts as twitter_posts
+from api.twitter_posts import PaginationState, STOP_HTTP_ERROR, STOP_NO_NEXT_CURSOR
+from utils.page_log import PageLog, PageLogReader
+from conftest import tweet_entry, tweet_result
+
+PAGES = 5
+
+
+def _timeline(page_number):
+    """Page n holds tweet n and points at cursor c<n>; the last page has no bottom cursor"""
+    entries = [tweet_entry(tweet_result(page_number))]
+    if page_number < PAGES:
+        entries.append({"entryId": f"cursor-bottom-{page_number}", "content": {"cursorType": "Bottom", "value": f"c{page_number}"}})
+    return {"timeline": {"instructions": [{"type": "TimelineAddEntries", "entries": entries}]}}
+
+
+@pytest.fixture
+def fake_api(tmp_path, monkeypatch):
+    monkeypatch.setattr(twitter_posts, "ANALYSIS_DIR", str(tmp_path))
+    monkeypatch.setattr(twitter_posts.asyncio, "sleep", lambda _: _noop())
+    requested = []
+    fail_at = {"cursor": None}
+
+    async def fake_user_result(screen_name):
+        return "42", {"rest_id": "42"}
+
+    async def fake_request(fn):
+        return fn()
+
+    def fake_http(options):
+        cursor = options["params"].get("cursor")
+        requested.append(cursor)
+        if cursor is not None and cursor == fail_at["cursor"]:
+            response = requests.Response()
+            response.status_code = 429
+            raise requests.exceptions.HTTPError("429 Too Many Requests", response=response)
+        page_number = int(cursor[1:]) + 1 if cursor else 1
+        return {"data": _timeline(page_number)}
+
+    monkeypatch.setattr(twitter_posts, "fetch_user_result", fake_user_result)
+    monkeypatch.setattr(twitter_posts, "throttled_rapid_api_request", fake_request)
+    monkeypatch.setattr(twitter_posts, "make_http_request", fake_http)
+    return requested, fail_at
+
+
+async def _noop():
+    return None
+
+
+def _checkpoints(tmp_path):
+    return [p for p in os.listdir(tmp_path) if p.endswith(twitter_posts.CHECKPOINT_SUFFIX)]
+
+
+@pytest.mark.asyncio
+async def test_resume_continues_after_stall_without_repeating_requests(tmp_path, fake_api):
+    requested, fail_at = fake_api
+    fail_at["cursor"] = "c3"
+
+    await twitter_posts.run_full_flow("alice")
+
+    assert requested == [None, "c1", "c2", "c3"]
+    [checkpoint_name] = _checkpoints(tmp_path)
+    checkpoint = json.loads((tmp_path / checkpoint_name).read_text())
+    assert checkpoint["pageCount"] == 3
+    assert checkpoint["cursor"] == "c3"
+    assert checkpoint["complete"] is False and checkpoint["stopReason"] == STOP_HTTP_ERROR
+    assert checkpoint["seenTweetIdCount"] == 3
+
+    requested.clear()
+    fail_at["cursor"] = None
+    await twitter_posts.run_full_flow("alice", resume=True)
+
+    assert requested == ["c3", "c4"]
+    assert _checkpoints(tmp_path) == []
+    pages = list(PageLogReader(checkpoint["pageLog"]))
+    assert [p["pageNumber"] for p in pages] == [1, 2, 3, 4, 5]
+    assert [p["newTweetIds"] for p in pages] == [["1"], ["2"], ["3"], ["4"], ["5"]]
+    # The resumed run keeps the run's timestamp, so its clean output replaces the partial one
+    [clean] = [name for name in os.listdir(tmp_path) if name.endswith("_clean.json")]
+    assert json.loads((tmp_path / clean).read_text())["summary"]["totalTweets"] == 5
+
+
+@pytest.mark.asyncio
+async def test_resume_without_checkpoint_starts_a_new_run(tmp_path, fake_api):
+    requested, _ = fake_api
+
+    await twitter_posts.run_full_flow("alice", resume=True)
+
+    assert requested == [None, "c1", "c2", "c3", "c4"]
+    assert _checkpoints(tmp_path) == []
+
+
+def test_replay_matches_live_state():
+    live = PaginationState()
+    records = []
+    seen = set()
+    for n in range(1, PAGES + 1):
+        next_cursor = f"c{n}" if n < PAGES else None
+        record = {"pageNumber": n, "nextCursor": next_cursor, "pageSignature": f"s{n}", "newTweetIds": [str(n)]}
+        records.append(record)
+        live.advance(record)
+        seen.add(str(n))
+
+    replayed = PaginationState.replay(records)
+
+    assert replayed == live
+    assert replayed.complete and replayed.stop_reason == STOP_NO_NEXT_CURSOR
+    assert replayed.seen_tweet_ids == seen - {str(PAGES)}
+
+
+@pytest.mark.asyncio
+async def test_resume_after_log_and_checkpoint_lost_unsynced_pages(tmp_path, fake_api, monkeypatch):
+    """Power loss: the log and the checkpoint both fall back to the last fsync (page 2 of 3)"""
+    requested, fail_at = fake_api
+    monkeypatch.setattr(twitter_posts, "PageLog", lambda path: PageLog(path, fsync_pages=2))
+    snapshots = []
+    write_checkpoint = twitter_posts._write_checkpoint
+
+    def recording_write_checkpoint(path, *args):
+        write_checkpoint(path, *args)
+        log_path = json.loads(open(path).read())["pageLog"]
+        snapshots.append((open(path).read(), os.path.getsize(log_path)))
+
+    monkeypatch.setattr(twitter_posts, "_write_checkpoint", recording_write_checkpoint)
+    fail_at["cursor"] = "c3"
+    await twitter_posts.run_full_flow("alice")
+
+    # One checkpoint after the header, one at the page 2 fsync, one when pagination stopped
+    assert len(snapshots) == 3
+    assert json.loads(snapshots[0][0])["pageCount"] == 0
+    checkpoint_text, log_size = snapshots[1]
+    checkpoint = json.loads(checkpoint_text)
+    assert checkpoint["pageCount"] == 2 and checkpoint["cursor"] == "c2"
+    [checkpoint_name] = _checkpoints(tmp_path)
+    (tmp_path / checkpoint_name).write_text(checkpoint_text)
+    with open(checkpoint["pageLog"], "r+b") as f:
+        f.truncate(log_size)
+        f.seek(0, os.SEEK_END)
+        f.write(b'{"type":"page","page":{"pageNum')  # torn line of page 3
+
+    requested.clear()
+    fail_at["cursor"] = None
+    await twitter_posts.run_full_flow("alice", resume=True)
+
+    assert requested == ["c2", "c3", "c4"]
+    assert [p["pageNumber"] for p in PageLogReader(checkpoint["pageLog"])] == [1, 2, 3, 4, 5]
+    assert _checkpoints(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_resume_after_kill_before_the_first_fsync(tmp_path, fake_api, monkeypatch):
+    """SIGKILL before page 1 was fsynced: only the header and the first checkpoint survive"""
+    requested, fail_at = fake_api
+    snapshots = []
+    write_checkpoint = twitter_posts._write_checkpoint
+
+    def recording_write_checkpoint(path, *args):
+        write_checkpoint(path, *args)
+        log_path = json.loads(open(path).read())["pageLog"]
+        snapshots.append((open(path).read(), os.path.getsize(log_path)))
+
+    monkeypatch.setattr(twitter_posts, "_write_checkpoint", recording_write_checkpoint)
+    fail_at["cursor"] = "c3"
+    await twitter_posts.run_full_flow("alice")
+
+    checkpoint_text, log_size = snapshots[0]
+    checkpoint = json.loads(checkpoint_text)
+    assert checkpoint["pageCount"] == 0 and checkpoint["cursor"] is None
+    [checkpoint_name] = _checkpoints(tmp_path)
+    (tmp_path / checkpoint_name).write_text(checkpoint_text)
+    with open(checkpoint["pageLog"], "r+b") as f:
+        f.truncate(log_size)
+
+    lookups = []
+    fetch_user_result = twitter_posts.fetch_user_result
+
+    async def counting_fetch_user_result(screen_name):
+        lookups.append(screen_name)
+        return await fetch_user_result(screen_name)
+
+    monkeypatch.setattr(twitter_posts, "fetch_user_result", counting_fetch_user_result)
+    requested.clear()
+    fail_at["cursor"] = None
+    await twitter_posts.run_full_flow("alice", resume=True)
+
+    # The run was found and continued in its own log, not started over under a new one
+    assert lookups == []
+    assert requested == [None, "c1", "c2", "c3", "c4"]
+    assert [p["pageNumber"] for p in PageLogReader(checkpoint["pageLog"])] == [1, 2, 3, 4, 5]
+    assert _checkpoints(tmp_path) == []
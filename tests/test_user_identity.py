@@ -0,0 +1,75 @@
+import pytest
+
+from db.async_repository import AsyncRepository
+from db.dedup_index import DedupIndex
+from db.repository import Repository
+from services.deduplication_service import DeduplicationService
+
+
+pytestmark = pytest.mark.asyncio
+
+OLD_ACCOUNT = "Mon Jan 01 00:00:00 +0000 2018"
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    repository = Repository(db_name=str(tmp_path / "identity.db"))
+    repository.record_new_profile("OldName", "page-1", "sourcea", category="Project", twitter_user_id="1001")
+    monkeypatch.setattr('services.deduplication_service.async_repository', AsyncRepository(repository))
+    monkeypatch.setattr('services.deduplication_service.dedup_index', DedupIndex())
+    yield repository
+    repository.close()
+
+
+async def test_renamed_account_is_recognised_by_user_id(repo):
+    decision = await DeduplicationService.process_profile("NewName", "sourceb", OLD_ACCOUNT, "1001")
+
+    assert decision["isNew"] is False
+    assert decision["skipReason"] == "seen_recently"
+    assert decision["renamedFrom"] == "oldname"
+    assert sorted(s["discovered_by"] for s in decision["sources"]) == ["sourcea", "sourceb"]
+
+    assert repo.find_by_handle("oldname") is None
+    moved = repo.find_by_handle("newname")
+    assert moved["twitter_user_id"] == "1001"
+    assert moved["notion_page_id"] == "page-1"
+    assert [h["twitter_handle"] for h in repo.get_handle_history("1001")] == ["oldname", "newname"]
+
+
+async def test_batch_and_index_paths_recognise_renames(repo, monkeypatch):
+    batch = await DeduplicationService.process_profiles([
+        ("Renamed", "sourceb", OLD_ACCOUNT, "1001"),
+        ("someoneelse", "sourceb", OLD_ACCOUNT, "2002"),
+    ])
+    assert batch[0]["renamedFrom"] == "oldname"
+    assert batch[1] == {"isNew": True}
+
+    index = DedupIndex()
+    index.load(repo)
+    monkeypatch.setattr('services.deduplication_service.dedup_index', index)
+    decision = await DeduplicationService.process_profile("RenamedAgain", "sourcec", OLD_ACCOUNT, "1001")
+    assert decision["renamedFrom"] == "renamed"
+    assert index.get("renamedagain")["category"] == "Project"
+    assert index.get("renamed") is None
+    assert repo.find_by_user_id("1001")["twitter_handle"] == "renamedagain"
+
+
+async def test_rename_onto_taken_handle_keeps_existing_rows(repo):
+    repo.record_new_profile("taken", None, "sourcea", category="Project", twitter_user_id="3003")
+
+    decision = await DeduplicationService.process_profile("taken", "sourceb", OLD_ACCOUNT, "1001")
+
+    # Matched by id; the handle collision is left alone rather than merging two accounts
+    assert decision["isNew"] is False
+    assert "renamedFrom" not in decision
+    assert repo.find_by_handle("oldname")["twitter_user_id"] == "1001"
+    assert repo.find_by_handle("taken")["twitter_user_id"] == "3003"
+
+
+async def test_user_id_batch_is_separate_from_the_handle_batch(repo):
+    repo.record_new_profile("Other", None, "sourcea", twitter_user_id="2002")
+
+    assert repo.find_by_handles(["OLDNAME"])["oldname"]["twitter_user_id"] == "1001"
+    profiles = repo.find_by_user_ids([1001, "2002", "404"])
+    assert {user_id: p["twitter_handle"] for user_id, p in profiles.items()} == {"1001": "oldname", "2002": "other"}
+    assert repo.find_by_handles(["other"])["other"]["twitter_user_id"] == "2002"
@@ -0,0 +1,37 @@
+import json
+
+from api.twitter_parser import simplify_twitter_data
+from utils.work_item import ProfileWorkItem
+
+
+def _item():
+    return ProfileWorkItem(
+        profile={"screen_name": "builder", "id_str": "42", "description": "Building things"},
+        tweets=[{"full_text": "shipping today"}, {"text": "gm"}, "plain text tweet"],
+        source_username="vc_fund",
+    )
+
+
+def test_tweets_file_round_trip(tmp_path):
+    item = _item()
+    path = item.write_file(str(tmp_path))
+
+    assert path == str(tmp_path / "builder_tweets.json") == item.tweets_file
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"profile": item.profile, "tweets": item.tweets, "sourceUsername": "vc_fund"}
+
+    loaded = ProfileWorkItem.from_file(path)
+    assert loaded == item
+
+
+def test_work_item_feeds_the_parser_directly():
+    simplified = simplify_twitter_data(_item().to_dict())
+
+    assert simplified["profile"]["user_id"] == "42"
+    assert simplified["tweets"] == ["shipping today", "gm", "plain text tweet"]
+    assert simplified["sourceUsername"] == "vc_fund"
+
+
+def test_complexity_counts_bio_and_tweet_text():
+    assert _item().complexity == len("Building things") + len("shipping today") + len("gm") + len("plain text tweet")
+    assert ProfileWorkItem(profile={"screen_name": "empty"}).complexity == 0
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+
+from utils.worker_pool import WorkerPool
+
+
+@pytest.mark.asyncio
+async def test_straggler_does_not_hold_back_other_jobs():
+    finished = []
+
+    async def handler(name, delay):
+        await asyncio.sleep(delay)
+        finished.append(name)
+        return name
+
+    pool = WorkerPool(handler, workers=2)
+    await pool.submit("slow", 0.3)
+    for i in range(6):
+        await pool.submit(f"fast{i}", 0.01)
+
+    # With gather() over chunks of 2, fast1..fast5 would wait for the slow job's chunk
+    await asyncio.sleep(0.15)
+    assert finished == [f"fast{i}" for i in range(6)]
+
+    stats = await pool.join()
+    assert finished[-1] == "slow"
+    assert (stats["submitted"], stats["completed"], stats["failed"]) == (7, 7, 0)
+    assert stats["peak_busy"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_are_counted_and_reported():
+    results = []
+
+    async def handler(value):
+        if value % 3 == 0:
+            raise ValueError(f"bad {value}")
+        return value * 10
+
+    pool = WorkerPool(handler, workers=3, on_result=lambda args, result, error: results.append((args[0], result, error)))
+    for value in range(1, 10):
+        await pool.submit(value)
+    stats = await pool.join()
+
+    assert stats["failed"] == 3
+    assert stats["completed"] == 9
+    assert stats["peak_busy"] <= 3
+    assert sorted(v for v, result, error in results if error is None) == [1, 2, 4, 5, 7, 8]
+    assert all(isinstance(error, ValueError) and result is None for v, result, error in results if v % 3 == 0)
+
+
+@pytest.mark.asyncio
+async def test_join_without_jobs_returns_empty_stats():
+    async def handler():
+        return None
+
+    stats = await WorkerPool(handler, workers=4).join()
+    assert (stats["submitted"], stats["completed"], stats["peak_busy"]) == (0, 0, 0)
+
+
+@pytest.mark.asyncio
+async def test_chained_pools_overlap_stages_with_bounded_queues():
+    events = []
+
+    async def second(item):
+        events.append(("second", item))
+        await asyncio.sleep(0.01)
+
+    downstream = WorkerPool(second, workers=1, queue_size=2)
+
+    async def first(item):
+        await asyncio.sleep(0.01)
+        events.append(("first", item))
+        await downstream.submit(item)
+
+    upstream = WorkerPool(first, workers=2, queue_size=2)
+    for item in range(8):
+        await upstream.submit(item)
+        # A full queue makes the submitter wait, so waiting work stays bounded
+        assert upstream.pending() <= 2 and downstream.pending() <= 2
+
+    await upstream.join()
+    await downstream.join()
+
+    # The downstream stage started long before the upstream one had finished everything
+    first_done = [i for i, (stage, _) in enumerate(events) if stage == "first"]
+    first_second = next(i for i, (stage, _) in enumerate(events) if stage == "second")
+    assert first_second < first_done[-1]
+    assert sorted(item for stage, item in events if stage == "second") == list(range(8))
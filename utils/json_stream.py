@@ -0,0 +1,104 @@
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class JsonStream:
+    """
+    Incremental JSON reader over a text file, for documents too large to json.load at once.
+    Containers are entered token by token (object_keys / array_items); any value can be decoded
+    whole with value(). Only the value being decoded (plus one read chunk) is held in memory.
+
+        for key in stream.object_keys():
+            if key == 'pages':
+                for _ in stream.array_items():
+                    page = stream.value()
+            else:
+                stream.value()
+    """
+
+    def __init__(self, fp, chunk_size=1 << 20):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, size=None):
+        """Drops the consumed part of the buffer and appends the next chunk; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.fp.read(size or self.chunk_size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+            return False
+        return True
+
+    def _peek(self):
+        """Next non-whitespace character ('' at end of file), without consuming it"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decodes the next complete value"""
+        self._peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+                # A value that ends with the buffer may continue in the next chunk (e.g. a number)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow the read size so a large value is re-scanned only a logarithmic number of times
+            self._fill(size)
+            size *= 2
+
+    def object_keys(self):
+        """Yields the keys of the next object; after each key the caller consumes its value"""
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+            separator = self._peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' in JSON stream, found {separator or 'end of file'!r}")
+
+    def array_items(self):
+        """Yields once per element of the next array; each time the caller consumes the element"""
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            separator = self._peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON stream, found {separator or 'end of file'!r}")
@@ -0,0 +1,158 @@
+import json
+import os
+
+from config import PAGE_LOG_FSYNC_PAGES
+
+PAGE_LOG_SUFFIX = '.pages.jsonl'
+
+HEADER_RECORD = 'header'
+PAGE_RECORD = 'page'
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+class PageLog:
+    """
+    Append-only JSONL log of a pagination run: one header record (username, userId, fetchedAt, user),
+    then one compact record per page. Each append writes and flushes a single line, so saving page n
+    costs the size of page n instead of rewriting pages 1..n; fsync runs every fsync_pages pages and on close.
+    A line is only committed once its trailing newline is written: a torn last line (crash mid-write)
+    is ignored by PageLogReader.
+    """
+
+    def __init__(self, path, fsync_pages=PAGE_LOG_FSYNC_PAGES):
+        self.path = path
+        self.fsync_pages = max(1, fsync_pages)
+        self.pages = 0
+        self.bytes_written = 0
+        self._unsynced = 0
+        self._file = None
+
+    def open(self, header):
+        """Starts a new log (truncating any previous file) with its header record"""
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._write({"type": HEADER_RECORD, **header})
+        self._sync()
+
+    def reopen(self):
+        """Continues an existing log (--resume): drops a torn last line, then appends after the committed records"""
+        with open(self.path, 'rb+') as f:
+            f.truncate(_committed_size(f))
+        self.pages = len(PageLogReader(self.path))
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, page):
+        """Writes one page record; returns True when this append also fsynced the log (every fsync_pages pages)"""
+        self._write({"type": PAGE_RECORD, "page": page})
+        self.pages += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_pages:
+            self._sync()
+            return True
+        return False
+
+    def close(self):
+        if not self._file:
+            return
+        self._sync()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, record):
+        line = _dumps(record) + '\n'
+        self._file.write(line)
+        self._file.flush()
+        self.bytes_written += len(line)
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+
+def _committed_size(f, chunk_size=1 << 16):
+    """Byte length of a binary file up to and including its last newline"""
+    end = f.seek(0, os.SEEK_END)
+    while end > 0:
+        start = max(0, end - chunk_size)
+        f.seek(start)
+        newline = f.read(end - start).rfind(b'\n')
+        if newline != -1:
+            return start + newline + 1
+        end = start
+    return 0
+
+
+class PageLogReader:
+    """
+    Reads a PageLog back: header up front, pages decoded one line at a time on every iteration
+    (same interface as the pages of a streamed combined raw file: re-iterable, len()).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = {}
+        self._page_count = None
+        for record in self._records():
+            if record.get('type') != HEADER_RECORD:
+                raise ValueError(f"{path} does not start with a page log header record")
+            self.header = {k: v for k, v in record.items() if k != 'type'}
+            break
+
+    def _lines(self):
+        """Committed (newline-terminated) lines; a torn last line is skipped"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.endswith('\n') and line.strip():
+                    yield line
+
+    def _records(self):
+        for line in self._lines():
+            yield json.loads(line)
+
+    def __iter__(self):
+        for record in self._records():
+            if record.get('type') == PAGE_RECORD:
+                yield record.get('page')
+
+    def __len__(self):
+        if self._page_count is None:
+            # Every committed line after the header is a page record; no need to decode them
+            self._page_count = max(0, sum(1 for _ in self._lines()) - 1)
+        return self._page_count
+
+
+def _indented(value, depth):
+    """value as json.dump(indent=2) writes it at the given nesting depth"""
+    return json.dumps(value, indent=2).replace('\n', '\n' + '  ' * depth)
+
+
+def convert_page_log(log_path, output_path=None):
+    """
+    Writes the legacy combined raw file ({username, userId, fetchedAt, user, tweetsAndReplies: {pageCount, pages}},
+    indent=2) from a page log, one page at a time. Defaults to the log path with .json instead of .pages.jsonl.
+    Returns the output path.
+    """
+    if output_path is None:
+        base = log_path[:-len(PAGE_LOG_SUFFIX)] if log_path.endswith(PAGE_LOG_SUFFIX) else os.path.splitext(log_path)[0]
+        output_path = base + '.json'
+    reader = PageLogReader(log_path)
+    header = reader.header
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('{\n')
+        for key in ('username', 'userId', 'fetchedAt', 'user'):
+            f.write(f'  {json.dumps(key)}: {_indented(header.get(key), 1)},\n')
+        f.write(f'  "tweetsAndReplies": {{\n    "pageCount": {len(reader)},\n    "pages": [')
+        count = 0
+        for page in reader:
+            f.write((',' if count else '') + '\n      ' + _indented(page, 3))
+            count += 1
+        f.write('\n    ]\n  }\n}' if count else ']\n  }\n}')
+    return output_path
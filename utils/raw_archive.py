@@ -0,0 +1,193 @@
+import gzip
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+from utils.logger import logger
+
+# RAW_RESPONSE_ARCHIVE modes
+ARCHIVE_ALL = 'all'
+ARCHIVE_ERRORS = 'errors'
+ARCHIVE_OFF = 'off'
+ARCHIVE_MODES = (ARCHIVE_ALL, ARCHIVE_ERRORS, ARCHIVE_OFF)
+
+_STOP = object()
+
+
+class RawResponseArchive:
+    """
+    Per-run archive of raw API responses, written by a background thread.
+    Each response is one gzip member appended to a rolling segment file
+    (raw_<run>_<n>.jsonl.gz, a new segment once max_segment_bytes is reached); an index file
+    (raw_<run>.index.jsonl) records handle, endpoint, error flag, segment, offset and length per record,
+    so a single response can be read back without decompressing the whole run.
+    record() only enqueues: serialization, compression and disk I/O happen off the event loop.
+    The queue holds at most max_queue responses; when it is full or the writer thread has died
+    (e.g. disk full), further responses are dropped and counted instead of piling up in memory.
+    """
+
+    def __init__(self, directory, mode=ARCHIVE_ALL, max_segment_bytes=64 * 1024 * 1024, compresslevel=6,
+                 max_queue=256):
+        self.directory = directory
+        self.mode = str(mode).strip().lower()
+        if self.mode not in ARCHIVE_MODES:
+            # e.g. "none" / "false": whoever set it meant to turn archiving down, not to archive everything
+            logger.warn(f"Unknown RAW_RESPONSE_ARCHIVE mode {mode!r} (expected {', '.join(ARCHIVE_MODES)}); archiving is off")
+            self.mode = ARCHIVE_OFF
+        self.max_segment_bytes = max_segment_bytes
+        self.compresslevel = compresslevel
+        self.max_queue = max(int(max_queue), 1)
+        self.run_id = None
+        self.records = 0
+        self.dropped = 0
+        self._drop_logged = False
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._count_lock = threading.Lock()
+
+    def start(self, run_id=None):
+        with self._lock:
+            if self._thread or self.mode == ARCHIVE_OFF:
+                return
+            self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.records = 0
+            self.dropped = 0
+            self._drop_logged = False
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._thread = threading.Thread(target=self._writer, name="raw-archive-writer", daemon=True)
+            self._thread.start()
+
+    def record(self, handle, endpoint, payload, error=False, cursor=None):
+        """
+        Queues one raw response; no-op when the sampling mode excludes it. Never blocks: dropped (False)
+        when the queue is full or the writer thread is gone.
+        """
+        if self.mode == ARCHIVE_OFF or (self.mode == ARCHIVE_ERRORS and not error):
+            return False
+        self.start()
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return self._drop("the writer thread has stopped")
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "handle": handle,
+            "endpoint": endpoint,
+            "cursor": cursor,
+            "error": bool(error),
+            "payload": payload,
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            return self._drop(f"the queue is full ({self.max_queue} responses)")
+        return True
+
+    def _drop(self, reason):
+        with self._count_lock:
+            self.dropped += 1
+            log = not self._drop_logged
+            self._drop_logged = True
+        if log:
+            logger.warn(f"Raw response archive: dropping responses because {reason}; the count is logged at close")
+        return False
+
+    def close(self):
+        """Writes everything still queued and stops the writer thread"""
+        with self._lock:
+            thread = self._thread
+            if not thread:
+                return
+            # A full queue drains while the writer lives; a dead writer never takes _STOP
+            while thread.is_alive():
+                try:
+                    self._queue.put(_STOP, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            thread.join()
+            self._thread = None
+        dropped = f", {self.dropped} dropped" if self.dropped else ""
+        logger.log(f"Raw response archive: {self.records} responses in {self.directory} (run {self.run_id}){dropped}")
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"raw_{self.run_id}_{segment:03d}.jsonl.gz")
+
+    def _writer(self):
+        try:
+            self._write_loop()
+        except Exception as e:
+            logger.error(f"Raw response archive: writer thread stopped: {e}")
+
+    def _write_loop(self):
+        os.makedirs(self.directory, exist_ok=True)
+        segment = 0
+        segment_file = None
+        # Line-buffered so the index stays usable if the run dies
+        index_file = open(os.path.join(self.directory, f"raw_{self.run_id}.index.jsonl"), 'a', encoding='utf-8', buffering=1)
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is _STOP:
+                    break
+                try:
+                    line = json.dumps(entry, separators=(',', ':')) + "\n"
+                    member = gzip.compress(line.encode('utf-8'), compresslevel=self.compresslevel)
+
+                    if segment_file is None:
+                        segment_file = open(self._segment_path(segment), 'ab')
+                    elif segment_file.tell() and segment_file.tell() + len(member) > self.max_segment_bytes:
+                        segment_file.close()
+                        segment += 1
+                        segment_file = open(self._segment_path(segment), 'ab')
+
+                    offset = segment_file.tell()
+                    segment_file.write(member)
+                    index_file.write(json.dumps({
+                        **{key: value for key, value in entry.items() if key != "payload"},
+                        "segment": os.path.basename(self._segment_path(segment)),
+                        "offset": offset,
+                        "length": len(member),
+                        "raw_bytes": len(line),
+                    }) + "\n")
+                    self.records += 1
+                except Exception as e:
+                    with self._count_lock:
+                        self.dropped += 1
+                    logger.error(f"Raw response archive: failed to write {entry.get('endpoint')} for @{entry.get('handle')}: {e}")
+        finally:
+            if segment_file:
+                segment_file.close()
+            index_file.close()
+
+
+def read_index(directory, run_id=None):
+    """Index entries of one run (default: the newest run in directory)"""
+    if run_id is None:
+        runs = sorted(f[len("raw_"):-len(".index.jsonl")] for f in os.listdir(directory) if f.endswith(".index.jsonl"))
+        if not runs:
+            return []
+        run_id = runs[-1]
+    with open(os.path.join(directory, f"raw_{run_id}.index.jsonl"), 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def read_record(directory, index_entry):
+    """Decompresses a single archived response (the record dict, including its payload)"""
+    with open(os.path.join(directory, index_entry["segment"]), 'rb') as f:
+        f.seek(index_entry["offset"])
+        member = f.read(index_entry["length"])
+    return json.loads(gzip.decompress(member).decode('utf-8'))
+
+
+def iter_records(directory, run_id=None, handle=None, endpoint=None, errors_only=False):
+    """Yields archived responses of one run, optionally filtered by handle (case-insensitive) / endpoint / error flag"""
+    for entry in read_index(directory, run_id):
+        if handle and (entry.get("handle") or "").lower() != handle.lower():
+            continue
+        if endpoint and entry.get("endpoint") != endpoint:
+            continue
+        if errors_only and not entry.get("error"):
+            continue
+        yield read_record(directory, entry)
@@ -0,0 +1,195 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+
+def _slotted(cls):
+    """
+    Rebuilds a dataclass with __slots__ for its fields (no per-instance __dict__), as dataclass(slots=True)
+    does on Python 3.10+; written out so the module also runs on older interpreters.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items() if key not in names + ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_slotted
+@dataclass
+class TweetAuthor:
+    id: Optional[str] = None
+    screen_name: Optional[str] = None
+    name: Optional[str] = None
+    followers_count: Optional[int] = None
+    following_count: Optional[int] = None
+    verified: bool = False
+    profile_image_url: Optional[str] = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "screenName": self.screen_name,
+            "name": self.name,
+            "followersCount": self.followers_count,
+            "followingCount": self.following_count,
+            "verified": self.verified,
+            "profileImageUrl": self.profile_image_url,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            id=data.get("id"),
+            screen_name=data.get("screenName"),
+            name=data.get("name"),
+            followers_count=data.get("followersCount"),
+            following_count=data.get("followingCount"),
+            verified=bool(data.get("verified")),
+            profile_image_url=data.get("profileImageUrl"),
+        )
+
+
+@_slotted
+@dataclass
+class TweetRecord:
+    """
+    One hydrated tweet in the twitter_posts pipeline (api/twitter_posts._sanitize_tweet).
+    Slots instead of nested dicts per tweet; entity lists are tuples of tuples
+    (urls: display, expanded, url / mentions: screen name, id / media: id, type, media key,
+    display url, expanded url, media url). Dicts are only built when the output JSON is assembled.
+    """
+    id: Optional[str]
+    conversation_id: Optional[str] = None
+    created_at: Optional[str] = None
+    text: Optional[str] = None
+    in_reply_to_status_id: Optional[str] = None
+    in_reply_to_user_id: Optional[str] = None
+    quoted_status_id: Optional[str] = None
+    is_quote_status: bool = False
+    author: TweetAuthor = None
+    reply_count: Optional[int] = None
+    retweet_count: Optional[int] = None
+    quote_count: Optional[int] = None
+    like_count: Optional[int] = None
+    bookmark_count: Optional[int] = None
+    view_count: Any = None
+    urls: Tuple = ()
+    mentions: Tuple = ()
+    hashtags: Tuple = ()
+    media: Tuple = ()
+    language: Optional[str] = None
+    source: Optional[str] = None
+    reply_to_user_results: Any = None
+
+    @property
+    def sort_key(self):
+        """Tweet id as a number, else the created_at timestamp, else 0"""
+        if self.id:
+            try:
+                return int(self.id)
+            except (TypeError, ValueError):
+                pass
+        if self.created_at:
+            try:
+                return datetime.strptime(self.created_at, '%a %b %d %H:%M:%S %z %Y').timestamp()
+            except Exception:
+                return 0
+        return 0
+
+    def engagement(self):
+        return {
+            "replyCount": self.reply_count,
+            "retweetCount": self.retweet_count,
+            "quoteCount": self.quote_count,
+            "likeCount": self.like_count,
+            "bookmarkCount": self.bookmark_count,
+            "viewCount": self.view_count,
+        }
+
+    def url_dicts(self):
+        return [{"displayUrl": display, "expandedUrl": expanded, "url": url} for display, expanded, url in self.urls]
+
+    def to_minimal_dict(self):
+        """Sentiment/context-friendly essentials: a tweetsFlat / threads entry of the clean output"""
+        author = self.author or TweetAuthor()
+        return {
+            "id": self.id,
+            "createdAt": self.created_at,
+            "text": self.text,
+            "conversationId": self.conversation_id,
+            "inReplyToStatusId": self.in_reply_to_status_id,
+            "inReplyToUserId": self.in_reply_to_user_id,
+            "quotedStatusId": self.quoted_status_id,
+            "isQuoteStatus": self.is_quote_status,
+            "author": {
+                "id": author.id,
+                "screenName": author.screen_name,
+                "name": author.name,
+            },
+            "engagement": self.engagement(),
+            "urls": self.url_dicts(),
+        }
+
+    def to_dict(self):
+        """The full sanitized tweet"""
+        return {
+            "id": self.id,
+            "conversationId": self.conversation_id,
+            "createdAt": self.created_at,
+            "text": self.text,
+            "inReplyToStatusId": self.in_reply_to_status_id,
+            "inReplyToUserId": self.in_reply_to_user_id,
+            "quotedStatusId": self.quoted_status_id,
+            "isQuoteStatus": self.is_quote_status,
+            "author": (self.author or TweetAuthor()).to_dict(),
+            "engagement": self.engagement(),
+            "urls": self.url_dicts(),
+            "mentions": [{"screenName": screen_name, "id": user_id} for screen_name, user_id in self.mentions],
+            "hashtags": list(self.hashtags),
+            "media": [
+                {
+                    "id": media_id,
+                    "type": media_type,
+                    "mediaKey": media_key,
+                    "displayUrl": display_url,
+                    "expandedUrl": expanded_url,
+                    "mediaUrl": media_url,
+                }
+                for media_id, media_type, media_key, display_url, expanded_url, media_url in self.media
+            ],
+            "language": self.language,
+            "source": self.source,
+            "replyToUserResults": self.reply_to_user_results,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict (e.g. a tweet read back from db/tweet_cache.py)"""
+        engagement = data.get("engagement") or {}
+        return cls(
+            id=data.get("id"),
+            conversation_id=data.get("conversationId"),
+            created_at=data.get("createdAt"),
+            text=data.get("text"),
+            in_reply_to_status_id=data.get("inReplyToStatusId"),
+            in_reply_to_user_id=data.get("inReplyToUserId"),
+            quoted_status_id=data.get("quotedStatusId"),
+            is_quote_status=bool(data.get("isQuoteStatus")),
+            author=TweetAuthor.from_dict(data.get("author") or {}),
+            reply_count=engagement.get("replyCount"),
+            retweet_count=engagement.get("retweetCount"),
+            quote_count=engagement.get("quoteCount"),
+            like_count=engagement.get("likeCount"),
+            bookmark_count=engagement.get("bookmarkCount"),
+            view_count=engagement.get("viewCount"),
+            urls=tuple((u.get("displayUrl"), u.get("expandedUrl"), u.get("url")) for u in data.get("urls") or ()),
+            mentions=tuple((m.get("screenName"), m.get("id")) for m in data.get("mentions") or ()),
+            hashtags=tuple(data.get("hashtags") or ()),
+            media=tuple(
+                (m.get("id"), m.get("type"), m.get("mediaKey"), m.get("displayUrl"), m.get("expandedUrl"), m.get("mediaUrl"))
+                for m in data.get("media") or ()
+            ),
+            language=data.get("language"),
+            source=data.get("source"),
+            reply_to_user_results=data.get("replyToUserResults"),
+        )
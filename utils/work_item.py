@@ -0,0 +1,67 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class ProfileWorkItem:
+    """
+    One discovered profile travelling through the pipeline stages (collection -> AI -> Notion/DB).
+    Stages hand the object itself to each other; the <handle>_tweets.json file is only an optional
+    copy for debugging and recovery.
+    """
+    profile: dict
+    tweets: List = field(default_factory=list)
+    source_username: str = 'unknown'
+    tweets_file: Optional[str] = None
+
+    @property
+    def screen_name(self):
+        return self.profile.get('screen_name')
+
+    @property
+    def file_name(self):
+        return f"{self.screen_name}_tweets.json"
+
+    @property
+    def complexity(self):
+        """Bio + tweet text length; recovery leftovers are analyzed smallest first"""
+        text_length = len(self.profile.get('description') or '')
+        for tweet in self.tweets:
+            if isinstance(tweet, dict):
+                text_length += len(tweet.get('text') or tweet.get('full_text') or '')
+            elif isinstance(tweet, str):
+                text_length += len(tweet)
+        return text_length
+
+    def to_dict(self):
+        """The tweets-file layout, also what simplify_twitter_data() expects"""
+        return {
+            "profile": self.profile,
+            "tweets": self.tweets,
+            "sourceUsername": self.source_username,
+        }
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(
+            profile=data.get('profile') or {},
+            tweets=data.get('tweets') or [],
+            source_username=data.get('sourceUsername', 'unknown'),
+            tweets_file=path,
+        )
+
+    def write_file(self, directory):
+        path = os.path.join(directory, self.file_name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        self.tweets_file = path
+        return path
+
+    async def write_file_async(self, directory):
+        """Writes the tweets file off the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.write_file, directory)
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from utils.logger import logger
+
+
+class WorkerPool:
+    """
+    A fixed number of long-lived asyncio workers pulling jobs from one shared queue.
+    Unlike gather() over fixed-size chunks, a slow job only occupies its own worker: the others
+    keep taking new jobs, so the pool stays busy until the queue is drained. Jobs can be submitted
+    from anywhere in the run (e.g. from every source in turn) while earlier jobs are still running.
+    """
+
+    def __init__(self, handler, workers, name="Worker pool", queue_size=0, on_result=None):
+        """
+        handler: async callable run for each job with the submitted arguments.
+        on_result: optional callback(args, result, error) run after each job; error is the exception
+        raised by the handler (result is None then).
+        queue_size: bound on waiting jobs (0 = unbounded); a full queue makes submit() wait.
+        """
+        self.handler = handler
+        self.workers = max(int(workers), 1)
+        self.name = name
+        self.on_result = on_result
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks = []
+        self._started_at = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy = 0
+        self.peak_busy = 0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._started_at = time.perf_counter()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, *args):
+        self.start()
+        self.submitted += 1
+        await self._queue.put(args)
+
+    async def _worker(self):
+        while True:
+            args = await self._queue.get()
+            self.busy += 1
+            self.peak_busy = max(self.peak_busy, self.busy)
+            result, error = None, None
+            try:
+                result = await self.handler(*args)
+            except Exception as e:
+                error = e
+                self.failed += 1
+                logger.error(f"{self.name}: job failed: {e}")
+            finally:
+                self.busy -= 1
+                self.completed += 1
+            if self.on_result:
+                try:
+                    self.on_result(args, result, error)
+                except Exception as e:
+                    logger.error(f"{self.name}: result callback failed: {e}")
+            self._queue.task_done()
+
+    def pending(self):
+        """Jobs waiting in the queue (not yet picked up by a worker)"""
+        return self._queue.qsize()
+
+    async def join(self):
+        """
+        Waits until every submitted job has finished, then stops the workers. Returns run stats.
+        """
+        if self._tasks:
+            await self._queue.join()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "peak_busy": self.peak_busy,
+            "seconds": time.perf_counter() - self._started_at if self._started_at else 0.0,
+        }